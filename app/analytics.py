@@ -0,0 +1,139 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Integer, case, cast, func, select
+
+from database import engine, DetectionBox, Drawing
+
+# 비율 히스토그램에서 사용할 수 있는 박스 측정값
+MEASURES = ("area", "w", "h")
+
+
+def _box_filters(image_type: str, since: Optional[datetime], until: Optional[datetime]) -> list:
+    """(image_type, label, created_at) 복합 인덱스를 타는 공통 필터"""
+    filters = [DetectionBox.image_type == image_type]
+    if since is not None:
+        filters.append(DetectionBox.created_at >= since)
+    if until is not None:
+        filters.append(DetectionBox.created_at < until)
+    return filters
+
+
+def count_drawings(image_type: str, since: Optional[datetime] = None, until: Optional[datetime] = None) -> int:
+    query = select(func.count()).select_from(Drawing).where(Drawing.image_type == image_type)
+    if since is not None:
+        query = query.where(Drawing.created_at >= since)
+    if until is not None:
+        query = query.where(Drawing.created_at < until)
+    with engine.connect() as connection:
+        return connection.execute(query).scalar_one()
+
+
+def label_counts(image_type: str, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                 limit: int = 50, offset: int = 0) -> dict:
+    """
+    레이블별 박스 수 / 평균 신뢰도 / 평균 면적을 박스 수 내림차순으로 페이지 단위 조회.
+    total 은 조건에 맞는 레이블 종류 수.
+    """
+    filters = _box_filters(image_type, since, until)
+    query = (
+        select(
+            DetectionBox.label,
+            func.count().label("count"),
+            func.avg(DetectionBox.confidence).label("avg_confidence"),
+            func.avg(DetectionBox.area).label("avg_area"),
+        )
+        .where(*filters)
+        .group_by(DetectionBox.label)
+        .order_by(func.count().desc(), DetectionBox.label)
+        .limit(limit)
+        .offset(offset)
+    )
+    total_query = select(func.count(func.distinct(DetectionBox.label))).where(*filters)
+    with engine.connect() as connection:
+        rows = connection.execute(query).all()
+        total = connection.execute(total_query).scalar_one()
+    return {
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "items": [
+            {
+                "label": label,
+                "count": count,
+                "avg_confidence": float(avg_confidence or 0),
+                "avg_area": float(avg_area or 0),
+            }
+            for label, count, avg_confidence, avg_area in rows
+        ],
+    }
+
+
+def ratio_histogram(image_type: str, numerator: str, denominator: str, measure: str = "area",
+                    bins: int = 20, low: float = 0.0, high: float = 1.0,
+                    since: Optional[datetime] = None, until: Optional[datetime] = None) -> dict:
+    """
+    그림별 (numerator 레이블 측정값 합 / denominator 레이블 측정값 합) 비율의 히스토그램.
+    그림별 합계와 구간 집계를 모두 DB 에서 수행하고, 결과는 구간 수 만큼의 행만 가져온다.
+    denominator 가 없는(합이 0인) 그림은 제외하고, 범위를 벗어난 값은 underflow / overflow 로 센다.
+    """
+    if measure not in MEASURES:
+        raise ValueError(f"measure must be one of {MEASURES}")
+    if bins <= 0 or high <= low:
+        raise ValueError("bins must be positive and high must be greater than low")
+
+    column = getattr(DetectionBox, measure)
+    per_drawing = (
+        select(
+            DetectionBox.drawing_id,
+            func.sum(case((DetectionBox.label == numerator, column), else_=0.0)).label("num"),
+            func.sum(case((DetectionBox.label == denominator, column), else_=0.0)).label("den"),
+        )
+        .where(*_box_filters(image_type, since, until), DetectionBox.label.in_((numerator, denominator)))
+        .group_by(DetectionBox.drawing_id)
+        .subquery()
+    )
+    ratio = per_drawing.c.num * 1.0 / per_drawing.c.den
+    width = (high - low) / bins
+    # floor((ratio - low) / width). CAST 는 SQLite 에서는 버림, PostgreSQL 에서는 반올림이므로
+    # 정수로 바꾼 값이 원래 값보다 크면 1 을 빼서 두 DB 모두 내림이 되게 한다 (FLOOR 는 SQLite 기본 빌드에 없음)
+    position = (ratio - low) / width
+    truncated = cast(position, Integer)
+    bucket = case(
+        (ratio < low, -1),
+        (ratio >= high, bins),
+        else_=truncated - case((truncated > position, 1), else_=0),
+    ).label("bucket")
+    query = (
+        select(bucket, func.count().label("count"), func.sum(ratio).label("total"))
+        .where(per_drawing.c.den > 0)
+        .group_by(bucket)
+    )
+    with engine.connect() as connection:
+        rows = connection.execute(query).all()
+
+    counts = [0] * bins
+    underflow = overflow = drawings = 0
+    ratio_sum = 0.0
+    for index, count, total in rows:
+        drawings += count
+        ratio_sum += total or 0.0
+        if index < 0:
+            underflow += count
+        elif index >= bins:
+            overflow += count
+        else:
+            counts[index] += count
+    return {
+        "numerator": numerator,
+        "denominator": denominator,
+        "measure": measure,
+        "drawings": drawings,
+        "mean": ratio_sum / drawings if drawings else None,
+        "underflow": underflow,
+        "overflow": overflow,
+        "bins": [
+            {"low": low + i * width, "high": low + (i + 1) * width, "count": count}
+            for i, count in enumerate(counts)
+        ],
+    }
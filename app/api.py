@@ -1,21 +1,63 @@
-from fastapi import APIRouter, HTTPException, File, UploadFile, Form
+from fastapi import APIRouter, HTTPException, Query, Header, Depends, Request
+from datetime import datetime
+from typing import List, Optional
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+import asyncio
+import json
 import os
+import time
 
-from openai import OpenAI
-from database import save_to_database, SessionLocal, DetectionResult
-from models.house_model import detect_houses
-from models.tree_model import detect_trees
-from models.person_model import detect_people
+from llm_client import chat_completion, chat_completion_stream
+from config import (
+    OPENAI_MODEL,
+    BATCH_DETECT_MAX_FILES,
+    BATCH_DETECT_MAX_BYTES,
+    BATCH_DETECT_CHUNK,
+    BATCH_DETECT_LLM_CONCURRENCY,
+    ANALYTICS_MAX_PAGE_SIZE,
+    ANALYTICS_MAX_BINS,
+    JOB_MAX_WAIT,
+    LLM_BUDGET_MS,
+)
+from models.house_model import detect_houses_batch
+from models.tree_model import detect_trees_batch
+from models.person_model import detect_people_batch
+from inference import executors, MicroBatcher, InferenceQueueFull
+from image_utils import prepare_image, spill_upload, infer_image_type, read_archive
+from ingest import read_upload, read_batch_upload, upload_openapi, form_bool, UploadForm
+from dependencies import run_htp_pipeline
+from cache import (
+    result_cache,
+    result_cache_key,
+    feature_cache,
+    feature_cache_key,
+    feature_flight,
+    cache_stats,
+)
+from persistence import result_writer
+from metrics import stage, record_error, LLM_EVENTS
+from profiling import verify_admin, profile_call
+from analytics import label_counts, count_drawings, ratio_histogram
+from jobs import job_queue, JobQueueFull
+from models.model_manager import model_manager
+from models.bbox_set import BoundingBoxSet
 
 # 분석 함수 매핑
-from models.house_func import analyze_house
-from models.person_func import analyze_person
-from models.tree_func import analyze_tree
+from models.house_func import analyze_house, rules as house_rules, label_mapping as house_names
+from models.person_func import analyze_person, rules as person_rules, label_mapping as person_names
+from models.tree_func import analyze_tree, rules as tree_rules, label_mapping as tree_names
+from prompt import build_messages
 
 router = APIRouter()
 
+# 모델별 마이크로 배처: 동시 요청을 모아 한 번의 배치 추론으로 실행
+batchers = {
+    "house": MicroBatcher(executors["house"], detect_houses_batch),
+    "tree": MicroBatcher(executors["tree"], detect_trees_batch),
+    "person": MicroBatcher(executors["person"], detect_people_batch),
+}
+
 # house label
 house_label = {
     0: "집전체",
@@ -127,97 +169,243 @@ def parse_bboxes(yolo_raw_boxes, image_type):
             })
     return parsed
 
-@router.post("/detect")
-async def detect_image(
-    image: UploadFile = File(...),
-    type: str = Form(...)
-):
+# 타입별 레이블 / 규칙 기반 분석 함수
+label_dicts = {"house": house_label, "tree": tree_label, "person": person_label}
+analyzers = {"house": analyze_house, "tree": analyze_tree, "person": analyze_person}
+rule_sets = {"house": house_rules, "tree": tree_rules, "person": person_rules}
+english_names = {"house": house_names, "tree": tree_names, "person": person_names}
+
+async def detect_boxes(contents: bytes, type: str, source: str = None) -> BoundingBoxSet:
+    """
+    업로드 바이트 검사/디코딩/축소 → 해당 타입 모델로 YOLO 탐지 → 원본 좌표의 BoundingBoxSet 변환.
+    탐지 결과는 통계용 박스 테이블에도 기록된다 (write-behind).
+    """
+    with stage("preprocess"):
+        image = await asyncio.to_thread(prepare_image, contents)
+    with stage("inference"):
+        boxes = await batchers[type].submit(image.array)
+    box_set = BoundingBoxSet.from_prepared(boxes, label_dicts[type], image)
+    result_writer.enqueue_boxes(source, type, box_set)
+    return box_set
+
+def detection_result(gpt_result, yolo_analysis, formatted_boxes: list, image_size: tuple = None) -> dict:
+    """
+    GPT 해석이 있으면 그것을, 없으면 규칙 기반 분석 문자열을 analysis 로 하는 응답 dict.
+    image_size 는 박스 좌표 기준인 원본 이미지 (너비, 높이) 로, 캐시된 결과로 위치 규칙을 다시 평가할 때 쓴다.
+    """
+    if gpt_result and "gpt_result" in gpt_result:
+        analysis_text = gpt_result["gpt_result"]
+    else:
+        analysis_text = yolo_analysis if isinstance(yolo_analysis, str) else "\n".join(yolo_analysis)
+
+    return {
+        "status": "success",
+        "analysis": analysis_text,
+        "boxes": formatted_boxes,
+        "image_size": list(image_size) if image_size else None
+    }
+
+# 지연 예산을 넘겨 응답한 뒤에도 계속 진행 중인 GPT 해석 (GC 로 사라지지 않도록 참조 유지)
+background_interpretations = set()
+
+def finish_in_background(interpretation: asyncio.Future, result_key: str, yolo_analysis, formatted_boxes: list,
+                         image_size: tuple = None):
+    """진행 중인 GPT 해석이 끝나면 완성된 결과를 result_key 로 결과 캐시에 저장"""
+    async def finish():
+        try:
+            gpt_result = await interpretation
+        except Exception:
+            # interpret_drawing 이 이미 오류를 기록함
+            LLM_EVENTS.inc(event="background_error")
+            return
+        LLM_EVENTS.inc(event="background_done")
+        if result_key is not None:
+            await result_cache.store(
+                result_key, detection_result(gpt_result, yolo_analysis, formatted_boxes, image_size)
+            )
+
+    task = asyncio.ensure_future(finish())
+    background_interpretations.add(task)
+    task.add_done_callback(background_interpretations.discard)
+
+async def run_detection(contents: bytes, type: str, image_path: str,
+                        deadline: float = None, result_key: str = None) -> dict:
+    """
+    업로드 바이트 디코딩 → YOLO 탐지 → 규칙 기반 분석 → GPT 해석까지 수행하고 응답 dict 반환.
+    deadline(time.monotonic 기준)까지 GPT 해석이 끝나지 않으면 규칙 기반 분석으로 먼저 응답하고
+    (interpretation: "pending"), 해석은 백그라운드에서 마저 받아 result_key 로 결과 캐시에 저장한다.
+    GPT 호출이 실패하면 규칙 기반 분석으로 응답한다 (fallback: true, 결과 캐시에 저장하지 않음).
+    """
+    if type not in batchers:
+        return {"status": "error", "message": "Invalid type"}
+
     try:
-        # 임시 파일로 저장
-        contents = await image.read()
-        image_path = f"temp/{image.filename}"
-        with open(image_path, "wb") as f:
-            f.write(contents)
+        # 객체 감지 수행
+        box_set = await detect_boxes(contents, type, image_path)
+        formatted_boxes = box_set.to_dicts()
+
+        # YOLO 분석
+        with stage("analyze"):
+            yolo_analysis = analyzers[type](box_set)
         
+        # GPT 분석 (위에서 계산한 규칙 기반 분석을 그대로 프롬프트에 사용)
+        interpretation = asyncio.ensure_future(interpret_drawing(type, box_set, yolo_analysis))
+        if deadline is not None:
+            done, _ = await asyncio.wait({interpretation}, timeout=max(0.0, deadline - time.monotonic()))
+            if not done:
+                LLM_EVENTS.inc(event="budget_fallback")
+                finish_in_background(
+                    interpretation, result_key, yolo_analysis, formatted_boxes, box_set.image_size
+                )
+                result = detection_result(None, yolo_analysis, formatted_boxes, box_set.image_size)
+                result["interpretation"] = "pending"
+                if result_key is not None:
+                    result["result_key"] = result_key
+                    result["result_url"] = f"/api/results/{result_key}"
+                return result
         try:
-            formatted_boxes = []
-            
-            # 객체 감지 수행
-            if type == "house":
-                boxes = detect_houses(image_path)
-                detect_func = analyze_house
-                label_dict = house_label 
-            elif type == "tree":
-                boxes = detect_trees(image_path)
-                detect_func = analyze_tree
-                label_dict = tree_label
-            elif type == "person":
-                boxes = detect_people(image_path)
-                detect_func = analyze_person
-                label_dict = person_label
-            else:
-                return {"status": "error", "message": "Invalid type"}
-
-            # boxes 형식 검증 및 변환
-            if isinstance(boxes, list):
-                formatted_boxes = [
-                    {
-                        "label": label_dict[int(box[5])],
-                        "x": float(box[0]),
-                        "y": float(box[1]),
-                        "w": float(box[2] - box[0]),
-                        "h": float(box[3] - box[1])
-                    }
-                    for box in boxes
-                ]
-                
-                # YOLO 분석
-                yolo_analysis = detect_func(formatted_boxes)
-                
-                # GPT 분석
-                gpt_result = await analyze_drawing(image_path, formatted_boxes, type)
-                
-                # 분석 결과 처리
-                if gpt_result and "gpt_result" in gpt_result:
-                    analysis_text = gpt_result["gpt_result"]
-                else:
-                    analysis_text = yolo_analysis if isinstance(yolo_analysis, str) else "\n".join(yolo_analysis)
-
-            else:
-                analysis_text = f"No {type} objects detected"
-
-            # 임시 파일 삭제
-            if os.path.exists(image_path):
-                os.remove(image_path)
-
-            return {
-                "status": "success",
-                "analysis": analysis_text,
-                "boxes": formatted_boxes
-            }
-
-        except Exception as analysis_error:
-            print(f"Analysis error: {str(analysis_error)}")
-            if os.path.exists(image_path):
-                os.remove(image_path)
-            return {
-                "status": "error",
-                "message": "이미지 분석 중 오류가 발생했습니다.",
-                "error": str(analysis_error)
-            }
+            gpt_result = await interpretation
+        except Exception:
+            # interpret_drawing 이 이미 오류를 기록함
+            LLM_EVENTS.inc(event="error_fallback")
+            result = detection_result(None, yolo_analysis, formatted_boxes, box_set.image_size)
+            result["fallback"] = True
+            return result
         
+        # 분석 결과 처리
+        return detection_result(gpt_result, yolo_analysis, formatted_boxes, box_set.image_size)
+
+    except InferenceQueueFull:
+        raise
+
+    except Exception as analysis_error:
+        print(f"Analysis error: {str(analysis_error)}")
+        record_error("analyze")
+        return {
+            "status": "error",
+            "message": "이미지 분석 중 오류가 발생했습니다.",
+            "error": str(analysis_error)
+        }
+
+# 업로드 폼 필드 (read_upload 로 직접 파싱하는 라우트의 OpenAPI 문서용)
+TYPE_FIELD = {"type": {"type": "string", "enum": ["house", "tree", "person"]}}
+
+@router.post("/detect", openapi_extra=upload_openapi({**TYPE_FIELD, "budget_ms": {"type": "number"}}))
+async def detect_image(
+    request: Request,
+    upload: UploadForm = Depends(read_upload),
+    x_profile: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    폼: image (파일), type, budget_ms.
+    업로드는 조각 단위로 받으며 UPLOAD_MAX_BYTES / UPLOAD_MAX_PIXELS 를 넘거나 이미지가 아니면 413 / 415.
+    budget_ms (기본 LLM_BUDGET_MS, 0 이면 무제한): 요청 도착부터 이 시간 안에 GPT 해석이 없으면
+    규칙 기반 분석으로 응답한다. 완성된 결과는 result_url 로 나중에 조회한다.
+    """
+    # 예산은 업로드 수신 시간까지 포함하도록 미들웨어가 기록한 요청 도착 시각부터 잰다
+    started = getattr(request.state, "arrived", None) or time.monotonic()
+    type = upload.field("type")
+    budget_ms = upload.field("budget_ms", LLM_BUDGET_MS, float)
+    deadline = started + budget_ms / 1000 if budget_ms > 0 else None
+    try:
+        if type not in batchers:
+            return {"status": "error", "message": "Invalid type"}
+
+        contents, filename = upload.contents, upload.filename
+        with stage("spill"):
+            spill_upload(contents, filename)
+
+        # X-Profile: 1 + 관리자 토큰이면 캐시를 거치지 않고 탐지 → 분석 경로의 cProfile 요약을 첨부
+        if x_profile == "1" and verify_admin(x_admin_token):
+            result, summary = await profile_call(lambda: run_detection(contents, type, filename))
+            return {**result, "profile": summary if summary is not None else "busy"}
+
+        # 같은 이미지 + 타입 + 모델 버전이면 캐시된 결과 재사용 (동시 요청은 한 번만 계산)
+        key = result_cache_key(contents, type, model_manager.version(type))
+        return await result_cache.get_or_compute(
+            key, lambda: run_detection(contents, type, filename, deadline, key)
+        )
+
+    except InferenceQueueFull as e:
+        # 추론 대기열 포화: 클라이언트가 잠시 후 재시도하도록 503 반환
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
     except Exception as e:
         print(f"Error: {str(e)}")
+        record_error("detect")
         return {"status": "error", "message": str(e)}
 
 ##############################
 # 2) GPT 분석 관련 코드
 ##############################
-from dotenv import load_dotenv
-load_dotenv() 
+def build_prompt(type: str, feature_list: list, boxes) -> list:
+    """규칙 기반 분석 결과와 박스 요약으로 GPT 메시지 생성 (좌표는 원본 이미지 크기 대비 %)"""
+    box_set = BoundingBoxSet.coerce(boxes)
+    canvas = box_set.image_size or (rule_sets[type].canvas_size, rule_sets[type].canvas_size)
+    return build_messages(type, feature_list, box_set, english_names[type], canvas)
+
+# GPT 생성 파라미터 (일반 / 스트리밍 호출 공통)
+GPT_PARAMS = {
+    "temperature": 0.5,
+    "max_tokens": 1000,
+    "presence_penalty": 0.3,
+}
+
+async def request_interpretation(type: str, boxes, feature_list: list, cache_key: str) -> str:
+    """GPT 해석을 요청하고 결과를 특징 캐시에 저장"""
+    # 공유 비동기 클라이언트로 호출: 이벤트 루프를 막지 않음 (타임아웃/재시도는 llm_client 에서 처리)
+    with stage("llm"):
+        response = await chat_completion(
+            model=OPENAI_MODEL,  # OPENAI_MODEL 환경변수로 변경 가능 (기본: gpt-3.5-turbo)
+            messages=build_prompt(type, feature_list, boxes),
+            **GPT_PARAMS
+        )
+    gpt_answer = response.choices[0].message.content.strip()
+    feature_cache.set(cache_key, gpt_answer)
+    return gpt_answer
+
+@router.get("/results/{result_key:path}")
+async def get_result(result_key: str):
+    """
+    지연 예산 초과로 규칙 기반 분석만 먼저 받은 요청의 완성된 결과 (result_url).
+    백그라운드 GPT 해석이 아직 끝나지 않았으면 404.
+    """
+    result = await result_cache.lookup(result_key)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Result not found or interpretation still pending")
+    return result
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """결과 캐시 / GPT 특징 캐시의 크기와 hit/miss 카운터"""
+    return cache_stats()
+
+async def interpret_drawing(type: str, boxes, feature_list: list) -> dict:
+    """
+    이미 계산된 규칙 기반 분석(feature_list)으로 GPT 해석을 받는다 (분석을 다시 돌리지 않음).
+    실패하면 오류를 기록하고 예외를 그대로 올린다.
+    """
+    try:
+        box_set = BoundingBoxSet.coerce(boxes)
+        # 양자화된 특징이 같은 그림은 GPT 해석을 재사용 (feature_list[0] 은 원본 좌표 문자열이라 제외)
+        key = feature_cache_key(type, box_set.to_dicts(), feature_list[1:], OPENAI_MODEL)
+        gpt_answer = feature_cache.get(key)
+        if gpt_answer is None:
+            gpt_answer = await feature_flight.do(
+                key, lambda: request_interpretation(type, box_set, feature_list, key)
+            )
+
+        return {
+            "status": "success",
+            "features_analyzed": feature_list,
+            "gpt_result": gpt_answer
+        }
 
-# OpenAI API 키 설정 수정
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    except Exception as e:
+        print(f"GPT Analysis error: {str(e)}")
+        record_error("llm")
+        raise
 
 @router.get("/analysis/{image_path:path}")
 async def analyze_drawing(image_path: str, boxes: list, type: str):
@@ -226,93 +414,415 @@ async def analyze_drawing(image_path: str, boxes: list, type: str):
     2) GPT API를 통해 HTP 해석 프롬프트 전송
     3) 결과 반환
     """
+    # 특징 분석
+    feature_list = []
+    
+    # 각 타입별 분석 수행
+    if type == "house":
+        feature_list.extend(analyze_house(boxes))
+    elif type == "tree":
+        feature_list.extend(analyze_tree(boxes))
+    elif type == "person":
+        feature_list.extend(analyze_person(boxes))
+
     try:
-        # 특징 분석
-        feature_list = []
-        
-        # 각 타입별 분석 수행
-        if type == "house":
-            feature_list.extend(analyze_house(boxes))
-        elif type == "tree":
-            feature_list.extend(analyze_tree(boxes))
-        elif type == "person":
-            feature_list.extend(analyze_person(boxes))
-
-        # GPT에 전달할 문자열 생성
-        features_str = "\n".join(feature_list)
-
-        # system_prompt (기존 코드 유지)
-        system_prompt = """You are a professional HTP psychologist and mental health counselor.
-        Analyze both current psychological state and developmental influences through drawing features.
-        Provide detailed analysis by connecting specific drawing features to psychological interpretations. 
-        - Use formal Korean (-습니다)
-        - Do not use special characters
-        - Avoid using personal pronouns or labels (e.g., 'you', 'artist', etc)
-        - Only use emojis that are specifically defined in section headers
-        """
-
-        # user_prompt (기존 코드 유지)
-        user_prompt = f"""
-        === HTP Analysis Request ===
-        Drawing Type: {type.upper()}
-        Features Detected:
-        {features_str}
-
-        Using the bounding box coordinates [x,y,w,h], analyze the sketch and provide psychological interpretation in formal Korean.
-        Translate all measurements into descriptive terms (e.g., centered, upper right, large, small):
-
-        1. Personality Analysis:
-        - Start with "1. 🔅 성격 특징 🔅"
-        - Key personality traits
-        - Analyze element sizes and placements from coordinates
-        - Connect spatial features to personality traits
-        - Interpret overall composition
-
-        2. Social Characteristics:
-        - Start with "2. 🌤️ 대인 관계 🌤️"
-        - Family relationship patterns
-        - Communication style
-        - Interpret element spacing and relationship boundaries
-        - Attachment patterns
-
-        3. Current Mental State:
-        - Start with "3. 🧘 현재 심리 상태 🧘"
-        - Emotional stability
-        - Developmental effects
-        - Stress/anxiety levels
-        - Coping mechanisms
-
-        4. Mental Health Care:
-        - Start with "4. 💪 멘탈 케어 Tips 💪"
-        - Understanding past influences
-        - Stress management suggestions
-        - Provide practical suggestions
-        - Growth potential
-        """
-
-        # (3-3) 최신 openai >= 1.0.0 방식
-        # ChatCompletion → "openai.chat_completions.create(...)"
-        # 또는 그대로 openai.ChatCompletion.create(...)가 동작하는 경우도 있으나,
-        # 최신 권장 방식은 아래와 같습니다.
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",  # 공식 OpenAI 모델 사용 (ex: gpt-3.5-turbo or gpt-4)
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.5,
-            max_tokens=1000,
-            presence_penalty=0.3
-        )
+        return await interpret_drawing(type, boxes, feature_list)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+##############################
+# 3) 스트리밍 응답 관련 코드
+##############################
+def ndjson_line(event: dict) -> bytes:
+    return (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
 
-        gpt_answer = response.choices[0].message.content.strip()
+@router.post("/detect/stream", openapi_extra=upload_openapi(TYPE_FIELD))
+async def detect_image_stream(upload: UploadForm = Depends(read_upload)):
+    """
+    /detect 의 스트리밍(NDJSON) 버전. 한 줄에 이벤트 하나씩 전송한다.
+    1) {"event": "boxes", "boxes": [...], "features": [...]}  탐지 + 규칙 기반 분석 직후
+    2) {"event": "token", "text": "..."}                      GPT 응답 토큰이 도착할 때마다
+    3) {"event": "done", "analysis": "..."}                   최종 해석 (GPT 실패 시 규칙 기반 분석)
+    """
+    type = upload.field("type")
+    if type not in batchers:
+        return {"status": "error", "message": "Invalid type"}
 
-        return {
+    contents, filename = upload.contents, upload.filename
+    with stage("spill"):
+        spill_upload(contents, filename)
+    key = result_cache_key(contents, type, model_manager.version(type))
+
+    cached = await result_cache.lookup(key)
+    if cached is not None and "image_size" not in cached:
+        # 원본 이미지 크기 없이 저장된 예전 결과는 위치 규칙이 달라질 수 있으므로 다시 탐지
+        cached = None
+    if cached is None:
+        # 탐지는 스트림 시작 전에 끝내서 대기열 포화 시 503 을 돌려줄 수 있게 한다
+        try:
+            box_set = await detect_boxes(contents, type, filename)
+        except InferenceQueueFull as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            record_error("detect")
+            return {"status": "error", "message": str(e)}
+    else:
+        image_size = cached["image_size"]
+        box_set = BoundingBoxSet.from_dicts(cached["boxes"], tuple(image_size) if image_size else None)
+    formatted_boxes = box_set.to_dicts()
+
+    async def events():
+        with stage("analyze"):
+            feature_list = analyzers[type](box_set)
+        yield ndjson_line({"event": "boxes", "boxes": formatted_boxes, "features": feature_list})
+
+        if cached is not None:
+            yield ndjson_line({"event": "done", "analysis": cached["analysis"]})
+            return
+
+        # 양자화된 특징이 같은 그림의 GPT 해석이 캐시에 있으면 바로 완료
+        feature_key = feature_cache_key(type, formatted_boxes, feature_list[1:], OPENAI_MODEL)
+        cached_answer = feature_cache.get(feature_key)
+        if cached_answer is not None:
+            yield ndjson_line({"event": "done", "analysis": cached_answer})
+            await result_cache.store(key, detection_result({"gpt_result": cached_answer}, feature_list,
+                                                           formatted_boxes, box_set.image_size))
+            return
+
+        tokens = []
+        try:
+            with stage("llm"):
+                async for token in chat_completion_stream(
+                    model=OPENAI_MODEL,
+                    messages=build_prompt(type, feature_list, box_set),
+                    **GPT_PARAMS
+                ):
+                    tokens.append(token)
+                    yield ndjson_line({"event": "token", "text": token})
+        except Exception as e:
+            print(f"GPT Analysis error: {str(e)}")
+            record_error("llm")
+            yield ndjson_line({"event": "done", "analysis": "\n".join(feature_list), "fallback": True})
+            return
+
+        analysis_text = "".join(tokens).strip()
+        feature_cache.set(feature_key, analysis_text)
+        yield ndjson_line({"event": "done", "analysis": analysis_text})
+        await result_cache.store(key, detection_result({"gpt_result": analysis_text}, feature_list,
+                                                       formatted_boxes, box_set.image_size))
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+##############################
+# 4) 배치 탐지 관련 코드
+##############################
+async def run_inference_chunk(type: str, arrays: list, retries: int = 50):
+    """배치 추론을 실행하되, 대기열이 가득 차 있으면 잠시 기다렸다가 다시 시도"""
+    for attempt in range(retries):
+        try:
+            return await executors[type].run(batchers[type].batch_func, arrays)
+        except InferenceQueueFull:
+            if attempt == retries - 1:
+                raise
+            await asyncio.sleep(0.1)
+
+def analyze_chunk(type: str, items: list, raw_boxes: list):
+    """
+    한 배치의 탐지 결과를 박스 변환 + 규칙 기반 분석까지 처리해
+    (레코드 리스트, BoundingBoxSet 리스트) 로 반환
+    """
+    records, box_sets = [], []
+    for (index, filename, image), boxes in zip(items, raw_boxes):
+        box_set = BoundingBoxSet.from_prepared(boxes, label_dicts[type], image)
+        box_sets.append(box_set)
+        records.append({
+            "index": index,
+            "filename": filename,
+            "type": type,
             "status": "success",
-            "features_analyzed": feature_list,
-            "gpt_result": gpt_answer
-        }
+            "boxes": box_set.to_dicts(),
+            "features": analyzers[type](box_set),
+        })
+    return records, box_sets
 
+async def interpret_record(type: str, record: dict, box_set: BoundingBoxSet, llm_slots: asyncio.Semaphore,
+                           queue: asyncio.Queue):
+    """배치 레코드 하나의 GPT 해석 (llm_slots 로 동시 호출 수 제한, 실패하면 규칙 기반 분석)"""
+    try:
+        feature_list = record["features"]
+        key = feature_cache_key(type, record["boxes"], feature_list[1:], OPENAI_MODEL)
+        analysis = feature_cache.get(key)
+        if analysis is None:
+            async with llm_slots:
+                analysis = await feature_flight.do(
+                    key, lambda: request_interpretation(type, box_set, feature_list, key)
+                )
+        record["analysis"] = analysis
     except Exception as e:
         print(f"GPT Analysis error: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        record_error("llm")
+        record["analysis"] = "\n".join(record["features"])
+    await queue.put(record)
+
+async def process_batch_group(type: str, items: list, interpret: bool, queue: asyncio.Queue,
+                              llm_slots: asyncio.Semaphore):
+    """
+    같은 타입의 이미지들을 BATCH_DETECT_CHUNK 개씩 묶어 전처리 → 배치 추론 → 분석하고
+    이미지별 결과 레코드를 queue 에 넣는다.
+    interpret 이면 GPT 해석은 다음 묶음의 추론과 겹쳐서 동시에 진행한다 (llm_slots 개까지).
+    """
+    interpretations = []
+    try:
+        for start in range(0, len(items), BATCH_DETECT_CHUNK):
+            chunk = items[start:start + BATCH_DETECT_CHUNK]
+            decoded, arrays = [], []
+            for index, filename, contents in chunk:
+                try:
+                    with stage("preprocess"):
+                        image = await asyncio.to_thread(prepare_image, contents)
+                    arrays.append(image.array)
+                    decoded.append((index, filename, image))
+                except Exception as e:
+                    await queue.put({"index": index, "filename": filename, "type": type,
+                                     "status": "error", "message": str(e)})
+            if not decoded:
+                continue
+
+            try:
+                with stage("inference"):
+                    raw_boxes = await run_inference_chunk(type, arrays)
+                with stage("analyze"):
+                    records, box_sets = await asyncio.to_thread(analyze_chunk, type, decoded, raw_boxes)
+            except Exception as e:
+                print(f"Batch analysis error: {str(e)}")
+                record_error("batch")
+                for index, filename, _ in decoded:
+                    await queue.put({"index": index, "filename": filename, "type": type,
+                                     "status": "error", "message": str(e)})
+                continue
+
+            for record, box_set in zip(records, box_sets):
+                result_writer.enqueue_boxes(record["filename"], type, box_set)
+                if interpret:
+                    interpretations.append(
+                        asyncio.create_task(interpret_record(type, record, box_set, llm_slots, queue))
+                    )
+                else:
+                    await queue.put(record)
+        await asyncio.gather(*interpretations)
+    finally:
+        for task in interpretations:
+            task.cancel()
+
+# 배치 업로드 폼 필드 (OpenAPI 문서용)
+BATCH_FIELDS = {
+    "images": {"type": "array", "items": {"type": "string", "format": "binary"}},
+    "types": {"type": "array", "items": {"type": "string", "enum": ["house", "tree", "person"]}},
+    "archive": {"type": "string", "format": "binary"},
+    "interpret": {"type": "boolean", "default": False},
+}
+
+@router.post("/detect/batch", openapi_extra=upload_openapi(BATCH_FIELDS, image_field=None))
+async def detect_image_batch(upload: UploadForm = Depends(read_batch_upload)):
+    """
+    여러 그림을 한 번에 탐지/분석하고 결과를 NDJSON 으로 스트리밍 (이미지 하나당 한 줄, 끝난 순서대로).
+    - images + types: 파일 여러 개와 각 파일의 타입 (types 가 하나면 모든 파일에 적용)
+    - archive: zip 파일 하나. 타입은 최상위 폴더명 또는 파일명 접두어로 구분 (house/1.png, tree_1.png)
+    - interpret: true 면 이미지마다 GPT 해석도 포함 (BATCH_DETECT_LLM_CONCURRENCY 개씩 동시에 요청)
+    본문은 스트리밍으로 받으며 BATCH_MAX_BYTES 를 넘으면 413.
+    모델별로 묶어 배치 추론하고, 서로 다른 모델의 그룹은 동시에 처리한다.
+    """
+    interpret = upload.field("interpret", False, form_bool)
+    archives, images = upload.files_for("archive"), upload.files_for("images")
+    if len(archives) > 1:
+        raise HTTPException(status_code=400, detail="Only one 'archive' file is allowed")
+
+    entries = []
+    for archive in archives:
+        try:
+            for name, contents in read_archive(archive.contents, BATCH_DETECT_MAX_FILES, BATCH_DETECT_MAX_BYTES):
+                entries.append((name, contents, infer_image_type(name)))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid archive: {str(e)}")
+    if images:
+        types = upload.values("types")
+        if len(types) not in (1, len(images)):
+            raise HTTPException(status_code=400, detail="types must have one entry or one per image")
+        for i, image in enumerate(images):
+            entries.append((image.filename, image.contents, types[0] if len(types) == 1 else types[i]))
+
+    if not entries:
+        raise HTTPException(status_code=400, detail="No images provided")
+    if len(entries) > BATCH_DETECT_MAX_FILES:
+        raise HTTPException(status_code=413, detail=f"Too many images (max {BATCH_DETECT_MAX_FILES})")
+
+    queue = asyncio.Queue()
+    groups = {}
+    for index, (filename, contents, type) in enumerate(entries):
+        if type in batchers:
+            groups.setdefault(type, []).append((index, filename, contents))
+        else:
+            queue.put_nowait({"index": index, "filename": filename, "type": type,
+                              "status": "error", "message": "Invalid type"})
+    llm_slots = asyncio.Semaphore(max(1, BATCH_DETECT_LLM_CONCURRENCY))
+
+    async def run_group(type: str, items: list):
+        try:
+            await process_batch_group(type, items, interpret, queue, llm_slots)
+        except Exception as e:
+            print(f"Batch group error ({type}): {str(e)}")
+            record_error("batch")
+        finally:
+            # 그룹이 어떻게 끝나든 종료 표시를 넣어 스트림이 멈추지 않게 한다
+            queue.put_nowait(None)
+
+    async def events():
+        tasks = [asyncio.create_task(run_group(type, items)) for type, items in groups.items()]
+        reported, finished = set(), 0
+        try:
+            while finished < len(tasks) or not queue.empty():
+                record = await queue.get()
+                if record is None:
+                    finished += 1
+                    continue
+                reported.add(record["index"])
+                yield ndjson_line(record)
+            # 그룹 작업이 예외로 끝나 결과를 내지 못한 이미지
+            for index, (filename, _, type) in enumerate(entries):
+                if index not in reported:
+                    yield ndjson_line({"index": index, "filename": filename, "type": type,
+                                       "status": "error", "message": "Batch processing failed"})
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+##############################
+# 5) 집 / 나무 / 사람 통합 탐지
+##############################
+# 파이프라인 결과 키 → 그림 타입
+PIPELINE_TYPES = {"houses": "house", "trees": "tree", "person": "person"}
+
+@router.post("/detect/htp", openapi_extra=upload_openapi({}))
+async def detect_htp(upload: UploadForm = Depends(read_upload)):
+    """
+    이미지 한 장을 한 번만 디코딩/전처리하고 세 모델을 동시에 실행해
+    타입별 박스와 규칙 기반 분석 결과를 함께 반환
+    """
+    try:
+        contents = upload.contents
+        with stage("spill"):
+            spill_upload(contents, upload.filename)
+        with stage("preprocess"):
+            prepared = await asyncio.to_thread(prepare_image, contents)
+        with stage("inference"):
+            predictions = await run_htp_pipeline(prepared.array)
+
+        results = {}
+        with stage("analyze"):
+            for key, boxes in predictions.items():
+                type = PIPELINE_TYPES[key]
+                box_set = BoundingBoxSet.from_prepared(boxes, label_dicts[type], prepared)
+                result_writer.enqueue_boxes(upload.filename, type, box_set)
+                results[type] = {"boxes": box_set.to_dicts(), "features": analyzers[type](box_set)}
+        return {"status": "success", "results": results}
+
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        record_error("detect")
+        return {"status": "error", "message": str(e)}
+
+##############################
+# 6) 탐지 통계 조회
+##############################
+def check_analytics_type(type: str):
+    if type not in label_dicts:
+        raise HTTPException(status_code=400, detail="Invalid type")
+
+@router.get("/analytics/labels")
+async def get_label_counts(
+    type: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=ANALYTICS_MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0)
+):
+    """
+    타입별 레이블 박스 수 / 평균 신뢰도 / 평균 면적 (박스 수 내림차순, limit/offset 페이지).
+    since ~ until(미포함) 기간으로 필터링하며, drawings 는 같은 기간의 그림 수.
+    """
+    check_analytics_type(type)
+    counts = await asyncio.to_thread(label_counts, type, since, until, limit, offset)
+    counts["drawings"] = await asyncio.to_thread(count_drawings, type, since, until)
+    return {"status": "success", "type": type, **counts}
+
+@router.get("/analytics/ratio-histogram")
+async def get_ratio_histogram(
+    type: str,
+    numerator: str,
+    denominator: str,
+    measure: str = "area",
+    bins: int = Query(20, ge=1, le=ANALYTICS_MAX_BINS),
+    low: float = 0.0,
+    high: float = 1.0,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    """
+    그림별 numerator / denominator 레이블 측정값(area, w, h) 합의 비율 히스토그램.
+    예) type=house&numerator=문&denominator=집벽 → 집벽 대비 문 면적 비율 분포
+    """
+    check_analytics_type(type)
+    try:
+        histogram = await asyncio.to_thread(
+            ratio_histogram, type, numerator, denominator, measure, bins, low, high, since, until
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", "type": type, **histogram}
+
+##############################
+# 7) 비동기 작업(job) 관련 코드
+##############################
+async def process_job(job: dict) -> dict:
+    """작업 워커 핸들러: /detect 와 같은 결과 캐시 → 탐지 → 분석 경로"""
+    contents, type = job["image"], job["image_type"]
+    if type not in batchers:
+        return {"status": "error", "message": "Invalid type"}
+    key = result_cache_key(contents, type, model_manager.version(type))
+    return await result_cache.get_or_compute(
+        key, lambda: run_detection(contents, type, job["filename"])
+    )
+
+@router.post("/jobs", status_code=202,
+             openapi_extra=upload_openapi({**TYPE_FIELD, "priority": {"type": "integer", "default": 0}}))
+async def create_job(upload: UploadForm = Depends(read_upload)):
+    """
+    업로드를 작업 대기열에 저장하고 작업 id 를 바로 반환.
+    결과는 GET /api/jobs/{id} 로 조회한다 (priority 가 클수록 먼저 처리).
+    """
+    type = upload.field("type")
+    priority = upload.field("priority", 0, int)
+    if type not in batchers:
+        raise HTTPException(status_code=400, detail="Invalid type")
+    try:
+        job_id = await asyncio.to_thread(job_queue.enqueue, type, upload.contents, upload.filename, priority)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    job_queue.notify()
+    return {"status": "queued", "id": job_id, "url": f"/api/jobs/{job_id}"}
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = Query(0, ge=0, le=JOB_MAX_WAIT)):
+    """
+    작업 상태와 결과. wait 초를 주면 작업이 끝나거나 시간이 다 될 때까지 기다렸다가 응답한다 (long-poll).
+    """
+    job = await job_queue.wait(job_id, wait)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
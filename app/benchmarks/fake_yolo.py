@@ -0,0 +1,165 @@
+"""
+벤치마크용 가짜 YOLO 모델.
+
+ultralytics.YOLO 와 같은 호출 규약(model(source, batch=..., verbose=...) → results[i].boxes.data)을 따르고,
+그림 타입별로 실제와 비슷한 구성(전체 → 부분 요소 배치)의 박스를 만든다.
+같은 이미지에는 항상 같은 박스를 돌려주므로 캐시 동작도 실제와 같다.
+"""
+import random
+import time
+import zlib
+
+import numpy as np
+
+# (class_id, 전체 박스 기준 상대 영역 [x, y, w, h], 최소 개수, 최대 개수, 등장 확률)
+LAYOUTS = {
+    "house": [
+        (1, (0.0, 0.0, 1.0, 0.45), 1, 1, 0.95),    # 지붕
+        (2, (0.05, 0.4, 0.9, 0.6), 1, 1, 0.95),    # 집벽
+        (3, (0.4, 0.65, 0.2, 0.35), 1, 1, 0.9),    # 문
+        (4, (0.1, 0.5, 0.2, 0.2), 1, 3, 0.85),     # 창문
+        (5, (0.7, 0.05, 0.12, 0.25), 1, 1, 0.4),   # 굴뚝
+        (6, (0.7, -0.2, 0.2, 0.2), 1, 1, 0.3),     # 연기
+        (7, (-0.3, 0.8, 1.6, 0.25), 1, 1, 0.3),    # 울타리
+        (8, (0.35, 1.0, 0.3, 0.3), 1, 1, 0.4),     # 길
+        (11, (1.1, 0.3, 0.3, 0.7), 1, 2, 0.3),     # 나무
+        (12, (-0.3, 0.9, 0.15, 0.15), 1, 4, 0.3),  # 꽃
+        (14, (1.0, -0.4, 0.2, 0.2), 1, 1, 0.4),    # 태양
+    ],
+    "tree": [
+        (1, (0.4, 0.5, 0.2, 0.5), 1, 1, 0.95),     # 기둥
+        (2, (0.0, 0.0, 1.0, 0.6), 1, 1, 0.95),     # 수관
+        (3, (0.2, 0.2, 0.3, 0.2), 1, 4, 0.6),      # 가지
+        (4, (0.3, 0.9, 0.4, 0.1), 1, 1, 0.4),      # 뿌리
+        (5, (0.1, 0.1, 0.1, 0.1), 1, 6, 0.5),      # 나뭇잎
+        (7, (0.2, 0.2, 0.08, 0.08), 1, 5, 0.4),    # 열매
+        (9, (0.6, 0.1, 0.1, 0.08), 1, 2, 0.2),     # 새
+        (10, (0.45, 0.6, 0.1, 0.1), 1, 1, 0.15),   # 다람쥐
+        (11, (-0.3, -0.3, 0.4, 0.15), 1, 2, 0.3),  # 구름
+    ],
+    "person": [
+        (1, (0.3, 0.0, 0.4, 0.25), 1, 1, 0.95),    # 머리
+        (2, (0.35, 0.05, 0.3, 0.18), 1, 1, 0.9),   # 얼굴
+        (3, (0.4, 0.08, 0.07, 0.03), 2, 2, 0.9),   # 눈
+        (4, (0.48, 0.12, 0.04, 0.04), 1, 1, 0.8),  # 코
+        (5, (0.44, 0.17, 0.12, 0.03), 1, 1, 0.85), # 입
+        (6, (0.28, 0.1, 0.05, 0.07), 2, 2, 0.6),   # 귀
+        (7, (0.28, 0.0, 0.44, 0.1), 1, 1, 0.7),    # 머리카락
+        (8, (0.45, 0.25, 0.1, 0.05), 1, 1, 0.7),   # 목
+        (9, (0.3, 0.3, 0.4, 0.3), 1, 1, 0.9),      # 상체
+        (10, (0.15, 0.3, 0.15, 0.3), 2, 2, 0.85),  # 팔
+        (11, (0.12, 0.58, 0.08, 0.06), 2, 2, 0.7), # 손
+        (12, (0.35, 0.6, 0.12, 0.35), 2, 2, 0.9),  # 다리
+        (13, (0.33, 0.94, 0.14, 0.06), 2, 2, 0.7), # 발
+        (14, (0.48, 0.35, 0.04, 0.04), 1, 4, 0.3), # 단추
+    ],
+}
+
+
+class FakeTensor:
+    """boxes.data 처럼 cpu() / numpy() / tolist() 를 지원하는 배열 래퍼"""
+
+    def __init__(self, array: np.ndarray):
+        self._array = array
+
+    def cpu(self):
+        return self
+
+    def numpy(self) -> np.ndarray:
+        return self._array
+
+    def tolist(self) -> list:
+        return self._array.tolist()
+
+
+class FakeBoxes:
+    def __init__(self, data: np.ndarray):
+        self.data = FakeTensor(data)
+
+
+class FakeResult:
+    def __init__(self, data: np.ndarray):
+        self.boxes = FakeBoxes(data)
+
+
+def _image_shape(image) -> tuple:
+    """입력 하나의 (높이, 너비). 텐서는 CHW, 배열은 HWC, 경로는 기본 640"""
+    shape = getattr(image, "shape", None)
+    if shape is None:
+        return 640, 640
+    if len(shape) == 3 and shape[0] == 3 and shape[2] != 3:
+        return int(shape[1]), int(shape[2])
+    return int(shape[0]), int(shape[1])
+
+
+def _seed(image) -> int:
+    """같은 이미지는 같은 박스를 받도록 내용 일부로 시드 생성"""
+    if hasattr(image, "cpu"):
+        image = image.cpu().numpy()
+    if isinstance(image, np.ndarray):
+        flat = image.reshape(-1)
+        return zlib.crc32(np.ascontiguousarray(flat[:: max(1, flat.size // 4096)]).tobytes())
+    return zlib.crc32(str(image).encode("utf-8"))
+
+
+def generate_boxes(image_type: str, height: int, width: int, rng: random.Random) -> np.ndarray:
+    """그림 타입에 맞는 [x1, y1, x2, y2, conf, cls] N×6 박스 생성"""
+    whole_w = width * rng.uniform(0.35, 0.7)
+    whole_h = height * rng.uniform(0.35, 0.7)
+    whole_x = rng.uniform(0.05, 0.95) * (width - whole_w)
+    whole_y = rng.uniform(0.05, 0.95) * (height - whole_h)
+    rows = [(whole_x, whole_y, whole_x + whole_w, whole_y + whole_h, rng.uniform(0.8, 0.97), 0)]
+    for class_id, (rx, ry, rw, rh), low, high, probability in LAYOUTS[image_type]:
+        if rng.random() > probability:
+            continue
+        for i in range(rng.randint(low, high)):
+            jitter = rng.uniform(-0.05, 0.05)
+            x1 = whole_x + (rx + jitter + i * rw * 1.2) * whole_w
+            y1 = whole_y + (ry + jitter) * whole_h
+            w = rw * whole_w * rng.uniform(0.8, 1.2)
+            h = rh * whole_h * rng.uniform(0.8, 1.2)
+            rows.append((
+                min(max(x1, 0), width), min(max(y1, 0), height),
+                min(max(x1 + w, 0), width), min(max(y1 + h, 0), height),
+                rng.uniform(0.3, 0.95), class_id,
+            ))
+    return np.array(rows, dtype=np.float32)
+
+
+class FakeYOLO:
+    """
+    latency_ms: 호출당 고정 지연, per_image_ms: 배치 내 이미지당 추가 지연 (jitter 비율만큼 흔들림).
+    time.sleep 은 GIL 을 놓으므로 실제 추론 스레드와 비슷하게 다른 요청 처리를 막지 않는다.
+    """
+
+    def __init__(self, image_type: str, latency_ms: float = 20.0, per_image_ms: float = 5.0, jitter: float = 0.1):
+        self.image_type = image_type
+        self.latency_ms = latency_ms
+        self.per_image_ms = per_image_ms
+        self.jitter = jitter
+        self.calls = 0
+
+    def __call__(self, source, batch: int = None, verbose: bool = True, **kwargs):
+        if hasattr(source, "shape") and len(source.shape) == 4:
+            images = [source[i] for i in range(source.shape[0])]
+        elif isinstance(source, (list, tuple)):
+            images = list(source)
+        else:
+            images = [source]
+
+        self.calls += 1
+        delay = (self.latency_ms + self.per_image_ms * len(images)) / 1000
+        time.sleep(max(0.0, delay * (1 + random.uniform(-self.jitter, self.jitter))))
+
+        results = []
+        for image in images:
+            height, width = _image_shape(image)
+            rng = random.Random(_seed(image))
+            results.append(FakeResult(generate_boxes(self.image_type, height, width, rng)))
+        return results
+
+
+def install(manager, latency_ms: float = 20.0, per_image_ms: float = 5.0, jitter: float = 0.1):
+    """ModelManager 의 모든 모델을 가짜 모델로 교체"""
+    for model_type in manager.paths:
+        manager.set_model(model_type, FakeYOLO(model_type, latency_ms, per_image_ms, jitter), backend="fake")
@@ -0,0 +1,223 @@
+"""
+/api/detect 부하 테스트.
+
+기본은 완전 오프라인 모드: 가짜 YOLO + OpenAI 스텁으로 서버를 이 프로세스 안에서 띄운 뒤
+지정한 동시성으로 요청을 보내고 p50/p95/p99 지연 시간, 처리량, 서버 RSS 를 보고한다.
+--url 을 주면 이미 떠 있는 서버를 대상으로 한다 (RSS 는 --pid 로 지정한 프로세스 기준).
+
+    python -m benchmarks.load_test --requests 500 --concurrency 32
+    python -m benchmarks.load_test --output result.json --baseline baseline.json --tolerance 0.2
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_drawings(count: int, size: int, seed: int = 0) -> list:
+    """흰 배경에 선 / 사각형 / 원을 그린 PNG 바이트 목록 (모두 서로 다른 이미지)"""
+    import cv2
+    import numpy as np
+
+    rng = random.Random(seed)
+    drawings = []
+    for _ in range(count):
+        canvas = np.full((size, size, 3), 255, dtype=np.uint8)
+        for _ in range(rng.randint(5, 20)):
+            p1 = (rng.randrange(size), rng.randrange(size))
+            p2 = (rng.randrange(size), rng.randrange(size))
+            shape = rng.choice(("line", "rect", "circle"))
+            if shape == "line":
+                cv2.line(canvas, p1, p2, (0, 0, 0), rng.randint(1, 4))
+            elif shape == "rect":
+                cv2.rectangle(canvas, p1, p2, (0, 0, 0), rng.randint(1, 4))
+            else:
+                cv2.circle(canvas, p1, rng.randint(5, size // 6), (0, 0, 0), rng.randint(1, 4))
+        ok, encoded = cv2.imencode(".png", canvas)
+        drawings.append(encoded.tobytes())
+    return drawings
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_local_server(args):
+    """
+    가짜 YOLO / OpenAI 스텁 / 임시 SQLite 로 앱을 띄우고 (base_url, 종료 함수) 반환.
+    config 가 환경 변수를 import 시점에 읽으므로 app 모듈은 여기서 처음 import 한다.
+    """
+    from benchmarks.openai_stub import start_stub
+
+    stub, stub_url = start_stub(first_token_ms=args.llm_first_token_ms, per_token_ms=args.llm_per_token_ms)
+    db_dir = tempfile.mkdtemp(prefix="htp-bench-")
+    os.environ.update({
+        "OPENAI_BASE_URL": stub_url,
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "benchmark"),
+        "DATABASE_URL": f"sqlite:///{os.path.join(db_dir, 'bench.db')}",
+        "MODEL_PRELOAD": "0",
+    })
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+
+    import uvicorn
+    from benchmarks import fake_yolo
+    from models.model_manager import model_manager
+    import main
+
+    fake_yolo.install(model_manager, args.model_latency_ms, args.model_per_image_ms)
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+        thread.join(timeout=10)
+        stub.shutdown()
+
+    return f"http://127.0.0.1:{port}", stop
+
+
+class RssSampler:
+    """대상 프로세스 RSS 를 주기적으로 기록 (MB)"""
+
+    def __init__(self, pid: int, interval: float = 0.1):
+        import psutil
+
+        self.process = psutil.Process(pid)
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.samples.append(self.process.memory_info().rss / 1024 / 1024)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def report(self) -> dict:
+        if not self.samples:
+            return {}
+        return {
+            "start_mb": round(self.samples[0], 1),
+            "peak_mb": round(max(self.samples), 1),
+            "end_mb": round(self.samples[-1], 1),
+        }
+
+
+async def drive(base_url: str, drawings: list, types: list, total: int, concurrency: int, timeout: float):
+    """total 개 요청을 concurrency 개 워커로 보내고 (지연 시간 목록 ms, 상태 코드별 개수, 걸린 시간)"""
+    import httpx
+
+    latencies, statuses = [], {}
+    counter = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        async def worker():
+            for i in counter:
+                files = {"image": (f"bench_{i}.png", drawings[i % len(drawings)], "image/png")}
+                data = {"type": types[i % len(types)]}
+                start = time.perf_counter()
+                try:
+                    response = await client.post("/api/detect", files=files, data=data)
+                    status = response.status_code
+                    if status == 200 and response.json().get("status") != "success":
+                        status = "error"
+                except Exception as e:
+                    status = type(e).__name__
+                latencies.append((time.perf_counter() - start) * 1000)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, statuses, elapsed
+
+
+def main():
+    from benchmarks.report import finish, percentiles
+
+    parser = argparse.ArgumentParser(description="Load test /api/detect")
+    parser.add_argument("--url", help="대상 서버 주소 (없으면 오프라인 로컬 서버를 띄움)")
+    parser.add_argument("--pid", type=int, help="--url 사용 시 RSS 를 측정할 서버 프로세스 id")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--distinct", type=int, help="서로 다른 이미지 수 (기본: 요청 수 = 캐시 미스만)")
+    parser.add_argument("--image-size", type=int, default=1024)
+    parser.add_argument("--types", nargs="+", default=["house", "tree", "person"])
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--model-latency-ms", type=float, default=20.0)
+    parser.add_argument("--model-per-image-ms", type=float, default=5.0)
+    parser.add_argument("--llm-first-token-ms", type=float, default=200.0)
+    parser.add_argument("--llm-per-token-ms", type=float, default=2.0)
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", help="비교할 기준 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="허용 회귀 비율")
+    args = parser.parse_args()
+
+    distinct = args.distinct or args.requests + args.warmup
+    drawings = make_drawings(distinct, args.image_size)
+
+    stop = None
+    if args.url:
+        base_url, pid = args.url.rstrip("/"), args.pid
+    else:
+        base_url, stop = start_local_server(args)
+        pid = os.getpid()
+
+    try:
+        if args.warmup:
+            asyncio.run(drive(base_url, drawings[-args.warmup:], args.types, args.warmup,
+                              min(args.warmup, args.concurrency), args.timeout))
+        sampler = RssSampler(pid) if pid else None
+        if sampler:
+            with sampler:
+                latencies, statuses, elapsed = asyncio.run(
+                    drive(base_url, drawings, args.types, args.requests, args.concurrency, args.timeout)
+                )
+        else:
+            latencies, statuses, elapsed = asyncio.run(
+                drive(base_url, drawings, args.types, args.requests, args.concurrency, args.timeout)
+            )
+    finally:
+        if stop:
+            stop()
+
+    report = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "distinct_images": distinct,
+        "statuses": statuses,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(args.requests / elapsed, 2) if elapsed else None,
+        "latency_ms": percentiles(latencies),
+        "rss": sampler.report() if sampler else {},
+    }
+    sys.exit(finish(report, args.output, args.baseline, args.tolerance,
+                    lower_is_better=["p50", "p95", "p99", "peak_mb"], higher_is_better=["throughput_rps"]))
+
+
+if __name__ == "__main__":
+    main()
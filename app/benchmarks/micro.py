@@ -0,0 +1,119 @@
+"""
+parse_bboxes / analyze_* / RuleSet.evaluate_batch 마이크로 벤치마크 (외부 서비스 불필요).
+
+가짜 YOLO 와 같은 박스 생성기로 그림 타입별 입력을 만들고 함수 호출당 평균 시간을 µs 로 보고한다.
+spatial 항목은 빽빽한 그림(--spatial-density 장을 겹친 것)에서 격자 색인(생성 + 질의)과
+relation_mask 전체 검사를 질의 1번 / 박스마다 1번씩 비교한다.
+
+    python -m benchmarks.micro --drawings 500 --repeat 5
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def best_per_call_us(func, inputs: list, repeat: int) -> float:
+    """inputs 전체를 repeat 번 돌려 가장 빠른 회차의 호출당 평균 시간 (µs)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in inputs:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return round(best / len(inputs) * 1e6, 2)
+
+
+def spatial_report(drawings: list, repeat: int) -> dict:
+    """drawings(BoundingBoxSet 리스트)마다 "inside" 질의를 색인 / 전체 검사로 수행한 그림당 시간 (µs)"""
+    from models.spatial import SpatialIndex, relation_mask
+
+    def mask(boxes, i):
+        return relation_mask("inside", boxes.x, boxes.y, boxes.w, boxes.h, boxes.x[i], boxes.y[i], boxes.w[i], boxes.h[i])
+
+    def mask_all(boxes):
+        for i in range(len(boxes)):
+            mask(boxes, i)
+
+    def index_all(boxes):
+        index = SpatialIndex(boxes)
+        for i in range(len(boxes)):
+            index.query("inside", i)
+
+    return {
+        "boxes_per_drawing": round(sum(len(boxes) for boxes in drawings) / len(drawings), 1),
+        "mask_one_query_us": best_per_call_us(lambda boxes: mask(boxes, 0), drawings, repeat),
+        "index_one_query_us": best_per_call_us(lambda boxes: SpatialIndex(boxes).query("inside", 0), drawings, repeat),
+        "mask_all_queries_us": best_per_call_us(mask_all, drawings, repeat),
+        "index_all_queries_us": best_per_call_us(index_all, drawings, repeat),
+    }
+
+
+def main():
+    # api 모듈 import 시 OpenAI 클라이언트가 생성되므로 키가 없으면 더미 값 사용
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("MODEL_PRELOAD", "0")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='htp-bench-'), 'bench.db')}"
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+
+    from benchmarks.fake_yolo import generate_boxes
+    from benchmarks.report import finish
+    from api import parse_bboxes, label_dicts, analyzers
+    from models.bbox_set import BoundingBoxSet
+    from models.house_func import rules as house_rules
+    from models.tree_func import rules as tree_rules
+    from models.person_func import rules as person_rules
+
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for box parsing and rule analysis")
+    parser.add_argument("--drawings", type=int, default=500, help="타입별 입력 그림 수")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spatial-density", type=int, default=20, help="spatial 항목에서 한 그림에 겹칠 그림 수")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", help="비교할 기준 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="허용 회귀 비율")
+    args = parser.parse_args()
+
+    rule_sets = {"house": house_rules, "tree": tree_rules, "person": person_rules}
+    rng = random.Random(args.seed)
+    report = {}
+    for image_type, label_map in label_dicts.items():
+        raw = [generate_boxes(image_type, 1280, 1280, rng) for _ in range(args.drawings)]
+        raw_lists = [boxes.tolist() for boxes in raw]
+        dicts = [parse_bboxes(boxes, image_type) for boxes in raw_lists]
+        box_sets = [BoundingBoxSet.from_yolo(boxes, label_map) for boxes in raw]
+        analyze = analyzers[image_type]
+
+        evaluate_batch = rule_sets[image_type].evaluate_batch
+        batch_us = best_per_call_us(evaluate_batch, [box_sets], args.repeat) / len(box_sets)
+
+        report[image_type] = {
+            "boxes_per_drawing": round(sum(len(boxes) for boxes in raw) / len(raw), 1),
+            "parse_bboxes_us": best_per_call_us(lambda boxes: parse_bboxes(boxes, image_type), raw_lists, args.repeat),
+            "from_yolo_us": best_per_call_us(lambda boxes: BoundingBoxSet.from_yolo(boxes, label_map), raw, args.repeat),
+            "analyze_dicts_us": best_per_call_us(analyze, dicts, args.repeat),
+            "analyze_box_set_us": best_per_call_us(analyze, box_sets, args.repeat),
+            "evaluate_batch_per_drawing_us": round(batch_us, 2),
+        }
+
+    dense = [
+        BoundingBoxSet.from_yolo(
+            np.concatenate([generate_boxes("tree", 1280, 1280, rng) for _ in range(args.spatial_density)]),
+            label_dicts["tree"],
+        )
+        for _ in range(max(1, args.drawings // args.spatial_density))
+    ]
+    report["spatial"] = spatial_report(dense, args.repeat)
+
+    sys.exit(finish(report, args.output, args.baseline, args.tolerance, lower_is_better=["_us"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+OpenAI 호환 로컬 스텁 서버 (POST /v1/chat/completions, 일반 / stream 응답).
+
+OPENAI_BASE_URL 을 이 서버 주소로 지정하면 외부 네트워크 없이 GPT 호출 경로를 측정할 수 있다.
+지연 시간은 첫 토큰까지(first_token_ms) + 토큰당(per_token_ms) 으로 흉내 낸다.
+
+    python -m benchmarks.openai_stub --port 8100 --first-token-ms 300 --per-token-ms 10
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_ANSWER = (
+    "1. 🔅 성격 특징 🔅\n안정적이고 현실적인 성향이 보입니다.\n\n"
+    "2. 🏡 대인 관계 🏡\n가까운 관계에서 따뜻함을 추구합니다.\n\n"
+    "3. 📚 학업 및 업무 스타일 📚\n계획적으로 일을 처리하는 편입니다.\n\n"
+    "4. 🌳 정서적 특징 🌳\n감정 표현이 차분합니다.\n\n"
+    "5. 🌈 요약 🌈\n전반적으로 균형 잡힌 모습입니다."
+)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "OpenAIStub/1.0"
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        settings = self.server.settings
+        settings["requests"] += 1
+        model = body.get("model", "stub")
+        tokens = [token + " " for token in settings["answer"].split(" ")]
+        prompt_tokens = len(json.dumps(body.get("messages", []), ensure_ascii=False)) // 4
+
+        time.sleep(settings["first_token_ms"] / 1000)
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for token in tokens:
+                chunk = {
+                    "id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                }
+                self._write_chunk(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                time.sleep(settings["per_token_ms"] / 1000)
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+            return
+
+        time.sleep(settings["per_token_ms"] * len(tokens) / 1000)
+        payload = json.dumps({
+            "id": "chatcmpl-stub", "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(tokens),
+                "total_tokens": prompt_tokens + len(tokens),
+            },
+        }, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(host: str = "127.0.0.1", port: int = 0, first_token_ms: float = 200.0,
+               per_token_ms: float = 5.0, answer: str = DEFAULT_ANSWER):
+    """
+    백그라운드 스레드에서 스텁 서버를 띄우고 (서버, base_url) 반환.
+    server.settings 로 지연 시간을 실행 중에 바꿀 수 있고, requests 에 받은 요청 수가 쌓인다.
+    """
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.settings = {
+        "first_token_ms": first_token_ms,
+        "per_token_ms": per_token_ms,
+        "answer": answer,
+        "requests": 0,
+    }
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--first-token-ms", type=float, default=200.0)
+    parser.add_argument("--per-token-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    server, url = start_stub(args.host, args.port, args.first_token_ms, args.per_token_ms)
+    print(f"OpenAI stub listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import json
+
+import numpy as np
+
+
+def percentiles(values_ms: list) -> dict:
+    if not values_ms:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    p50, p95, p99 = np.percentile(values_ms, [50, 95, 99]).tolist()
+    return {"p50": round(p50, 2), "p95": round(p95, 2), "p99": round(p99, 2), "max": round(max(values_ms), 2)}
+
+
+def flatten(report: dict, prefix: str = "") -> dict:
+    """중첩 dict 를 "a.b.c" 키의 숫자 값 dict 로"""
+    flat = {}
+    for key, value in report.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def check_regressions(report: dict, baseline_path: str, lower_is_better: list, higher_is_better: list,
+                      tolerance: float) -> list:
+    """
+    기준 결과(JSON) 대비 tolerance 비율 이상 나빠진 지표 목록을 반환.
+    lower_is_better / higher_is_better 는 비교할 키의 접미사 (예: "p95", "throughput_rps").
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = flatten(json.load(f))
+    current = flatten(report)
+    regressions = []
+    for key, value in current.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        if any(key.endswith(suffix) for suffix in lower_is_better) and value > base * (1 + tolerance):
+            regressions.append(f"{key}: {base} -> {value}")
+        elif any(key.endswith(suffix) for suffix in higher_is_better) and value < base * (1 - tolerance):
+            regressions.append(f"{key}: {base} -> {value}")
+    return regressions
+
+
+def finish(report: dict, output: str = None, baseline: str = None, tolerance: float = 0.2,
+           lower_is_better: list = (), higher_is_better: list = ()) -> int:
+    """결과 출력 / 저장 후 기준 대비 회귀가 있으면 1 (CI 종료 코드용)"""
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if not baseline:
+        return 0
+    regressions = check_regressions(report, baseline, list(lower_is_better), list(higher_is_better), tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
@@ -0,0 +1,196 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+from config import (
+    RESULT_CACHE_SIZE,
+    RESULT_CACHE_TTL,
+    RESULT_CACHE_PERSIST,
+    LLM_CACHE_GRID,
+    LLM_CACHE_SIZE,
+    LLM_CACHE_TTL,
+)
+from database import load_from_database
+from persistence import result_writer
+from metrics import stage, record_error
+
+
+class TTLCache:
+    """
+    크기 제한 LRU + TTL 메모리 캐시.
+    maxsize 를 넘으면 가장 오래 사용되지 않은 항목부터, ttl 초가 지난 항목은 조회 시 제거한다.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+class SingleFlight:
+    """
+    같은 키에 대한 동시 계산을 하나로 합친다.
+    먼저 들어온 요청이 계산을 시작하고, 나머지는 그 결과를 함께 기다린다.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+
+    def __len__(self):
+        return len(self._inflight)
+
+    async def do(self, key, func):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # 한 요청이 취소되어도 공유 계산은 계속되도록 shield
+        return await asyncio.shield(task)
+
+
+def result_cache_key(contents: bytes, image_type: str, model_version: str) -> str:
+    """이미지 바이트 해시 + 타입 + 모델 버전으로 캐시 키 생성"""
+    digest = hashlib.sha256(contents).hexdigest()
+    return f"{image_type}:{model_version}:{digest}"
+
+
+class ResultCache:
+    """
+    탐지/분석 결과 2단 캐시.
+    1) 프로세스 내 LRU(TTL)  2) DetectionResult 테이블 (image_path 컬럼에 캐시 키 저장)
+    동일 키의 동시 요청은 SingleFlight 로 한 번만 계산한다.
+    """
+
+    def __init__(self, maxsize: int = RESULT_CACHE_SIZE, ttl: float = RESULT_CACHE_TTL,
+                 persist: bool = RESULT_CACHE_PERSIST):
+        self.memory = TTLCache(maxsize, ttl)
+        self.persist = persist
+        self._flight = SingleFlight()
+
+    async def get_or_compute(self, key: str, compute):
+        """
+        캐시에 있으면 바로 반환하고, 없으면 compute() 결과를 저장 후 반환.
+        status 가 success 인 결과만 캐싱한다 (store 참고).
+        """
+        cached = self.memory.get(key)
+        if cached is not None:
+            return cached
+        return await self._flight.do(key, lambda: self._load_or_compute(key, compute))
+
+    async def lookup(self, key: str):
+        """메모리 → DB 순으로 조회. DB 에서 찾으면 메모리에도 올린다."""
+        cached = self.memory.get(key)
+        if cached is not None:
+            return cached
+        return await self._load_persistent(key)
+
+    async def _load_persistent(self, key: str):
+        if not self.persist:
+            return None
+        try:
+            with stage("db_read"):
+                stored = await asyncio.to_thread(load_from_database, f"cache:{key}")
+        except Exception as e:
+            print(f"Result cache read error: {str(e)}")
+            record_error("db_read")
+            return None
+        if stored is not None:
+            self.memory.set(key, stored)
+        return stored
+
+    async def store(self, key: str, result):
+        """
+        status 가 success 인 결과만 메모리와 DB 에 저장.
+        GPT 해석을 기다리는 중인 임시 결과(interpretation: pending)와 GPT 호출 실패로
+        규칙 기반 분석만 담은 결과(fallback)는 저장하지 않는다.
+        DB 저장은 write-behind 대기열에 넣기만 하므로 응답을 지연시키지 않는다.
+        """
+        if not (isinstance(result, dict) and result.get("status") == "success"):
+            return
+        if result.get("interpretation") == "pending" or result.get("fallback"):
+            return
+        self.memory.set(key, result)
+        if self.persist:
+            result_writer.enqueue(f"cache:{key}", result)
+
+    async def _load_or_compute(self, key, compute):
+        stored = await self._load_persistent(key)
+        if stored is not None:
+            return stored
+        result = await compute()
+        await self.store(key, result)
+        return result
+
+
+result_cache = ResultCache()
+
+
+def feature_cache_key(image_type: str, boxes: list, findings: list, model: str, grid: float = LLM_CACHE_GRID) -> str:
+    """
+    GPT 응답 캐시 키 생성.
+    박스 좌표를 grid 크기 격자로 양자화하고 (레이블, 좌표) 를 정렬한 뒤,
+    규칙 기반 분석 문구와 함께 정규화해 해시한다.
+    비슷한 위치/크기의 같은 구성 요소를 가진 그림은 같은 키가 된다.
+    """
+    quantized = sorted(
+        (
+            box["label"],
+            round(box["x"] / grid),
+            round(box["y"] / grid),
+            round(box["w"] / grid),
+            round(box["h"] / grid),
+        )
+        for box in boxes
+    )
+    canonical = json.dumps(
+        [image_type, model, quantized, sorted(f for f in findings if f)],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# GPT 해석 결과 캐시 (키: feature_cache_key)
+feature_cache = TTLCache(LLM_CACHE_SIZE, LLM_CACHE_TTL)
+feature_flight = SingleFlight()
+
+
+def cache_stats() -> dict:
+    return {
+        "result_cache": result_cache.memory.stats(),
+        "feature_cache": feature_cache.stats(),
+        "result_writer": result_writer.stats(),
+    }
@@ -1,5 +1,10 @@
 import os
 
+from dotenv import load_dotenv
+
+# .env 값을 아래 설정들보다 먼저 반영
+load_dotenv()
+
 # YOLOv8n 모델 경로
 MODEL_PATHS = {
     "house": os.getenv("HOUSE_MODEL_PATH", "models/house_model.pt"),
@@ -8,4 +13,113 @@ MODEL_PATHS = {
 }
 
 # 데이터베이스 설정
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///htp_project.db")
\ No newline at end of file
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///htp_project.db")
+
+# 추론 실행기 설정 (모델 타입별 스레드 수 / 대기열 크기)
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "16"))
+
+# 마이크로 배칭 설정 (최대 배치 크기 / 최대 대기 시간 ms)
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))
+
+# 모델 로딩 설정 (시작 시 백그라운드 선로딩 / 더미 입력 워밍업)
+MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "1") == "1"
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "1") == "1"
+MODEL_INPUT_SIZE = int(os.getenv("MODEL_INPUT_SIZE", "640"))
+
+# 업로드 전처리: 헤더 기준 최대 픽셀 수, 모델 입력 크기보다 큰 이미지의 디코딩 시 축소 여부
+UPLOAD_MAX_PIXELS = int(os.getenv("UPLOAD_MAX_PIXELS", str(50_000_000)))
+UPLOAD_DOWNSCALE = os.getenv("UPLOAD_DOWNSCALE", "1") == "1"
+# 단일 이미지 업로드 최대 바이트 수 (스트리밍 수신 중 초과하면 바로 413)
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+
+# 추론 백엔드 (torch | onnx | openvino) 와 INT8 양자화 모델 사용 여부
+# 내보낸 모델 파일이 없으면 torch(.pt) 로 대체 (python -m models.backends export 로 생성)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch").lower()
+INFERENCE_INT8 = os.getenv("INFERENCE_INT8", "0") == "1"
+
+# 디버깅용 업로드 원본 저장 (기본값: 메모리에서만 처리)
+SPILL_UPLOADS = os.getenv("SPILL_UPLOADS", "0") == "1"
+SPILL_DIR = os.getenv("SPILL_DIR", "temp")
+
+# 결과 캐시 설정 (메모리 LRU 크기 / TTL 초 / DB 영구 캐시 사용 여부)
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "256"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "3600"))
+RESULT_CACHE_PERSIST = os.getenv("RESULT_CACHE_PERSIST", "1") == "1"
+
+# OpenAI(호환) API 설정: 엔드포인트 / 모델 / 타임아웃 / 재시도 / 커넥션 풀
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_DEADLINE = float(os.getenv("OPENAI_DEADLINE", "60"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "50"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "20"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30"))
+
+# /api/detect 지연 예산 (ms, 0 이면 사용 안 함): 넘으면 규칙 기반 분석으로 먼저 응답하고
+# GPT 해석은 백그라운드에서 끝내 결과 캐시에 저장한다 (GET /api/results/{result_key})
+LLM_BUDGET_MS = float(os.getenv("LLM_BUDGET_MS", "0"))
+# 헤지 요청: 최근 GPT 지연 시간의 LLM_HEDGE_PERCENTILE 백분위가 지나도 응답이 없으면 같은 요청을 한 번 더 보냄
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", "200"))
+# GPT 프롬프트(system + user) 최대 토큰 수 (0 이면 제한 없음). 넘으면 작은 객체 요약부터 생략
+LLM_PROMPT_TOKEN_BUDGET = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "1000"))
+
+# GPT 응답(특징 단위) 캐시 설정: 좌표 양자화 격자 크기(px) / 최대 항목 수 / TTL 초
+LLM_CACHE_GRID = float(os.getenv("LLM_CACHE_GRID", "64"))
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1024"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+
+# 배치 탐지 설정 (최대 이미지 수 / 최대 총 바이트 / 모델 호출당 이미지 수)
+BATCH_DETECT_MAX_FILES = int(os.getenv("BATCH_DETECT_MAX_FILES", "300"))
+BATCH_DETECT_MAX_BYTES = int(os.getenv("BATCH_DETECT_MAX_BYTES", str(200 * 1024 * 1024)))
+BATCH_DETECT_CHUNK = int(os.getenv("BATCH_DETECT_CHUNK", "16"))
+# 배치 탐지 요청 본문 최대 바이트 (압축 파일 포함, 수신 중 검사) / 배치 안에서 동시에 요청하는 GPT 해석 수
+BATCH_MAX_BYTES = int(os.getenv("BATCH_MAX_BYTES", str(200 * 1024 * 1024)))
+BATCH_DETECT_LLM_CONCURRENCY = int(os.getenv("BATCH_DETECT_LLM_CONCURRENCY", "4"))
+
+# DB 커넥션 풀 / SQLite WAL 설정
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+SQLITE_WAL = os.getenv("SQLITE_WAL", "1") == "1"
+# 비동기 드라이버 URL (예: sqlite+aiosqlite:///htp_project.db, postgresql+asyncpg://...)
+# 설정하면 write-behind 저장이 이 엔진으로 수행된다
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or None
+
+# write-behind 저장 설정 (배치 크기 / 최대 대기 초 / 대기열 크기)
+DB_WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", "500"))
+DB_WRITE_FLUSH_INTERVAL = float(os.getenv("DB_WRITE_FLUSH_INTERVAL", "0.2"))
+DB_WRITE_QUEUE_SIZE = int(os.getenv("DB_WRITE_QUEUE_SIZE", "10000"))
+
+# 정규화 박스 테이블(detection_boxes) 기록 여부와 통계 API 설정
+ANALYTICS_RECORD = os.getenv("ANALYTICS_RECORD", "1") == "1"
+ANALYTICS_MAX_PAGE_SIZE = int(os.getenv("ANALYTICS_MAX_PAGE_SIZE", "500"))
+ANALYTICS_MAX_BINS = int(os.getenv("ANALYTICS_MAX_BINS", "200"))
+
+# 관리자 기능 (샘플링 프로파일러 / 요청 단위 cProfile). 토큰이 없으면 비활성
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") or None
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "10"))
+
+# 운영 서버 (python serve.py): 부모 프로세스가 모델을 한 번 로드한 뒤 워커를 fork
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))
+# 워커당 torch intra-op 스레드 수 (0 이면 CPU 코어 수 / 워커 수)
+TORCH_THREADS_PER_WORKER = int(os.getenv("TORCH_THREADS_PER_WORKER", "0"))
+
+# 비동기 작업 대기열 (POST /api/jobs)
+# JOB_WORKERS: 웹 프로세스 안에서 작업을 처리할 워커 수 (0 이면 python worker.py 로 따로 실행)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "5"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+JOB_MAX_WAIT = float(os.getenv("JOB_MAX_WAIT", "60"))
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "10000"))
@@ -1,11 +1,62 @@
-from sqlalchemy import create_engine, Column, String, Integer, JSON
+from datetime import datetime, timezone
+
+from sqlalchemy import (
+    bindparam, create_engine, event, insert, select, update,
+    Column, DateTime, Float, ForeignKey, Index, LargeBinary, String, Integer, JSON,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-from config import DATABASE_URL
+from config import (
+    DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE,
+    SQLITE_WAL,
+    ASYNC_DATABASE_URL,
+)
+
+def engine_options(url: str) -> dict:
+    """URL 종류에 맞는 create_engine 인자 (커넥션 풀 크기 / 재활용 주기)"""
+    if url.startswith("sqlite") and ":memory:" in url:
+        return {}
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+    if url.startswith("sqlite"):
+        # 추론 스레드 / write-behind 스레드가 같은 풀을 공유
+        options["connect_args"] = {"check_same_thread": False}
+    return options
+
+def enable_sqlite_wal(engine):
+    """
+    SQLite 연결마다 WAL 모드 적용.
+    쓰기 중에도 읽기(캐시 조회)가 막히지 않고, synchronous=NORMAL 로 커밋 fsync 를 줄인다.
+    """
+    if engine.dialect.name != "sqlite" or not SQLITE_WAL:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
+def utc_now() -> datetime:
+    """
+    DateTime 컬럼에 저장할 현재 UTC 시각.
+    컬럼은 timezone 없는 UTC 값으로 저장하므로 tzinfo 를 뗀다 (datetime.utcnow 대체).
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 Base = declarative_base()
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+enable_sqlite_wal(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 class DetectionResult(Base):
@@ -14,6 +65,72 @@ class DetectionResult(Base):
     image_path = Column(String, unique=False, index=True)
     results = Column(JSON)  # bbox 데이터를 JSON 형식으로 저장
 
+class Drawing(Base):
+    """탐지 한 번(그림 한 장) 단위 레코드. 박스 통계를 그림별로 묶을 때 사용"""
+    __tablename__ = "drawings"
+    id = Column(Integer, primary_key=True)
+    source = Column(String)  # 업로드 파일명 또는 결과 캐시 키
+    image_type = Column(String, nullable=False)
+    box_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=utc_now)
+
+    __table_args__ = (
+        Index("ix_drawings_type_created", "image_type", "created_at"),
+    )
+
+class DetectionBox(Base):
+    """
+    탐지 박스 한 개당 한 행인 정규화 테이블.
+    image_type / created_at 을 박스 행에도 중복 저장해 타입·레이블·기간 필터가 인덱스만으로 처리되게 한다.
+    """
+    __tablename__ = "detection_boxes"
+    id = Column(Integer, primary_key=True)
+    drawing_id = Column(Integer, ForeignKey("drawings.id"), nullable=False)
+    image_type = Column(String, nullable=False)
+    class_id = Column(Integer, nullable=False)
+    label = Column(String, nullable=False)
+    x = Column(Float, nullable=False)
+    y = Column(Float, nullable=False)
+    w = Column(Float, nullable=False)
+    h = Column(Float, nullable=False)
+    area = Column(Float, nullable=False)
+    confidence = Column(Float, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_boxes_type_label_created", "image_type", "label", "created_at"),
+        Index("ix_boxes_type_created", "image_type", "created_at"),
+        Index("ix_boxes_drawing_label", "drawing_id", "label"),
+    )
+
+class Job(Base):
+    """
+    비동기 탐지 작업 (POST /api/jobs). 이 테이블 자체가 내구성 있는 작업 대기열이다.
+    status: queued → running → succeeded | failed (실패 시 재시도하면 다시 queued)
+    워커는 lease_until 까지 작업을 점유하고, 그 전에 죽으면 다른 워커가 다시 가져간다.
+    """
+    __tablename__ = "jobs"
+    id = Column(String(32), primary_key=True)
+    image_type = Column(String, nullable=False)
+    filename = Column(String)
+    image = Column(LargeBinary)  # 업로드 원본 (완료되면 비운다)
+    priority = Column(Integer, nullable=False, default=0)  # 클수록 먼저 처리
+    status = Column(String, nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    result = Column(JSON)
+    error = Column(String)
+    worker = Column(String)
+    available_at = Column(DateTime, nullable=False)  # 재시도 대기가 끝나는 시각
+    lease_until = Column(DateTime)
+    created_at = Column(DateTime, nullable=False, default=utc_now)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_jobs_status_priority_created", "status", "priority", "created_at"),
+    )
+
 Base.metadata.create_all(bind=engine)
 
 def save_to_database(image_path: str, results: dict):
@@ -30,4 +147,105 @@ def save_to_database(image_path: str, results: dict):
             session.add(db_entry)
         session.commit()
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
+
+def load_from_database(image_path: str):
+    """image_path 로 저장된 결과를 조회. 없으면 None"""
+    session = SessionLocal()
+    try:
+        db_entry = session.query(DetectionResult).filter_by(image_path=image_path).first()
+        return db_entry.results if db_entry else None
+    finally:
+        session.close()
+
+def upsert_results(connection, rows: list) -> int:
+    """
+    (image_path, results) 목록을 한 트랜잭션에서 일괄 upsert.
+    같은 image_path 가 여러 번 있으면 마지막 값만 쓰고,
+    기존 행 조회 1회 + 일괄 UPDATE 1회 + 일괄 INSERT 1회로 처리한다.
+    image_path 에 unique 제약이 없어 방언별 ON CONFLICT 대신 이 방식을 쓴다.
+    """
+    latest = dict(rows)
+    if not latest:
+        return 0
+    existing = {}
+    paths = list(latest)
+    # SQLite 바인드 변수 개수 제한을 피하기 위해 나눠서 조회
+    for start in range(0, len(paths), 500):
+        chunk = paths[start:start + 500]
+        for row_id, image_path in connection.execute(
+            select(DetectionResult.id, DetectionResult.image_path)
+            .where(DetectionResult.image_path.in_(chunk))
+        ):
+            existing.setdefault(image_path, row_id)
+
+    updates = [
+        {"row_id": existing[path], "results": results}
+        for path, results in latest.items() if path in existing
+    ]
+    inserts = [
+        {"image_path": path, "results": results}
+        for path, results in latest.items() if path not in existing
+    ]
+    if updates:
+        connection.execute(
+            update(DetectionResult)
+            .where(DetectionResult.id == bindparam("row_id"))
+            .values(results=bindparam("results")),
+            updates,
+        )
+    if inserts:
+        connection.execute(insert(DetectionResult), inserts)
+    return len(latest)
+
+def insert_drawings(connection, drawings: list) -> int:
+    """
+    그림 목록을 drawings / detection_boxes 에 일괄 INSERT.
+    drawings: (source, image_type, created_at, columns) 목록,
+    columns 는 (class_id, label, x, y, w, h, confidence) 열 리스트 (BoundingBoxSet.columns()).
+    그림 id 는 INSERT ... RETURNING 한 번으로 받아 박스 행에 채운다.
+    """
+    if not drawings:
+        return 0
+    drawing_ids = connection.execute(
+        insert(Drawing).returning(Drawing.id, sort_by_parameter_order=True),
+        [
+            {"source": source, "image_type": image_type, "box_count": len(columns[0]), "created_at": created_at}
+            for source, image_type, created_at, columns in drawings
+        ],
+    ).scalars().all()
+    box_rows = [
+        {
+            "drawing_id": drawing_id, "image_type": image_type, "created_at": created_at,
+            "class_id": class_id, "label": label, "x": x, "y": y, "w": w, "h": h,
+            "area": w * h, "confidence": confidence,
+        }
+        for drawing_id, (_, image_type, created_at, columns) in zip(drawing_ids, drawings)
+        for class_id, label, x, y, w, h, confidence in zip(*columns)
+    ]
+    if box_rows:
+        connection.execute(insert(DetectionBox), box_rows)
+    return len(box_rows)
+
+def save_batch(connection, results: list, drawings: list):
+    """write-behind 배치 하나를 같은 트랜잭션에서 저장"""
+    upsert_results(connection, results)
+    insert_drawings(connection, drawings)
+
+def bulk_save_to_database(results: list, drawings: list = ()):
+    """동기 엔진으로 일괄 저장 (write-behind 스레드에서 호출)"""
+    with engine.begin() as connection:
+        save_batch(connection, results, list(drawings))
+
+def create_async_db_engine():
+    """
+    ASYNC_DATABASE_URL 이 있으면 비동기 엔진 생성 (aiosqlite / asyncpg 등 드라이버 필요).
+    없으면 None 을 반환하고 동기 엔진 + 스레드로 저장한다.
+    """
+    if not ASYNC_DATABASE_URL:
+        return None
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+    enable_sqlite_wal(async_engine.sync_engine)
+    return async_engine
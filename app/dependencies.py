@@ -1,18 +1,78 @@
-from models.house_model import detect_houses
-from models.tree_model import detect_trees
-from models.person_model import detect_people
+import asyncio
+
+import numpy as np
+
+from image_utils import prepare_image, letterbox
+from inference import executors
+from models.house_model import detect_houses_tensor
+from models.tree_model import detect_trees_tensor
+from models.person_model import detect_people_tensor
+
+# 결과 키 → (모델 타입, 텐서 입력 탐지 함수)
+PIPELINE_MODELS = {
+    "houses": ("house", detect_houses_tensor),
+    "trees": ("tree", detect_trees_tensor),
+    "person": ("person", detect_people_tensor),
+}
+
+class PreprocessedImage:
+    """한 번 letterbox 한 공용 입력 텐서와 원본 좌표로 되돌리기 위한 정보"""
+
+    def __init__(self, tensor, ratio: float, pad: tuple, shape: tuple):
+        self.tensor = tensor
+        self.ratio = ratio
+        self.pad = pad
+        self.shape = shape
+
+def preprocess_image(image_array: np.ndarray) -> PreprocessedImage:
+    """
+    디코딩된 BGR 이미지를 letterbox 후 1×3×H×W RGB float 텐서(0~1)로 변환.
+    세 모델이 이 텐서를 그대로 공유한다.
+    """
+    import torch
+
+    padded, ratio, pad = letterbox(image_array)
+    rgb = np.ascontiguousarray(padded[..., ::-1].transpose(2, 0, 1))
+    tensor = torch.from_numpy(rgb).unsqueeze(0).float().div_(255)
+    return PreprocessedImage(tensor, ratio, pad, image_array.shape[:2])
+
+def restore_boxes(boxes: np.ndarray, prep: PreprocessedImage) -> np.ndarray:
+    """letterbox 좌표의 [x1, y1, x2, y2, conf, cls] 를 원본 이미지 좌표로 변환"""
+    boxes = np.array(boxes, dtype=np.float64).reshape(-1, 6)
+    left, top = prep.pad
+    h, w = prep.shape
+    boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - left) / prep.ratio).clip(0, w)
+    boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - top) / prep.ratio).clip(0, h)
+    return boxes
+
+async def run_htp_pipeline(image_array: np.ndarray) -> dict:
+    """
+    이미지 한 장을 한 번만 전처리하고 집 / 나무 / 사람 모델을 각자의 추론 스레드에서 동시에 실행.
+    지연 시간은 세 모델의 합이 아니라 가장 느린 모델 하나 수준이 된다.
+    """
+    prep = await asyncio.to_thread(preprocess_image, image_array)
+    outputs = await asyncio.gather(*(
+        executors[model_type].run(detect_func, prep.tensor)
+        for model_type, detect_func in PIPELINE_MODELS.values()
+    ))
+    return {key: restore_boxes(output[0], prep) for key, output in zip(PIPELINE_MODELS, outputs)}
 
 def get_model_predictions(image_path: str) -> dict:
     """
     각각의 YOLOv8n 모델을 호출하여 탐지 결과를 병합
+    (파일은 한 번만 읽고 디코딩하며, 세 모델은 동시에 실행)
     """
-    house_results = detect_houses(image_path)
-    tree_results = detect_trees(image_path)
-    person_results = detect_people(image_path)
-
-    combined_results = {
-        "houses": house_results,
-        "trees": tree_results,
-        "person": person_results,
+    with open(image_path, "rb") as f:
+        image = prepare_image(f.read())
+    prep = preprocess_image(image.array)
+
+    futures = {
+        key: executors[model_type].submit(detect_func, prep.tensor)
+        for key, (model_type, detect_func) in PIPELINE_MODELS.items()
     }
-    return combined_results
\ No newline at end of file
+    combined_results = {}
+    for key, future in futures.items():
+        boxes = restore_boxes(future.result()[0], prep)
+        boxes[:, :4] *= image.scale
+        combined_results[key] = boxes.tolist()
+    return combined_results
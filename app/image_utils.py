@@ -0,0 +1,164 @@
+import io
+import os
+import uuid
+import zipfile
+
+import cv2
+import numpy as np
+
+from config import SPILL_UPLOADS, SPILL_DIR, MODEL_INPUT_SIZE, UPLOAD_MAX_PIXELS, UPLOAD_DOWNSCALE
+
+# 헤더 검사에서 허용하는 이미지 형식 (PIL format 이름)
+UPLOAD_FORMATS = ("JPEG", "MPO", "PNG", "BMP", "WEBP")
+
+
+def decode_image(contents: bytes) -> np.ndarray:
+    """
+    업로드된 이미지 바이트를 메모리에서 한 번만 디코딩해 BGR 배열로 반환.
+    YOLO 는 numpy 배열을 BGR 순서로 받으므로 그대로 모델에 넘길 수 있다.
+    """
+    array = cv2.imdecode(np.frombuffer(contents, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if array is None:
+        raise ValueError("이미지를 디코딩할 수 없습니다.")
+    return array
+
+
+class PreparedImage:
+    """
+    업로드 전처리 결과.
+    array: 모델에 넘길 BGR 배열 (필요하면 축소됨)
+    scale: 원본 좌표 = array 좌표 × scale
+    width, height: 원본 이미지 크기 (EXIF 회전 적용 후)
+    """
+
+    __slots__ = ("array", "scale", "width", "height")
+
+    def __init__(self, array: np.ndarray, scale: float, width: int, height: int):
+        self.array = array
+        self.scale = scale
+        self.width = width
+        self.height = height
+
+    @property
+    def size(self) -> tuple:
+        return self.width, self.height
+
+
+def probe_image(contents: bytes) -> tuple:
+    """
+    전체 디코딩 없이 헤더만 읽어 (형식, 너비, 높이) 반환 (EXIF 회전 적용 전 크기).
+    지원하지 않는 형식이거나 픽셀 수가 UPLOAD_MAX_PIXELS 를 넘으면 ValueError.
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(contents)) as image:
+            image_format = image.format
+            width, height = image.size
+    except Exception as e:
+        raise ValueError(f"이미지 헤더를 읽을 수 없습니다: {str(e)}")
+    if image_format not in UPLOAD_FORMATS:
+        raise ValueError(f"지원하지 않는 이미지 형식입니다: {image_format}")
+    if width <= 0 or height <= 0 or width * height > UPLOAD_MAX_PIXELS:
+        raise ValueError(f"이미지 크기가 허용 범위를 벗어났습니다: {width}x{height}")
+    return image_format, width, height
+
+
+def prepare_image(contents: bytes, max_size: int = MODEL_INPUT_SIZE) -> PreparedImage:
+    """
+    업로드 바이트를 검사 → 디코딩 → (필요하면) 축소까지 한 번에 처리.
+    긴 변이 max_size 보다 크면 JPEG 는 DCT 단계에서 1/2·1/4·1/8 로 줄여 디코딩하고,
+    남은 축소는 INTER_AREA 리사이즈 한 번으로 끝낸다.
+    모델은 어차피 max_size 로 줄여 추론하므로 결과 박스는 scale 로 원본 좌표에 되돌린다.
+    """
+    image_format, width, height = probe_image(contents)
+    long_side = max(width, height)
+    if not UPLOAD_DOWNSCALE or long_side <= max_size:
+        array = decode_image(contents)
+        return PreparedImage(array, 1.0, array.shape[1], array.shape[0])
+
+    scale = long_side / max_size
+    flags = cv2.IMREAD_COLOR
+    if image_format in ("JPEG", "MPO"):
+        for reduction, reduced_flag in ((8, cv2.IMREAD_REDUCED_COLOR_8),
+                                        (4, cv2.IMREAD_REDUCED_COLOR_4),
+                                        (2, cv2.IMREAD_REDUCED_COLOR_2)):
+            if scale >= reduction:
+                flags = reduced_flag
+                break
+    array = cv2.imdecode(np.frombuffer(contents, dtype=np.uint8), flags)
+    if array is None:
+        raise ValueError("이미지를 디코딩할 수 없습니다.")
+    # cv2 가 EXIF 회전을 적용해 가로/세로가 바뀐 경우
+    if width != height and (array.shape[1] > array.shape[0]) != (width > height):
+        width, height = height, width
+
+    target = (max(1, int(round(width / scale))), max(1, int(round(height / scale))))
+    if (array.shape[1], array.shape[0]) != target:
+        array = cv2.resize(array, target, interpolation=cv2.INTER_AREA)
+    return PreparedImage(array, scale, width, height)
+
+
+def letterbox(image: np.ndarray, size: int = MODEL_INPUT_SIZE, color=(114, 114, 114)):
+    """
+    비율을 유지한 채 size × size 캔버스에 맞춰 리사이즈하고 남는 부분을 패딩 (YOLO 학습 시 전처리와 동일).
+    (패딩된 이미지, 축소 비율, (왼쪽 패딩, 위쪽 패딩)) 을 반환.
+    """
+    h, w = image.shape[:2]
+    ratio = min(size / h, size / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    if (new_w, new_h) != (w, h):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    dw, dh = (size - new_w) / 2, (size - new_h) / 2
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    padded = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return padded, ratio, (left, top)
+
+
+def spill_upload(contents: bytes, filename: str):
+    """
+    디버깅용: SPILL_UPLOADS 가 켜져 있으면 업로드 원본을 고유한 이름으로 저장하고 경로를 반환.
+    동시 업로드가 같은 파일명을 써도 서로 덮어쓰지 않는다.
+    """
+    if not SPILL_UPLOADS:
+        return None
+    os.makedirs(SPILL_DIR, exist_ok=True)
+    path = os.path.join(SPILL_DIR, f"{uuid.uuid4().hex}_{os.path.basename(filename or 'upload')}")
+    with open(path, "wb") as f:
+        f.write(contents)
+    return path
+
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+IMAGE_TYPES = ("house", "tree", "person")
+
+
+def infer_image_type(name: str):
+    """
+    압축 파일 내 경로에서 그림 타입 추정.
+    최상위 폴더명(house/a.png) 또는 파일명 접두어(tree_01.png, person-3.jpg) 를 본다.
+    """
+    parts = name.replace("\\", "/").lower().split("/")
+    candidates = parts[:-1] + [parts[-1].replace("-", "_").split("_")[0]]
+    for candidate in candidates:
+        if candidate in IMAGE_TYPES:
+            return candidate
+    return None
+
+
+def read_archive(data: bytes, max_files: int, max_bytes: int) -> list:
+    """
+    zip 압축 파일에서 이미지 (이름, 바이트) 목록을 꺼낸다.
+    파일 수와 압축 해제 후 총 크기를 헤더 기준으로 먼저 검사해 초과하면 ValueError.
+    """
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        entries = [
+            info for info in archive.infolist()
+            if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS)
+        ]
+        if len(entries) > max_files:
+            raise ValueError(f"too many images in archive ({len(entries)} > {max_files})")
+        if sum(info.file_size for info in entries) > max_bytes:
+            raise ValueError("archive is too large")
+        return [(info.filename, archive.read(info)) for info in entries]
@@ -0,0 +1,124 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import INFERENCE_WORKERS, INFERENCE_QUEUE_SIZE, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS
+
+
+class InferenceQueueFull(Exception):
+    """추론 대기열이 가득 차서 요청을 받을 수 없을 때 발생"""
+
+
+class InferenceExecutor:
+    """
+    모델 타입 하나에 대응하는 추론 전용 스레드 풀.
+    torch 연산은 GIL을 해제하므로 스레드 풀로도 이벤트 루프를 막지 않는다.
+    실행 중 + 대기 중인 작업 수를 workers + max_queue 로 제한한다.
+    """
+
+    def __init__(self, name: str, workers: int = INFERENCE_WORKERS, max_queue: int = INFERENCE_QUEUE_SIZE):
+        self.name = name
+        self.capacity = workers + max_queue
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"infer-{name}")
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """실행 중이거나 대기 중인 작업 수"""
+        return self._pending
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def submit(self, func, *args):
+        """
+        func(*args) 를 추론 스레드에 제출하고 concurrent.futures.Future 를 반환한다.
+        대기열이 가득 차 있으면 즉시 InferenceQueueFull 을 발생시킨다.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise InferenceQueueFull(f"{self.name} inference queue is full")
+        with self._lock:
+            self._pending += 1
+        # 요청이 취소되더라도 실제 작업이 끝날 때까지 슬롯을 유지한다
+        future = self._pool.submit(func, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, func, *args):
+        """func(*args) 를 추론 스레드에서 실행하고 결과를 기다린다."""
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class MicroBatcher:
+    """
+    같은 모델로 동시에 들어온 요청을 모아 한 번의 배치 추론으로 처리한다.
+    max_batch 개가 모이거나 max_wait_ms 가 지나면 배치를 실행하고,
+    각 호출자에게는 자신의 입력에 대한 결과만 돌려준다.
+    batch_func 는 입력 리스트를 받아 같은 순서의 결과 리스트를 반환해야 한다.
+    """
+
+    def __init__(self, executor: InferenceExecutor, batch_func,
+                 max_batch: int = BATCH_MAX_SIZE, max_wait_ms: float = BATCH_MAX_WAIT_MS):
+        self.executor = executor
+        self.batch_func = batch_func
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        self._items = []
+        self._timer = None
+        self._tasks = set()
+
+    @property
+    def pending(self) -> int:
+        """배치에 묶이기를 기다리는 요청 수"""
+        return len(self._items)
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._items.append((item, future))
+        if len(self._items) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items, self._items = self._items, []
+        if items:
+            task = asyncio.ensure_future(self._run(items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, items):
+        try:
+            results = await self.executor.run(self.batch_func, [item for item, _ in items])
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(items, results):
+            if not future.done():
+                future.set_result(result)
+
+
+executors = {
+    "house": InferenceExecutor("house"),
+    "tree": InferenceExecutor("tree"),
+    "person": InferenceExecutor("person"),
+}
+
+
+def shutdown_executors():
+    for executor in executors.values():
+        executor.shutdown()
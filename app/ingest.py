@@ -0,0 +1,322 @@
+import io
+
+from fastapi import HTTPException, Request
+
+from config import UPLOAD_MAX_BYTES, UPLOAD_MAX_PIXELS, BATCH_MAX_BYTES, BATCH_DETECT_MAX_FILES
+from metrics import stage, record_error
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:
+    # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# 이미지 외 폼 필드와 멀티파트 경계 / 헤더에 허용하는 바이트 수
+FORM_OVERHEAD = 64 * 1024
+# 파일 파트 하나당 경계 / 파트 헤더에 허용하는 바이트 수
+PART_OVERHEAD = 1024
+# 헤더만으로 이미지 크기를 알아내려고 모아 보는 최대 바이트 수 (JPEG 는 EXIF 뒤에 SOF 가 올 수 있음)
+PROBE_LIMIT = 512 * 1024
+
+
+def sniff_format(head: bytes):
+    """첫 바이트(매직 넘버)로 이미지 형식 판별. 허용하지 않는 형식이면 None"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "JPEG"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "PNG"
+    if head.startswith(b"BM"):
+        return "BMP"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "WEBP"
+    return None
+
+
+def probe_size(head: bytes):
+    """지금까지 받은 앞부분만으로 (너비, 높이) 를 읽는다. 아직 헤더가 다 오지 않았으면 None"""
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(head)) as image:
+            return image.size
+    except Image.DecompressionBombError as e:
+        # 한도의 2배를 넘는 크기는 PIL 이 size 를 주지 않고 바로 거부한다
+        raise HTTPException(status_code=413, detail=f"Image is too large: {str(e)}")
+    except Exception:
+        return None
+
+
+class UploadedFile:
+    """스트리밍으로 받은 파일 파트 하나. image_format / size 는 이미지로 검사한 파트만 채워진다"""
+
+    __slots__ = ("field", "filename", "contents", "image_format", "size", "_probe_at")
+
+    def __init__(self, field: str, filename: str):
+        self.field = field
+        self.filename = filename
+        self.contents = bytearray()
+        self.image_format = None
+        self.size = None
+        self._probe_at = 0  # 다음 probe_size 를 시도할 받은 바이트 수
+
+
+class UploadForm:
+    """
+    스트리밍으로 수신한 멀티파트 폼.
+    files: 파일 파트 목록 (수신 순서), fields: 텍스트 필드 {이름: 값 리스트}
+    filename / contents / image_format / size 는 첫 번째 파일의 값이다 (이미지 한 장을 받는 라우트용).
+    """
+
+    __slots__ = ("files", "fields")
+
+    def __init__(self, files: list, fields: dict):
+        self.files = files
+        self.fields = fields
+
+    @property
+    def filename(self):
+        return self.files[0].filename if self.files else None
+
+    @property
+    def contents(self):
+        return self.files[0].contents if self.files else None
+
+    @property
+    def image_format(self):
+        return self.files[0].image_format if self.files else None
+
+    @property
+    def size(self):
+        return self.files[0].size if self.files else None
+
+    def files_for(self, name: str) -> list:
+        return [upload for upload in self.files if upload.field == name]
+
+    def values(self, name: str) -> list:
+        """같은 이름으로 여러 번 온 텍스트 필드의 값 전체"""
+        return self.fields.get(name, [])
+
+    def field(self, name: str, default=None, cast=str):
+        """텍스트 필드 값 (여러 번 오면 마지막 값, 없으면 default). 변환할 수 없으면 422"""
+        values = self.fields.get(name)
+        value = values[-1] if values else None
+        if value is None or value == "":
+            return default
+        try:
+            return cast(value)
+        except ValueError:
+            raise HTTPException(status_code=422, detail=f"Invalid value for '{name}'")
+
+
+class UploadParser:
+    """
+    python-multipart 파서 콜백으로 폼을 조각 단위로 처리.
+    file_fields: {파일 필드명: 이미지로 검사할지 여부}. 이미지 파트는 받는 즉시 매직 넘버 / 헤더 크기를,
+    모든 파일 파트는 누적 바이트 수와 개수를 검사해 조건을 벗어나면 나머지 본문을 받기 전에 HTTPException 을 발생시킨다.
+    """
+
+    def __init__(self, boundary: bytes, file_fields: dict, max_bytes: int, max_pixels: int, max_files: int = 1):
+        self.file_fields = file_fields
+        self.max_bytes = max_bytes
+        self.max_pixels = max_pixels
+        self.max_files = max_files
+        self.fields = {}
+        self.files = []
+        self._file_bytes = 0
+        self._field_bytes = 0
+        self._header_field = b""
+        self._header_value = b""
+        self._headers = {}
+        self._name = None
+        self._value = None
+        self._file = None
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+        })
+
+    def write(self, chunk: bytes):
+        self._parser.write(chunk)
+
+    def finalize(self):
+        self._parser.finalize()
+
+    def _on_part_begin(self):
+        self._headers = {}
+        self._name = None
+        self._value = None
+        self._file = None
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._name = options.get(b"name", b"").decode("utf-8", "replace")
+        if self._name in self.file_fields:
+            if len(self.files) >= self.max_files:
+                if self.max_files == 1:
+                    raise HTTPException(status_code=400, detail=f"Only one '{self._name}' file is allowed")
+                raise HTTPException(status_code=413, detail=f"Too many files (max {self.max_files})")
+            filename = options.get(b"filename", b"").decode("utf-8", "replace") or None
+            self._file = UploadedFile(self._name, filename)
+            self.files.append(self._file)
+        else:
+            self._value = bytearray()
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        chunk = data[start:end]
+        if self._value is not None:
+            self._field_bytes += len(chunk)
+            if self._field_bytes > FORM_OVERHEAD:
+                raise HTTPException(status_code=413, detail="Form fields are too large")
+            self._value.extend(chunk)
+            return
+        if self._file is None:
+            return
+        self._file.contents.extend(chunk)
+        self._file_bytes += len(chunk)
+        if self._file_bytes > self.max_bytes:
+            raise HTTPException(status_code=413, detail=f"Upload is larger than {self.max_bytes} bytes")
+        if self.file_fields[self._file.field]:
+            self._check_head(self._file, final=False)
+
+    def _on_part_end(self):
+        if self._value is not None:
+            self.fields.setdefault(self._name, []).append(self._value.decode("utf-8", "replace"))
+            self._value = None
+        elif self._file is not None:
+            if self.file_fields[self._file.field]:
+                self._check_head(self._file, final=True)
+            self._file.contents = bytes(self._file.contents)
+            self._file = None
+
+    def _check_head(self, upload: UploadedFile, final: bool):
+        """
+        형식은 첫 12바이트로, 픽셀 수는 헤더를 읽을 수 있게 되는 시점에 바로 판정.
+        크기를 아직 모르면 받은 바이트가 지난 시도의 2배가 될 때마다 (PROBE_LIMIT 까지) 와 파트 끝에서만
+        다시 읽어 본다. 조각마다 앞부분 전체를 복사해 읽으면 헤더가 늦게 오는 파일에서 비용이 제곱으로 는다.
+        """
+        head = upload.contents
+        if upload.image_format is None:
+            if len(head) < 12 and not final:
+                return
+            upload.image_format = sniff_format(bytes(head[:12]))
+            if upload.image_format is None:
+                raise HTTPException(status_code=415, detail="Unsupported or invalid image format")
+        if upload.size is None and (final or upload._probe_at <= len(head) and upload._probe_at <= PROBE_LIMIT):
+            upload._probe_at = min(2 * len(head), PROBE_LIMIT) if len(head) < PROBE_LIMIT else PROBE_LIMIT + 1
+            upload.size = probe_size(bytes(head))
+            if upload.size is not None and upload.size[0] * upload.size[1] > self.max_pixels:
+                raise HTTPException(
+                    status_code=413, detail=f"Image is too large: {upload.size[0]}x{upload.size[1]} pixels"
+                )
+
+
+async def read_upload(request: Request, file_field: str = "image", max_bytes: int = UPLOAD_MAX_BYTES,
+                      max_pixels: int = UPLOAD_MAX_PIXELS) -> UploadForm:
+    """
+    multipart/form-data 본문을 조각 단위로 받아 이미지 한 장과 텍스트 필드를 꺼낸다 (FastAPI 의존성).
+    Content-Length 가 한도를 넘으면 본문을 읽지 않고, 스트리밍 도중 한도 / 형식 / 픽셀 수를
+    벗어나면 그 자리에서 413 / 415 를 반환해 큰 업로드가 메모리와 디코딩 경로를 차지하지 않게 한다.
+    """
+    form = await _guarded_read(request, {file_field: True}, max_bytes, max_pixels, 1)
+    if not form.contents:
+        record_error("upload")
+        raise HTTPException(status_code=422, detail=f"'{file_field}' file is required")
+    return form
+
+
+async def read_batch_upload(request: Request) -> UploadForm:
+    """
+    /detect/batch 용: images 파일 여러 개 + archive(zip) 하나 + 텍스트 필드를 스트리밍으로 받는다.
+    전체 파일 바이트는 BATCH_MAX_BYTES, 파일 수는 BATCH_DETECT_MAX_FILES (+ archive) 까지.
+    images 파트는 read_upload 와 같은 형식 / 픽셀 수 검사를 받는다.
+    """
+    return await _guarded_read(
+        request, {"images": True, "archive": False}, BATCH_MAX_BYTES, UPLOAD_MAX_PIXELS, BATCH_DETECT_MAX_FILES + 1
+    )
+
+
+async def _guarded_read(request: Request, file_fields: dict, max_bytes: int, max_pixels: int,
+                        max_files: int) -> UploadForm:
+    try:
+        with stage("read"):
+            return await _read_form(request, file_fields, max_bytes, max_pixels, max_files)
+    except HTTPException:
+        record_error("upload")
+        raise
+
+
+async def _read_form(request: Request, file_fields: dict, max_bytes: int, max_pixels: int,
+                     max_files: int) -> UploadForm:
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="multipart/form-data body required")
+
+    limit = max_bytes + FORM_OVERHEAD + PART_OVERHEAD * max_files
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > limit:
+        raise HTTPException(status_code=413, detail=f"Request body is larger than {limit} bytes")
+
+    parser = UploadParser(boundary, file_fields, max_bytes, max_pixels, max_files)
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > limit:
+                raise HTTPException(status_code=413, detail=f"Request body is larger than {limit} bytes")
+            parser.write(chunk)
+        parser.finalize()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid multipart body: {str(e)}")
+
+    return UploadForm(parser.files, parser.fields)
+
+
+def form_bool(value: str) -> bool:
+    """폼 체크박스 / 불리언 필드 값 (true/false, 1/0, on/off, yes/no)"""
+    lowered = value.strip().lower()
+    if lowered in ("1", "true", "on", "yes"):
+        return True
+    if lowered in ("0", "false", "off", "no"):
+        return False
+    raise ValueError(value)
+
+
+def upload_openapi(fields: dict, image_field: str = "image") -> dict:
+    """
+    read_upload 를 쓰는 라우트의 OpenAPI requestBody (폼을 직접 파싱하므로 문서에 따로 적어 준다).
+    fields: {필드명: JSON schema}, image_field: 필수 이미지 파일 필드 (None 이면 fields 만 사용)
+    """
+    properties = {image_field: {"type": "string", "format": "binary"}, **fields} if image_field else dict(fields)
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": properties,
+                        "required": [image_field] if image_field else [],
+                    },
+                },
+            },
+        },
+    }
@@ -0,0 +1,301 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from datetime import timedelta
+
+from sqlalchemy import and_, func, insert, or_, select, update
+
+from config import (
+    JOB_WORKERS,
+    JOB_MAX_ATTEMPTS,
+    JOB_RETRY_BACKOFF,
+    JOB_LEASE_SECONDS,
+    JOB_POLL_INTERVAL,
+    JOB_MAX_QUEUED,
+)
+from database import engine, utc_now, Job
+from metrics import STAGE_SECONDS, record_error
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+
+class JobQueueFull(Exception):
+    """대기 중인 작업이 JOB_MAX_QUEUED 개 이상일 때 발생"""
+
+
+class JobQueue:
+    """
+    jobs 테이블을 대기열로 쓰는 내구성 작업 큐 (DB 함수는 동기, 스레드에서 호출).
+    우선순위가 높고 먼저 들어온 작업부터 꺼내며, 점유는 attempts 값을 비교하는
+    조건부 UPDATE 로 처리해 여러 프로세스의 워커가 같은 작업을 가져가지 않는다.
+    """
+
+    def __init__(self, max_attempts: int = JOB_MAX_ATTEMPTS, retry_backoff: float = JOB_RETRY_BACKOFF,
+                 lease_seconds: float = JOB_LEASE_SECONDS, max_queued: int = JOB_MAX_QUEUED):
+        self.max_attempts = max(1, max_attempts)
+        self.retry_backoff = retry_backoff
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_queued = max_queued
+        # 같은 프로세스 안의 워커 / long-poll 대기자를 바로 깨우기 위한 이벤트
+        self._wakeup = None
+        self._waiters = {}
+
+    def enqueue(self, image_type: str, contents: bytes, filename: str = None, priority: int = 0) -> str:
+        # 상한 확인은 근사치면 충분하므로 쓰기 트랜잭션과 분리 (SQLite 잠금 승격 충돌 방지)
+        with engine.connect() as connection:
+            queued = connection.execute(
+                select(func.count()).select_from(Job).where(Job.status == QUEUED)
+            ).scalar_one()
+        if queued >= self.max_queued:
+            raise JobQueueFull(f"job queue is full ({queued} queued)")
+        job_id = uuid.uuid4().hex
+        now = utc_now()
+        with engine.begin() as connection:
+            connection.execute(insert(Job).values(
+                id=job_id, image_type=image_type, filename=filename, image=contents, priority=priority,
+                status=QUEUED, attempts=0, max_attempts=self.max_attempts, available_at=now, created_at=now,
+            ))
+        return job_id
+
+    def claim(self, worker: str):
+        """
+        처리할 작업 하나를 점유해 dict 로 반환 (없으면 None).
+        lease 가 지난 running 작업은 워커가 죽은 것으로 보고 다시 가져간다.
+        """
+        for _ in range(5):
+            now = utc_now()
+            with engine.connect() as connection:
+                row = connection.execute(
+                    select(Job.id, Job.status, Job.attempts, Job.max_attempts)
+                    .where(or_(
+                        and_(Job.status == QUEUED, Job.available_at <= now),
+                        and_(Job.status == RUNNING, Job.lease_until < now),
+                    ))
+                    .order_by(Job.priority.desc(), Job.created_at)
+                    .limit(1)
+                ).first()
+            if row is None:
+                return None
+
+            # 조회와 점유를 다른 트랜잭션으로 나누고 조건부 UPDATE 의 rowcount 로 경쟁을 판정
+            owned = and_(Job.id == row.id, Job.status == row.status, Job.attempts == row.attempts)
+            with engine.begin() as connection:
+                if row.attempts >= row.max_attempts:
+                    # 마지막 시도 중에 워커가 죽은 작업
+                    connection.execute(update(Job).where(owned).values(
+                        status=FAILED, error="worker lost", image=None, lease_until=None, finished_at=now,
+                    ))
+                    continue
+                claimed = connection.execute(update(Job).where(owned).values(
+                    status=RUNNING, attempts=row.attempts + 1, worker=worker,
+                    lease_until=now + self.lease, started_at=now,
+                )).rowcount
+                if not claimed:
+                    # 다른 워커가 먼저 가져감
+                    continue
+                job = connection.execute(
+                    select(Job.id, Job.image_type, Job.filename, Job.image, Job.attempts).where(Job.id == row.id)
+                ).first()
+            return dict(job._mapping)
+        return None
+
+    def complete(self, job_id: str, attempts: int, result: dict):
+        self._finish(job_id, attempts, status=SUCCEEDED, result=result, error=None)
+
+    def fail(self, job_id: str, attempts: int, error: str) -> bool:
+        """실패 기록. 재시도 횟수가 남았으면 지수 백오프 후 다시 queued 로 돌리고 True"""
+        if attempts < self.max_attempts:
+            delay = self.retry_backoff * (2 ** (attempts - 1))
+            with engine.begin() as connection:
+                connection.execute(update(Job).where(Job.id == job_id, Job.attempts == attempts).values(
+                    status=QUEUED, error=error, worker=None, lease_until=None,
+                    available_at=utc_now() + timedelta(seconds=delay),
+                ))
+            return True
+        self._finish(job_id, attempts, status=FAILED, result=None, error=error)
+        return False
+
+    def release(self, job_id: str, attempts: int):
+        """워커 종료로 중단된 작업을 시도 횟수를 되돌려 대기열에 반납"""
+        with engine.begin() as connection:
+            connection.execute(update(Job).where(Job.id == job_id, Job.attempts == attempts).values(
+                status=QUEUED, attempts=attempts - 1, worker=None, lease_until=None,
+                available_at=utc_now(),
+            ))
+
+    def _finish(self, job_id: str, attempts: int, status: str, result, error):
+        with engine.begin() as connection:
+            connection.execute(update(Job).where(Job.id == job_id, Job.attempts == attempts).values(
+                status=status, result=result, error=error, image=None, lease_until=None,
+                finished_at=utc_now(),
+            ))
+
+    def get(self, job_id: str):
+        """작업 상태 dict (없으면 None). queued 면 앞에 남은 작업 수(queue_position)도 포함"""
+        with engine.connect() as connection:
+            row = connection.execute(
+                select(Job.id, Job.image_type, Job.filename, Job.priority, Job.status, Job.attempts,
+                       Job.max_attempts, Job.result, Job.error, Job.created_at, Job.started_at,
+                       Job.finished_at).where(Job.id == job_id)
+            ).first()
+            if row is None:
+                return None
+            job = {
+                "id": row.id,
+                "type": row.image_type,
+                "filename": row.filename,
+                "priority": row.priority,
+                "status": row.status,
+                "attempts": row.attempts,
+                "max_attempts": row.max_attempts,
+                "created_at": row.created_at.isoformat(),
+                "started_at": row.started_at.isoformat() if row.started_at else None,
+                "finished_at": row.finished_at.isoformat() if row.finished_at else None,
+                "result": row.result,
+                "error": row.error,
+            }
+            if row.status == QUEUED:
+                job["queue_position"] = connection.execute(
+                    select(func.count()).select_from(Job).where(
+                        Job.status == QUEUED,
+                        or_(Job.priority > row.priority,
+                            and_(Job.priority == row.priority, Job.created_at < row.created_at)),
+                    )
+                ).scalar_one()
+        return job
+
+    def counts(self) -> dict:
+        """상태별 작업 수"""
+        with engine.connect() as connection:
+            rows = connection.execute(select(Job.status, func.count()).group_by(Job.status)).all()
+        counts = {status: 0 for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def notify(self, job_id: str = None):
+        """같은 프로세스의 워커(새 작업) 또는 long-poll 대기자(작업 종료)를 깨운다"""
+        if job_id is None:
+            if self._wakeup is not None:
+                self._wakeup.set()
+            return
+        for event in self._waiters.get(job_id, ()):
+            event.set()
+
+    async def wait_for_work(self, timeout: float):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def wait(self, job_id: str, timeout: float = 0.0, poll_interval: float = JOB_POLL_INTERVAL):
+        """
+        작업이 끝나거나 timeout 초가 지날 때까지 기다렸다가 상태를 반환 (long-poll).
+        다른 프로세스의 워커가 처리하는 경우도 있어 poll_interval 마다 DB 를 다시 읽는다.
+        """
+        deadline = time.monotonic() + timeout
+        event = asyncio.Event()
+        self._waiters.setdefault(job_id, set()).add(event)
+        try:
+            while True:
+                job = await asyncio.to_thread(self.get, job_id)
+                remaining = deadline - time.monotonic()
+                if job is None or job["status"] in FINISHED or remaining <= 0:
+                    return job
+                try:
+                    await asyncio.wait_for(event.wait(), min(remaining, poll_interval))
+                except asyncio.TimeoutError:
+                    pass
+                event.clear()
+        finally:
+            waiters = self._waiters.get(job_id)
+            waiters.discard(event)
+            if not waiters:
+                self._waiters.pop(job_id, None)
+
+
+class JobWorkers:
+    """
+    작업 대기열을 처리하는 비동기 워커 풀.
+    handler(job) 는 탐지 응답 dict 를 반환하고, status 가 success 가 아니거나 예외가 나면 재시도한다.
+    """
+
+    def __init__(self, queue: JobQueue, concurrency: int = JOB_WORKERS, poll_interval: float = JOB_POLL_INTERVAL):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.running = 0
+        self.processed = 0
+        self._tasks = []
+
+    def start(self, handler, concurrency: int = None):
+        """이벤트 루프 안에서 호출 (lifespan 시작 시)"""
+        if self._tasks:
+            return
+        concurrency = self.concurrency if concurrency is None else concurrency
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks = [asyncio.create_task(self._run(handler, f"{prefix}:{index}")) for index in range(concurrency)]
+
+    async def stop(self):
+        """실행 중인 작업은 대기열에 반납하고 종료"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, handler, worker: str):
+        while True:
+            try:
+                job = await asyncio.to_thread(self.queue.claim, worker)
+            except Exception as e:
+                print(f"Job claim error: {str(e)}")
+                record_error("job")
+                job = None
+            if job is None:
+                await self.queue.wait_for_work(self.poll_interval)
+                continue
+            await self._process(handler, job)
+
+    async def _process(self, handler, job: dict):
+        self.running += 1
+        started = time.perf_counter()
+        try:
+            try:
+                result = await handler(job)
+            except asyncio.CancelledError:
+                await asyncio.shield(asyncio.to_thread(self.queue.release, job["id"], job["attempts"]))
+                raise
+            except Exception as e:
+                result = {"status": "error", "message": str(e)}
+
+            if isinstance(result, dict) and result.get("status") == "success":
+                await asyncio.to_thread(self.queue.complete, job["id"], job["attempts"], result)
+            else:
+                error = (result.get("error") or result.get("message")) if isinstance(result, dict) else None
+                error = error or "job failed"
+                print(f"Job error ({job['id']}, attempt {job['attempts']}): {error}")
+                record_error("job")
+                await asyncio.to_thread(self.queue.fail, job["id"], job["attempts"], error)
+            self.processed += 1
+            self.queue.notify(job["id"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 상태 기록 실패: lease 가 끝나면 다른 워커가 다시 처리한다
+            print(f"Job update error ({job['id']}): {str(e)}")
+            record_error("job")
+        finally:
+            self.running -= 1
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage="job")
+
+
+job_queue = JobQueue()
+job_workers = JobWorkers(job_queue)
@@ -0,0 +1,195 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+
+import httpx
+from openai import (
+    AsyncOpenAI,
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
+
+from config import (
+    OPENAI_BASE_URL,
+    OPENAI_TIMEOUT,
+    OPENAI_CONNECT_TIMEOUT,
+    OPENAI_DEADLINE,
+    OPENAI_MAX_RETRIES,
+    OPENAI_MAX_CONNECTIONS,
+    OPENAI_MAX_KEEPALIVE,
+    OPENAI_KEEPALIVE_EXPIRY,
+    LLM_HEDGE,
+    LLM_HEDGE_PERCENTILE,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_LATENCY_WINDOW,
+)
+from metrics import LLM_EVENTS, LLM_TOKENS
+
+# 재시도할 가치가 있는 일시적 오류
+RETRYABLE_ERRORS = (APIConnectionError, APITimeoutError, InternalServerError, RateLimitError)
+
+# 워커 전체가 공유하는 keep-alive 커넥션 풀
+http_client = httpx.AsyncClient(
+    limits=httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+    ),
+    timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+)
+
+# 재시도는 아래 chat_completion 에서 직접 제어하므로 SDK 재시도는 끈다
+client = AsyncOpenAI(
+    api_key=os.getenv('OPENAI_API_KEY'),
+    base_url=OPENAI_BASE_URL,
+    http_client=http_client,
+    max_retries=0,
+)
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """지수 백오프 + full jitter"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+async def _create_with_retries(max_retries: int, **kwargs):
+    for attempt in range(max_retries + 1):
+        try:
+            return await client.chat.completions.create(**kwargs)
+        except RETRYABLE_ERRORS:
+            if attempt == max_retries:
+                raise
+            await asyncio.sleep(backoff_delay(attempt))
+
+
+class LatencyWindow:
+    """최근 window 개 호출의 지연 시간(초). 헤지 지연을 백분위로 정할 때 사용"""
+
+    def __init__(self, window: int = LLM_LATENCY_WINDOW, min_samples: int = LLM_HEDGE_MIN_SAMPLES):
+        self.samples = deque(maxlen=max(1, window))
+        self.min_samples = min_samples
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, percent: float):
+        """샘플이 min_samples 개 미만이면 None"""
+        if len(self.samples) < max(1, self.min_samples):
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+llm_latency = LatencyWindow()
+
+
+def record_usage(response):
+    """응답의 usage(프롬프트 / 생성 / 캐시된 프롬프트 토큰 수)를 지표에 누적"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    LLM_TOKENS.inc(usage.prompt_tokens or 0, kind="prompt")
+    LLM_TOKENS.inc(usage.completion_tokens or 0, kind="completion")
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) if details is not None else None
+    if cached:
+        LLM_TOKENS.inc(cached, kind="cached_prompt")
+
+
+async def _timed_create(max_retries: int, record_latency: bool = True, **kwargs):
+    """
+    record_latency 면 호출 지연 시간을 llm_latency 에 기록한다.
+    헤지에서 지거나 deadline 으로 취소된 호출도 취소 시점까지의 경과 시간을 하한값으로 기록해
+    느린 꼬리가 백분위에서 빠지지 않게 한다.
+    """
+    start = time.monotonic()
+    try:
+        response = await _create_with_retries(max_retries, **kwargs)
+    except asyncio.CancelledError:
+        if record_latency:
+            llm_latency.add(time.monotonic() - start)
+        raise
+    if record_latency:
+        llm_latency.add(time.monotonic() - start)
+    record_usage(response)
+    return response
+
+
+async def _hedged_create(hedge_delay: float, max_retries: int, **kwargs):
+    """
+    첫 요청이 hedge_delay 초 안에 끝나지 않으면 같은 요청을 하나 더 보내고 먼저 성공한 응답을 사용.
+    남은 요청은 취소한다.
+    지연 시간은 첫 요청 기준으로만 기록한다 (첫 요청이 지면 취소될 때까지의 경과 시간).
+    헤지 요청은 hedge_delay 뒤에 출발해 더 짧게 보이므로 기록하지 않는다.
+    """
+    first = asyncio.ensure_future(_timed_create(max_retries, **kwargs))
+    pending = {first}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+        if not done:
+            LLM_EVENTS.inc(event="hedge_sent")
+            pending.add(asyncio.ensure_future(_timed_create(max_retries, record_latency=False, **kwargs)))
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not first:
+                        LLM_EVENTS.inc(event="hedge_won")
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def chat_completion(deadline: float = OPENAI_DEADLINE, max_retries: int = OPENAI_MAX_RETRIES,
+                          hedge: bool = LLM_HEDGE, **kwargs):
+    """
+    chat.completions.create 를 비동기로 호출한다.
+    일시적 오류는 최대 max_retries 번 지터를 섞어 재시도하고,
+    재시도를 포함한 전체 호출은 deadline 초 안에 끝나야 한다.
+    hedge 가 켜져 있고 지연 샘플이 충분하면 느린 요청에 헤지 요청을 추가로 보낸다.
+    """
+    hedge_delay = llm_latency.percentile(LLM_HEDGE_PERCENTILE) if hedge else None
+    if hedge_delay is None:
+        call = _timed_create(max_retries, **kwargs)
+    else:
+        call = _hedged_create(hedge_delay, max_retries, **kwargs)
+    return await asyncio.wait_for(call, timeout=deadline)
+
+
+async def chat_completion_stream(deadline: float = OPENAI_DEADLINE, max_retries: int = OPENAI_MAX_RETRIES, **kwargs):
+    """
+    스트리밍 호출: 응답 토큰(텍스트 조각)을 도착하는 대로 yield 한다.
+    재시도는 스트림이 열리기 전까지만 하고, 마지막 토큰까지 전체가 deadline 초 안에 끝나야 한다.
+    """
+    loop = asyncio.get_running_loop()
+    end_time = loop.time() + deadline
+    stream = await asyncio.wait_for(
+        _create_with_retries(max_retries, stream=True, **kwargs), timeout=deadline
+    )
+    try:
+        chunks = stream.__aiter__()
+        while True:
+            remaining = end_time - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), timeout=remaining)
+            except StopAsyncIteration:
+                break
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        await stream.close()
+
+
+async def close_client():
+    await client.close()
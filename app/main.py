@@ -1,13 +1,64 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from api import router  
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from api import router, batchers, process_job
+from cache import result_cache, feature_cache
+from config import MODEL_PRELOAD, PROFILE_MAX_SECONDS, PROFILE_INTERVAL_MS
+from inference import executors, shutdown_executors
+from llm_client import close_client
+from models.model_manager import model_manager
+from persistence import result_writer
+from jobs import job_queue, job_workers
+from metrics import (
+    HTTP_SECONDS,
+    request_timings,
+    server_timing_header,
+    gauge_lines,
+    register_collector,
+    render_metrics,
+    record_error,
+)
+from profiling import verify_admin, sampling_lock, sample_stacks, collapsed_stacks, flamegraph_svg
 import sys
 import os
 
 # 현재 디렉터리의 상위 디렉터리를 PYTHONPATH에 추가
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-app = FastAPI()
+async def preload_models():
+    """
+    각 모델을 해당 추론 스레드에서 로드/워밍업한다.
+    서버는 로딩이 끝나기 전에도 / 요청에 응답할 수 있다.
+    """
+    results = await asyncio.gather(
+        *(executor.run(model_manager.get, model_type) for model_type, executor in executors.items()),
+        return_exceptions=True,
+    )
+    for model_type, result in zip(executors, results):
+        if isinstance(result, Exception):
+            print(f"Model load error ({model_type}): {str(result)}")
+            record_error("model_load")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    preload_task = asyncio.create_task(preload_models()) if MODEL_PRELOAD else None
+    result_writer.start()
+    job_workers.start(process_job)
+    yield
+    if preload_task is not None:
+        preload_task.cancel()
+    # 처리 중인 작업은 대기열에 반납
+    await job_workers.stop()
+    # 대기 중인 결과를 DB 에 모두 기록한 뒤 종료
+    await result_writer.stop()
+    # 종료 시 추론 스레드 풀 / OpenAI 커넥션 풀 정리
+    shutdown_executors()
+    await close_client()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS 미들웨어 설정
 # 프론트엔드(localhost:5174)에서의 API 요청 허용
@@ -19,14 +70,114 @@ app.add_middleware(
     allow_headers=["*"],                     # 모든 HTTP 헤더 허용
 )
 
-# temp 디렉토리가 없으면 생성
-if not os.path.exists("temp"):
-    os.makedirs("temp")
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    """
+    요청마다 단계별 타이머를 모아 Server-Timing 헤더로 돌려주고 요청 지연 히스토그램에 기록.
+    스트리밍 응답은 헤더가 먼저 나가므로 첫 바이트 전까지의 단계만 포함된다.
+    """
+    timings = {}
+    token = request_timings.set(timings)
+    start = time.perf_counter()
+    # 본문을 받기 전 요청 도착 시각 (/detect 의 지연 예산 기준)
+    request.state.arrived = time.monotonic()
+    try:
+        response = await call_next(request)
+    finally:
+        request_timings.reset(token)
+    elapsed = time.perf_counter() - start
+    route = request.scope.get("route")
+    HTTP_SECONDS.observe(
+        elapsed,
+        method=request.method,
+        route=getattr(route, "path", "unmatched"),
+        status=str(response.status_code),
+    )
+    response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    return response
+
+@register_collector
+def runtime_metrics() -> list:
+    """대기열 깊이 / 캐시 hit·miss / 모델 로드 상태 (scrape 시점 값)"""
+    lines = []
+    lines += gauge_lines("htp_inference_pending", "Inference jobs running or queued per model",
+                         [({"model": name}, executor.pending) for name, executor in executors.items()])
+    lines += gauge_lines("htp_inference_capacity", "Inference slots (workers + queue) per model",
+                         [({"model": name}, executor.capacity) for name, executor in executors.items()])
+    lines += gauge_lines("htp_batcher_pending", "Requests waiting to be micro-batched per model",
+                         [({"model": name}, batcher.pending) for name, batcher in batchers.items()])
+    lines += gauge_lines("htp_db_write_pending", "Results waiting in the write-behind queue",
+                         [({}, result_writer.pending)])
+    lines += gauge_lines("htp_db_write_dropped_total", "Results dropped because the write-behind queue was full",
+                         [({}, result_writer.dropped)], kind="counter")
+    caches = {"result": result_cache.memory, "feature": feature_cache}
+    lines += gauge_lines("htp_cache_hits_total", "Cache hits",
+                         [({"cache": name}, cache.hits) for name, cache in caches.items()], kind="counter")
+    lines += gauge_lines("htp_cache_misses_total", "Cache misses",
+                         [({"cache": name}, cache.misses) for name, cache in caches.items()], kind="counter")
+    lines += gauge_lines("htp_cache_entries", "Entries in the in-memory caches",
+                         [({"cache": name}, len(cache)) for name, cache in caches.items()])
+    lines += gauge_lines("htp_jobs", "Jobs in the durable job queue by status",
+                         [({"status": status}, count) for status, count in job_queue.counts().items()])
+    lines += gauge_lines("htp_job_workers_busy", "Job workers in this process currently processing a job",
+                         [({}, job_workers.running)])
+    status = model_manager.status()
+    lines += gauge_lines("htp_model_ready", "1 if the model is loaded and warmed up",
+                         [({"model": name, "state": info["state"], "backend": info["backend"] or ""},
+                           int(info["state"] == "ready")) for name, info in status.items()])
+    lines += gauge_lines("htp_model_load_seconds", "Model load and warm-up time",
+                         [({"model": name}, info["load_time"]) for name, info in status.items()
+                          if info["load_time"] is not None])
+    return lines
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 형식 지표 (단계별 지연 히스토그램, 대기열 깊이, 캐시, 모델 상태)"""
+    # 수집기 중 DB 를 조회하는 것(작업 대기열 상태별 개수)이 있어 이벤트 루프 밖에서 렌더링
+    text = await asyncio.to_thread(render_metrics)
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+@app.get("/admin/profile")
+async def profile_worker(
+    seconds: float = Query(10.0, gt=0),
+    format: str = Query("svg", pattern="^(svg|collapsed)$"),
+    interval_ms: float = Query(PROFILE_INTERVAL_MS, ge=1, le=1000),
+    idle: bool = False,
+    x_admin_token: str = Header(None),
+):
+    """
+    이 워커 프로세스의 모든 스레드를 seconds 초 동안 샘플링해 flame graph(SVG) 또는 collapsed 스택으로 반환.
+    ADMIN_TOKEN 과 같은 X-Admin-Token 헤더가 필요하고, 한 번에 하나의 프로파일만 실행된다.
+    """
+    if not verify_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+    if seconds > PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be <= {PROFILE_MAX_SECONDS}")
+    if not sampling_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="Another profile is already running")
+    try:
+        counts = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000, idle)
+    finally:
+        sampling_lock.release()
+
+    filename = f"profile-{os.getpid()}-{int(time.time())}"
+    if format == "collapsed":
+        return PlainTextResponse(collapsed_stacks(counts),
+                                 headers={"Content-Disposition": f'attachment; filename="{filename}.txt"'})
+    title = f"pid {os.getpid()} · {seconds:g}s @ {interval_ms:g}ms"
+    return Response(flamegraph_svg(counts, title), media_type="image/svg+xml",
+                    headers={"Content-Disposition": f'inline; filename="{filename}.svg"'})
 
 @app.get("/")
 async def root():
     return {"status": "ok", "message": "Server is running"}
 
+@app.get("/ready")
+async def ready():
+    """모델별 로드 상태와 로드 시간을 보고. 모든 모델이 준비되어야 200"""
+    content = {"ready": model_manager.is_ready(), "models": model_manager.status()}
+    return JSONResponse(content=content, status_code=200 if content["ready"] else 503)
+
 # API 라우터 추가
 app.include_router(router, prefix="/api")
 
@@ -0,0 +1,181 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# 요청 단위 단계별 소요 시간 (초). 미들웨어가 요청마다 새 dict 를 넣는다
+request_timings = ContextVar("request_timings", default=None)
+
+# 초 단위 히스토그램 버킷 (5ms ~ 60s)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Prometheus counter (레이블 조합별 누적 값)"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Prometheus histogram (고정 버킷, 레이블 조합별 누적 카운트 / 합계)"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        for key, counts, total, count in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+def gauge_lines(name: str, documentation: str, samples: list, kind: str = "gauge") -> list:
+    """
+    scrape 시점에 계산하는 값. samples: [(레이블 dict, 값), ...]
+    다른 객체가 이미 세고 있는 누적 값(캐시 hit 수 등)은 kind="counter" 로 내보낸다.
+    """
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return lines
+
+
+STAGE_SECONDS = Histogram(
+    "htp_stage_duration_seconds",
+    "Time spent in each processing stage (read, spill, preprocess, inference, analyze, llm, db_read, db_write, job)",
+    ("stage",),
+)
+HTTP_SECONDS = Histogram(
+    "htp_http_request_duration_seconds",
+    "HTTP request latency until response headers",
+    ("method", "route", "status"),
+)
+ERRORS = Counter("htp_errors_total", "Errors by processing stage", ("stage",))
+LLM_EVENTS = Counter(
+    "htp_llm_events_total",
+    "Latency budget fallbacks, background interpretations and hedged LLM requests",
+    ("event",),
+)
+
+LLM_TOKENS = Counter(
+    "htp_llm_tokens_total",
+    "Tokens reported by the LLM API (prompt, completion, cached_prompt)",
+    ("kind",),
+)
+
+_metrics = [STAGE_SECONDS, HTTP_SECONDS, ERRORS, LLM_EVENTS, LLM_TOKENS]
+_collectors = []
+
+
+def register_metric(metric):
+    """다른 모듈에서 정의한 Counter / Histogram 을 /metrics 출력에 추가"""
+    _metrics.append(metric)
+    return metric
+
+
+def register_collector(collector):
+    """scrape 할 때마다 호출되어 gauge 줄 목록을 돌려주는 함수 등록"""
+    _collectors.append(collector)
+    return collector
+
+
+@contextmanager
+def stage(name: str):
+    """
+    with stage("inference"): ... 구간을 monotonic 타이머로 재서
+    히스토그램에 기록하고, 요청 컨텍스트가 있으면 Server-Timing 용으로도 누적한다.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        timings = request_timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+
+def record_error(stage_name: str):
+    ERRORS.inc(stage=stage_name)
+
+
+def server_timing_header(timings: dict, total: float) -> str:
+    """{단계: 초} → "read;dur=1.2, inference;dur=35.0, total;dur=40.1" (ms)"""
+    parts = [f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in timings.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        try:
+            lines.extend(collector())
+        except Exception as e:
+            print(f"Metrics collector error: {str(e)}")
+    return "\n".join(lines) + "\n"
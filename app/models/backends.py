@@ -0,0 +1,251 @@
+"""
+CPU 추론 백엔드 선택 / 내보내기 / 정확도 비교.
+
+학습된 .pt 가중치를 ONNX 또는 OpenVINO 형식으로 내보내고(선택적으로 INT8 양자화),
+ModelManager 가 INFERENCE_BACKEND 설정에 맞는 파일을 찾아 로드한다.
+내보낸 파일이 없으면 torch(.pt) 로 대체한다.
+onnx 백엔드는 onnxruntime, openvino 백엔드는 openvino 패키지가 추가로 필요하다.
+
+사용 예:
+    python -m models.backends export --backend openvino --int8 --calibration calib_images/
+    python -m models.backends compare --backend openvino --int8 --images sample_images/
+"""
+import argparse
+import glob
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from config import MODEL_PATHS, MODEL_INPUT_SIZE, INFERENCE_BACKEND, INFERENCE_INT8
+
+BACKENDS = ("torch", "onnx", "openvino")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+
+
+def exported_path(pt_path: str, backend: str, int8: bool = False) -> str:
+    """
+    .pt 경로에 대응하는 내보낸 모델 경로 (ultralytics export 의 파일명 규칙을 따른다).
+    onnx: house_model.onnx / house_model_int8.onnx
+    openvino: house_model_openvino_model/ / house_model_int8_openvino_model/
+    """
+    if backend == "torch":
+        return pt_path
+    stem = os.path.splitext(pt_path)[0]
+    suffix = "_int8" if int8 else ""
+    if backend == "onnx":
+        return f"{stem}{suffix}.onnx"
+    if backend == "openvino":
+        return f"{stem}{suffix}_openvino_model"
+    raise ValueError(f"Unknown inference backend: {backend}")
+
+
+def resolve_model_path(pt_path: str, backend: str = INFERENCE_BACKEND, int8: bool = INFERENCE_INT8):
+    """
+    설정된 백엔드의 모델 경로를 찾는다. 내보낸 파일이 없으면 (.pt 경로, "torch") 로 대체.
+    반환값: (경로, 실제 사용할 백엔드)
+    """
+    if backend not in BACKENDS:
+        print(f"Unknown inference backend '{backend}', falling back to torch")
+        return pt_path, "torch"
+    path = exported_path(pt_path, backend, int8)
+    if backend != "torch" and not os.path.exists(path):
+        return pt_path, "torch"
+    return path, backend
+
+
+def weights_file(path: str) -> str:
+    """버전 계산용 실제 가중치 파일 (OpenVINO 는 디렉터리 안의 .xml)"""
+    if os.path.isdir(path):
+        xml_files = glob.glob(os.path.join(path, "*.xml"))
+        if xml_files:
+            return xml_files[0]
+    return path
+
+
+def list_images(directory: str, limit: int = None) -> list:
+    paths = sorted(
+        path for path in glob.glob(os.path.join(directory, "**", "*"), recursive=True)
+        if path.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    return paths[:limit] if limit else paths
+
+
+def preprocess_for_onnx(image_path: str, size: int = MODEL_INPUT_SIZE) -> np.ndarray:
+    """ONNX 캘리브레이션 입력: letterbox → RGB → 1×3×H×W float32 (0~1)"""
+    import cv2
+    from image_utils import letterbox
+
+    padded, _, _ = letterbox(cv2.imread(image_path), size)
+    rgb = np.ascontiguousarray(padded[..., ::-1].transpose(2, 0, 1), dtype=np.float32) / 255
+    return rgb[None]
+
+
+def quantize_onnx(src: str, dst: str, calibration_images: list):
+    """
+    ONNX Runtime 으로 INT8 양자화.
+    캘리브레이션 이미지가 있으면 정적(static) 양자화, 없으면 가중치만 동적(dynamic) 양자화한다.
+    """
+    from onnxruntime.quantization import CalibrationDataReader, QuantType, quantize_dynamic, quantize_static
+
+    if not calibration_images:
+        quantize_dynamic(src, dst, weight_type=QuantType.QInt8)
+        return dst
+
+    import onnxruntime
+
+    input_name = onnxruntime.InferenceSession(src, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+
+    class ImageReader(CalibrationDataReader):
+        def __init__(self):
+            self._images = iter(calibration_images)
+
+        def get_next(self):
+            path = next(self._images, None)
+            return None if path is None else {input_name: preprocess_for_onnx(path)}
+
+    quantize_static(src, dst, ImageReader(), activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    return dst
+
+
+def calibration_yaml(directory: str, names: dict) -> str:
+    """OpenVINO INT8 내보내기용 임시 데이터셋 yaml (이미지 디렉터리를 train/val 로 사용)"""
+    handle, path = tempfile.mkstemp(suffix=".yaml")
+    with os.fdopen(handle, "w") as f:
+        json.dump({"path": os.path.abspath(directory), "train": ".", "val": ".", "names": names}, f)
+    return path
+
+
+def export_model(pt_path: str, backend: str, int8: bool = False, calibration: str = None,
+                 imgsz: int = MODEL_INPUT_SIZE) -> str:
+    """
+    .pt 모델을 지정한 백엔드 형식으로 내보내고 결과 경로를 반환.
+    마이크로 배칭을 위해 배치 차원은 동적으로 내보낸다.
+    """
+    from ultralytics import YOLO
+
+    model = YOLO(pt_path)
+    target = exported_path(pt_path, backend, int8)
+    if backend == "onnx":
+        onnx_path = model.export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+        if not int8:
+            return onnx_path
+        images = list_images(calibration, limit=300) if calibration else []
+        return quantize_onnx(onnx_path, target, images)
+    if backend == "openvino":
+        data = calibration_yaml(calibration, model.names) if int8 and calibration else None
+        try:
+            kwargs = {"int8": int8, "data": data} if data else {"int8": int8}
+            return model.export(format="openvino", imgsz=imgsz, dynamic=True, **kwargs)
+        finally:
+            if data:
+                os.remove(data)
+    raise ValueError(f"Cannot export to backend: {backend}")
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """[x1, y1, x2, y2] N×4, M×4 → N×M IoU"""
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:4], b[None, :, 2:4])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:4] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:4] - b[:, :2], axis=1)
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def match_boxes(reference: np.ndarray, candidate: np.ndarray, iou_threshold: float = 0.5):
+    """
+    같은 클래스끼리 IoU 가 큰 순서로 1:1 매칭.
+    반환값: [(IoU, 신뢰도 차이), ...]
+    """
+    matches = []
+    for class_id in np.unique(reference[:, 5]) if len(reference) else []:
+        ref = reference[reference[:, 5] == class_id]
+        cand = candidate[candidate[:, 5] == class_id]
+        if not len(cand):
+            continue
+        iou = box_iou(ref, cand)
+        while iou.size and iou.max() >= iou_threshold:
+            i, j = np.unravel_index(np.argmax(iou), iou.shape)
+            matches.append((float(iou[i, j]), float(abs(ref[i, 4] - cand[j, 4]))))
+            iou[i, :] = -1
+            iou[:, j] = -1
+    return matches
+
+
+def compare_backends(pt_path: str, images: list, backend: str, int8: bool = False,
+                     iou_threshold: float = 0.5) -> dict:
+    """
+    torch(.pt) 출력을 기준으로 내보낸 모델의 정확도와 지연 시간을 비교.
+    recall: torch 박스 중 매칭된 비율, precision: 내보낸 모델 박스 중 매칭된 비율
+    """
+    import cv2
+    from ultralytics import YOLO
+
+    path = exported_path(pt_path, backend, int8)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Exported model not found: {path}")
+    reference_model = YOLO(pt_path)
+    candidate_model = YOLO(path, task="detect")
+
+    reference_total = candidate_total = 0
+    matches, reference_ms, candidate_ms = [], [], []
+    for image_path in images:
+        image = cv2.imread(image_path)
+        if image is None:
+            continue
+        outputs = []
+        for model, timings in ((reference_model, reference_ms), (candidate_model, candidate_ms)):
+            start = time.perf_counter()
+            result = model(image, verbose=False)[0]
+            timings.append((time.perf_counter() - start) * 1000)
+            outputs.append(result.boxes.data.cpu().numpy().reshape(-1, 6))
+        reference, candidate = outputs
+        reference_total += len(reference)
+        candidate_total += len(candidate)
+        matches.extend(match_boxes(reference, candidate, iou_threshold))
+
+    # 첫 호출은 워밍업 비용이 섞이므로 제외
+    reference_ms, candidate_ms = reference_ms[1:] or reference_ms, candidate_ms[1:] or candidate_ms
+    return {
+        "backend": backend,
+        "int8": int8,
+        "path": path,
+        "images": len(images),
+        "recall": len(matches) / reference_total if reference_total else None,
+        "precision": len(matches) / candidate_total if candidate_total else None,
+        "mean_iou": float(np.mean([iou for iou, _ in matches])) if matches else None,
+        "mean_conf_delta": float(np.mean([delta for _, delta in matches])) if matches else None,
+        "torch_ms_p50": float(np.median(reference_ms)) if reference_ms else None,
+        "backend_ms_p50": float(np.median(candidate_ms)) if candidate_ms else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export HTP models and compare backends")
+    parser.add_argument("command", choices=("export", "compare"))
+    parser.add_argument("--backend", choices=BACKENDS[1:], default="onnx")
+    parser.add_argument("--int8", action="store_true")
+    parser.add_argument("--types", nargs="+", default=list(MODEL_PATHS), choices=list(MODEL_PATHS))
+    parser.add_argument("--calibration", help="INT8 캘리브레이션 이미지 디렉터리")
+    parser.add_argument("--images", help="비교에 사용할 이미지 디렉터리")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--iou", type=float, default=0.5)
+    args = parser.parse_args()
+
+    for model_type in args.types:
+        pt_path = MODEL_PATHS[model_type]
+        if args.command == "export":
+            print(f"{model_type}: {export_model(pt_path, args.backend, args.int8, args.calibration)}")
+        else:
+            if not args.images:
+                parser.error("compare requires --images")
+            report = compare_backends(pt_path, list_images(args.images, args.limit), args.backend,
+                                      args.int8, args.iou)
+            print(json.dumps({model_type: report}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import numpy as np
+
+from models.spatial import SpatialIndex
+
+_EMPTY = np.empty(0, dtype=np.intp)
+
+
+class BoundingBoxSet:
+    """
+    한 그림의 바운딩박스를 열(column) 단위 NumPy 배열로 보관하는 구조.
+    x, y, w, h, conf, cls 배열과 클래스 id → 인덱스 맵을 한 번에 만들어 두고,
+    레이블별 개수 / 면적 / 중심 좌표를 리스트 재탐색 없이 벡터 연산으로 구한다.
+    같은 클래스 안에서는 원래 탐지 순서를 유지한다 (first() 는 가장 먼저 나온 박스).
+    image_size 는 좌표 기준이 되는 원본 이미지 (너비, 높이) 로, 모르면 None.
+    응답 / 분석 문자열용 dict 리스트(to_dicts)는 처음 요청할 때 한 번만 만든다.
+    """
+
+    __slots__ = (
+        "x", "y", "w", "h", "conf", "cls", "labels", "image_size", "_label_to_cls", "_index", "_spatial", "_dicts",
+    )
+
+    def __init__(self, x, y, w, h, conf, cls, label_map: dict, image_size: tuple = None):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.w = np.asarray(w, dtype=np.float64)
+        self.h = np.asarray(h, dtype=np.float64)
+        self.conf = np.asarray(conf, dtype=np.float64)
+        self.cls = np.asarray(cls, dtype=np.int64)
+        self.labels = label_map
+        self.image_size = image_size
+        self._label_to_cls = {label: class_id for class_id, label in label_map.items()}
+
+        # 클래스 id → 인덱스 리스트 (한 번 훑어 전체 그룹화, 그림당 박스 수백 개까지는 정렬보다 빠르다)
+        self._index = {}
+        for i, class_id in enumerate(self.cls.tolist()):
+            self._index.setdefault(class_id, []).append(i)
+        self._spatial = None
+        self._dicts = None
+
+    @classmethod
+    def from_yolo(cls, data, label_map: dict, scale: float = 1.0, image_size: tuple = None) -> "BoundingBoxSet":
+        """
+        YOLO boxes.data ([x1, y1, x2, y2, confidence, class_id] N×6, 텐서/배열/리스트) 로부터 생성.
+        축소된 이미지로 추론했다면 scale 을 곱해 원본 좌표로 되돌린다.
+        """
+        if hasattr(data, "cpu"):
+            data = data.cpu().numpy()
+        arr = np.asarray(data, dtype=np.float64).reshape(-1, 6)
+        coords = arr[:, :4] * scale if scale != 1.0 else arr[:, :4]
+        return cls(
+            coords[:, 0], coords[:, 1], coords[:, 2] - coords[:, 0], coords[:, 3] - coords[:, 1],
+            arr[:, 4], arr[:, 5], label_map, image_size,
+        )
+
+    @classmethod
+    def from_prepared(cls, data, label_map: dict, image) -> "BoundingBoxSet":
+        """image_utils.PreparedImage 로 추론한 결과를 원본 좌표 / 크기로 변환"""
+        return cls.from_yolo(data, label_map, image.scale, image.size)
+
+    @classmethod
+    def from_dicts(cls, bboxes: list, image_size: tuple = None) -> "BoundingBoxSet":
+        """{label, x, y, w, h[, confidence]} dict 리스트로부터 생성. 클래스 id 는 레이블 등장 순서로 부여"""
+        label_to_cls = {}
+        class_ids = [label_to_cls.setdefault(bbox.get("label"), len(label_to_cls)) for bbox in bboxes]
+        return cls(
+            [bbox.get("x", 0) for bbox in bboxes],
+            [bbox.get("y", 0) for bbox in bboxes],
+            [bbox.get("w", 0) for bbox in bboxes],
+            [bbox.get("h", 0) for bbox in bboxes],
+            [bbox.get("confidence", 0) for bbox in bboxes],
+            class_ids,
+            {class_id: label for label, class_id in label_to_cls.items()},
+            image_size,
+        )
+
+    @classmethod
+    def coerce(cls, bboxes) -> "BoundingBoxSet":
+        """이미 BoundingBoxSet 이면 그대로, dict 리스트면 변환"""
+        return bboxes if isinstance(bboxes, cls) else cls.from_dicts(bboxes)
+
+    def __len__(self):
+        return len(self.cls)
+
+    def rows(self, label) -> list:
+        """해당 레이블 박스들의 인덱스 리스트 (탐지 순서, 스칼라 계산용)"""
+        return self._index.get(self._label_to_cls.get(label), [])
+
+    def indices(self, label) -> np.ndarray:
+        """해당 레이블 박스들의 인덱스 배열 (탐지 순서)"""
+        rows = self.rows(label)
+        return np.array(rows, dtype=np.intp) if rows else _EMPTY
+
+    def count(self, label) -> int:
+        return len(self.rows(label))
+
+    def first(self, label):
+        """해당 레이블의 첫 박스 인덱스. 없으면 None"""
+        rows = self.rows(label)
+        return rows[0] if rows else None
+
+    def areas(self, label=None) -> np.ndarray:
+        if label is None:
+            return self.w * self.h
+        idx = self.indices(label)
+        return self.w[idx] * self.h[idx]
+
+    def centers(self, label=None):
+        """(center_x 배열, center_y 배열)"""
+        if label is None:
+            return self.x + self.w / 2, self.y + self.h / 2
+        idx = self.indices(label)
+        return self.x[idx] + self.w[idx] / 2, self.y[idx] + self.h[idx] / 2
+
+    def spatial(self):
+        """포함 / 겹침 / 위아래 / 최근접 질의용 격자 색인 (처음 호출할 때 한 번만 만든다)"""
+        if self._spatial is None:
+            self._spatial = SpatialIndex(self)
+        return self._spatial
+
+    def label_names(self) -> list:
+        return [self.labels[class_id] for class_id in self.cls.tolist()]
+
+    def to_dicts(self) -> list:
+        """
+        API 응답용 {label, x, y, w, h} dict 리스트.
+        응답, 분석기의 좌표 문자열, 특징 캐시 키가 같은 리스트를 쓰므로 처음 한 번만 만든다 (수정하지 말 것).
+        """
+        if self._dicts is None:
+            self._dicts = [
+                {"label": label, "x": x, "y": y, "w": w, "h": h}
+                for label, x, y, w, h in zip(
+                    self.label_names(), self.x.tolist(), self.y.tolist(), self.w.tolist(), self.h.tolist()
+                )
+            ]
+        return self._dicts
+
+    def columns(self) -> tuple:
+        """통계 테이블 기록용 (class_id, label, x, y, w, h, confidence) 열 리스트"""
+        return (
+            self.cls.tolist(), self.label_names(), self.x.tolist(), self.y.tolist(),
+            self.w.tolist(), self.h.tolist(), self.conf.tolist(),
+        )
@@ -1,8 +1,12 @@
-import json
+from models.bbox_set import BoundingBoxSet
+from models.rule_engine import load_rules
 
 # JSON 파일 경로 
 json_file_path = "data/house_info.json"
 
+# 비율 / 위치 판정 규칙 (JSON 에서 읽어 임계값 테이블로 컴파일)
+rules = load_rules(json_file_path)
+
 # 한글 레이블을 영어로 매핑
 label_mapping = {
     "집전체": "house_whole",
@@ -26,7 +30,7 @@ def check_label_existence(bboxes, label):
     """
     Check the existence of a specific label and return a message and count.
     """
-    cnt = sum(1 for bbox in bboxes if bbox.get("label") == label)
+    cnt = BoundingBoxSet.coerce(bboxes).count(label)
     eng_label = label_mapping.get(label, label) 
     return (f"There are {cnt} '{eng_label}' objects." if cnt > 0 else f"No '{eng_label}' found."), cnt
 
@@ -35,78 +39,28 @@ def get_area_of_label(bboxes, label):
     Returns the area of the first object with the given label.
     Assume only one canopy if label='집벽'.
     """
-    for bbox in bboxes:
-        if bbox.get("label") == label:
-            w = bbox.get("w", 0)
-            h = bbox.get("h", 0)
-            return w * h
-    return 0
+    areas = BoundingBoxSet.coerce(bboxes).areas(label)
+    return areas[0] if len(areas) else 0
 
 def get_areas_of_label(bboxes, label):
     """
     Returns a list of areas for all objects with the given label.
     """
-    areas = []
-    for bbox in bboxes:
-        if bbox.get("label") == label:
-            w = bbox.get("w", 0)
-            h = bbox.get("h", 0)
-            areas.append(w * h)
-    return areas
+    return BoundingBoxSet.coerce(bboxes).areas(label)
 
 def check_and_print_ratio(canopy_area, areas, label_type):
     """
     Compare object areas (column or branch) with the canopy area
     and determine if it's large or small based on thresholds.
+    Thresholds and messages are declared in data/house_info.json.
     """
-    if label_type == "지붕":  # roof
-        large_threshold = 0.923515
-        small_threshold = 0.665191
-        large_str = "Large roof: a tendency to daydream and flee to superficial interpersonal relationships"
-        small_str = "Small roof: a lack of psychological protection, realistic thinking"
-    elif label_type == "창문":  # window
-        large_threshold = 0.073576
-        small_threshold = 0.041115
-        large_str = "Large window: inflated self-esteem, grandiose self"
-        small_str = "Small window: a psychological distancing, shy personality"
-    elif label_type == "문":  # door
-        large_threshold = 0.159336
-        small_threshold = 0.102952
-        large_str = "Large door: a dependent person, a desire for active social contact"
-        small_str = "Small door: reluctance, helplessness and indecision to come into contact with the environment"
-    elif label_type == "연기":  # smoke
-        large_threshold = 0.187033
-        small_threshold = 0.069497
-        large_str = "Large smoke: a lack of home warmth"
-        small_str = "Small smoke: suppression of emotional expression"
-    else:
-        return None
-
-    for area in areas:
-        ratio = area / canopy_area
-        if ratio >= large_threshold:
-            return large_str
-        elif ratio <= small_threshold:
-            return small_str
-    # If not large or small, we do not print anything special
-    return None
+    return rules.ratio_message(label_type, areas, canopy_area)
 
 def check_house_position(bboxes):
     """
     "집전체" 레이블 중심 좌표의 위치를 판단하는 함수
     """
-    for bbox in bboxes:
-        if bbox.get("label") == "집전체":
-            center_y = bbox["y"] + bbox["h"] / 2
-
-            if center_y < 1280 / 3:
-                return "Top position: idealistic and fanciful"
-            elif center_y > 1280 * 2 / 3:
-                return "Bottom position: Realistic, Unstable Sentiment"
-            else:
-                return "Center position: A stable home environment, reflecting the sense of reality"     
-   
-    return "No 'house' label found."
+    return rules.finding(bboxes, "position")
 
 def analyze_canopy(bboxes):
     """
@@ -121,18 +75,23 @@ def analyze_canopy(bboxes):
 def analyze_house(bboxes):
     """집 그림의 모든 특징을 분석"""
     results = []
+    # 박스 배열/레이블 인덱스를 한 번만 만들고 아래 모든 분석에서 재사용
+    bboxes = BoundingBoxSet.coerce(bboxes)
 
-    # 바운딩박스 정보 -> 문자열로 변환
+    # 바운딩박스 정보 -> 문자열로 변환 (응답용 dict 리스트를 그대로 사용)
     bbox_info = []
-    for bbox in bboxes:
+    for bbox in bboxes.to_dicts():
         eng_label = label_mapping.get(bbox['label'], bbox['label'])
         bbox_info.append(f"{eng_label}: [{bbox['x']},{bbox['y']},{bbox['w']},{bbox['h']}]")
     
     results.append(", ".join(bbox_info))
     results.append("")
 
+    # 위치 / 비율 규칙을 한 번에 평가
+    findings = rules.evaluate(bboxes)
+
     # 집의 위치 분석
-    results.append(check_house_position(bboxes))
+    results.append(findings["position"])
     canopy_msg, canopy_area = analyze_canopy(bboxes)
     results.append(canopy_msg)
     
@@ -141,10 +100,14 @@ def analyze_house(bboxes):
         label_msg, exists = check_label_existence(bboxes, feature)
         results.append(label_msg)
         if exists:
-            label_areas = get_areas_of_label(bboxes, feature)
-            ratio_result = check_and_print_ratio(canopy_area, label_areas, feature)
+            ratio_result = findings[label_mapping[feature]]
             if ratio_result:
                 results.append(ratio_result)
+
+    # data/house_info.json 의 위치 관계 규칙 (기본으로 켜진 규칙은 없음)
+    for name in rules.relation_names:
+        if findings[name]:
+            results.append(findings[name])
     
     # 존재 유무만 파악
     for feature in ["길", "잔디", "울타리"]:
@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from config import MODEL_PATHS, MODEL_WARMUP, MODEL_INPUT_SIZE, INFERENCE_BACKEND, INFERENCE_INT8
+from models.backends import resolve_model_path, weights_file
+from metrics import record_error
+
+
+class ModelManager:
+    """
+    config.MODEL_PATHS 에 정의된 YOLO 모델을 필요할 때 한 번만 로드하고
+    더미 입력으로 워밍업한 뒤 캐싱한다.
+    backend 에 해당하는 내보낸 모델(ONNX / OpenVINO)이 있으면 그것을, 없으면 .pt 를 로드한다.
+    모델별 로드 상태와 로드 시간을 기록해 /ready 엔드포인트에서 보고한다.
+    """
+
+    def __init__(self, paths: dict, backend: str = INFERENCE_BACKEND, int8: bool = INFERENCE_INT8):
+        self.paths = dict(paths)
+        self.backend = backend
+        self.int8 = int8
+        self._models = {}
+        self._locks = {model_type: threading.Lock() for model_type in self.paths}
+        self._status = {
+            model_type: {"state": "not_loaded", "path": path, "backend": None, "load_time": None, "error": None}
+            for model_type, path in self.paths.items()
+        }
+
+    def resolve(self, model_type: str):
+        """(실제 로드할 모델 경로, 백엔드)"""
+        return resolve_model_path(self.paths[model_type], self.backend, self.int8)
+
+    def get(self, model_type: str):
+        """
+        모델을 반환한다. 아직 로드되지 않았으면 이 자리에서 로드한다.
+        """
+        model = self._models.get(model_type)
+        if model is not None:
+            return model
+        with self._locks[model_type]:
+            if model_type not in self._models:
+                self._load(model_type)
+        return self._models[model_type]
+
+    def _load(self, model_type: str):
+        status = self._status[model_type]
+        path, backend = self.resolve(model_type)
+        if backend != self.backend:
+            print(f"Exported {self.backend} model for {model_type} not found, falling back to torch")
+        status.update(state="loading", path=path, backend=backend, error=None)
+        start = time.perf_counter()
+        try:
+            # ultralytics(torch) 임포트 비용도 첫 로드 시점으로 미룬다
+            from ultralytics import YOLO
+
+            model = YOLO(path, task="detect")
+            if MODEL_WARMUP:
+                dummy = np.zeros((MODEL_INPUT_SIZE, MODEL_INPUT_SIZE, 3), dtype=np.uint8)
+                model(dummy, verbose=False)
+        except Exception as e:
+            status.update(state="error", error=str(e))
+            record_error("model_load")
+            raise
+        self._models[model_type] = model
+        status.update(state="ready", load_time=round(time.perf_counter() - start, 3))
+
+    def set_model(self, model_type: str, model, backend: str = "custom"):
+        """
+        이미 만들어진 모델 객체를 등록 (벤치마크용 가짜 모델 등).
+        등록된 모델은 YOLO 와 같은 호출 규약을 따라야 한다.
+        """
+        with self._locks[model_type]:
+            self._models[model_type] = model
+            self._status[model_type].update(state="ready", backend=backend, load_time=0.0, error=None)
+
+    def version(self, model_type: str) -> str:
+        """
+        캐시 키 등에 쓰는 모델 버전 문자열.
+        가중치 파일의 이름, 크기, 수정 시각이 바뀌면 버전도 바뀐다.
+        (백엔드를 바꾸면 로드되는 파일이 달라지므로 캐시도 분리된다)
+        """
+        path = self.resolve(model_type)[0]
+        try:
+            stat = os.stat(weights_file(path))
+        except OSError:
+            return os.path.basename(path)
+        return f"{os.path.basename(path)}:{stat.st_size}:{int(stat.st_mtime)}"
+
+    def load_all(self):
+        """모든 모델을 로드한다. 실패한 모델은 상태에 오류를 기록하고 넘어간다."""
+        for model_type in self.paths:
+            try:
+                self.get(model_type)
+            except Exception as e:
+                print(f"Model load error ({model_type}): {str(e)}")
+
+    def is_ready(self) -> bool:
+        return all(status["state"] == "ready" for status in self._status.values())
+
+    def status(self) -> dict:
+        return {model_type: dict(status) for model_type, status in self._status.items()}
+
+
+model_manager = ModelManager(MODEL_PATHS)
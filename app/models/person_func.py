@@ -1,8 +1,12 @@
-import json
+from models.bbox_set import BoundingBoxSet
+from models.rule_engine import load_rules
 
 # JSON 파일 경로 
 json_file_path = "data/person_info.json"
 
+# 비율 / 위치 판정 규칙 (JSON 에서 읽어 임계값 테이블로 컴파일)
+rules = load_rules(json_file_path)
+
 # 한글 레이블을 영어로 매핑
 label_mapping = {
     "사람전체": "person_whole",
@@ -29,116 +33,58 @@ def calculate_head_to_upper_ratio(bboxes):
     """
     Calculate the head-to-upper body ratio and print the result in English.
     """
-    head_area = None
-    upper_body_area = None
-
-    for bbox in bboxes:
-        if bbox.get("label") == "머리":
-            head_area = bbox["w"] * bbox["h"]
-        elif bbox.get("label") == "상체":
-            upper_body_area = bbox["w"] * bbox["h"]
-
-        if head_area is not None and upper_body_area is not None:
-            break
-
-    if head_area is not None and upper_body_area is not None and upper_body_area > 0:
-        ratio = head_area / upper_body_area
-        if ratio > 2.2925420:
-            return "Large head: Intellectual curiosity, lack of physical energy."
-        elif ratio < 1.2819802:
-            return "No head: Neurosis, depression, autistic tendencies."
+    return rules.finding(bboxes, "head")
 
 def calculate_eye_to_face_ratio(bboxes):
     """
     Calculate the eye-to-face ratio and print the result in English.
     """
-    eye_areas = []
-    face_area = None
-
-    for bbox in bboxes:
-        if bbox.get("label") == "눈":
-            eye_areas.append(bbox["w"] * bbox["h"])
-        elif bbox.get("label") == "얼굴":
-            face_area = bbox["w"] * bbox["h"]
-
-        if len(eye_areas) == 2 and face_area is not None:
-            break
-
-    if len(eye_areas) == 2 and face_area is not None and face_area > 0:
-        avg_eye_area = sum(eye_areas) / 2
-        ratio = avg_eye_area / face_area
-        if ratio > 0.0427861542:
-            return "Large eyes: Suspicion of others, hypersensitivity."
-        elif ratio < 0.0221859051:
-            return "No eyes: Guilt feelings."
+    return rules.finding(bboxes, "eye")
 
 def calculate_leg_to_upper_ratio(bboxes):
     """
     Calculate the leg-to-upper body ratio and print the result in English.
     """
-    leg_heights = []
-    upper_body_height = None
-
-    for bbox in bboxes:
-        if bbox.get("label") == "다리":
-            leg_heights.append(bbox["h"])
-        elif bbox.get("label") == "상체":
-            upper_body_height = bbox["h"]
-
-        if len(leg_heights) == 2 and upper_body_height is not None:
-            break
-
-    if len(leg_heights) == 2 and upper_body_height is not None and upper_body_height > 0:
-        avg_leg_height = sum(leg_heights) / 2
-        ratio = avg_leg_height / upper_body_height
-        if ratio > 1.30162008:
-            return "Long legs: Desire for stability and independence."
-        elif ratio < 0.9464469:
-            return "Short legs: Loss of independence, tendency for dependency."
+    return rules.finding(bboxes, "leg")
 
 def check_human_position(bboxes):
     """
     Check the position of the "entire person" label and print the result in English.
     """
-    for bbox in bboxes:
-        if bbox.get("label") == "사람전체":
-            center_x = bbox["x"] + bbox["w"] / 2
-
-            if center_x < 1280 / 3:
-                return "Left position: Obsession with the past, introverted tendencies."
-            elif center_x > 1280 * 2 / 3:
-                return "Right position: Future-oriented attitude, extroverted tendencies."
-            else:
-                return "Center position: Self-centeredness, confidence in interpersonal relationships."
+    return rules.finding(bboxes, "position")
 
 def check_label_existence(bboxes, label):
     """
     Check if a specific label exists and print the result in English.
     """
-    for bbox in bboxes:
-        if bbox.get("label") == label:
-            return  # Nothing is printed if the label exists
+    if BoundingBoxSet.coerce(bboxes).count(label):
+        return  # Nothing is printed if the label exists
 
 def analyze_person(bboxes):
     """사람 그림의 모든 특징을 분석"""
     results = []
+    # 박스 배열/레이블 인덱스를 한 번만 만들고 아래 모든 분석에서 재사용
+    bboxes = BoundingBoxSet.coerce(bboxes)
 
-    # 바운딩박스 정보 -> 문자열로 변환
+    # 바운딩박스 정보 -> 문자열로 변환 (응답용 dict 리스트를 그대로 사용)
     bbox_info = []
-    for bbox in bboxes:
+    for bbox in bboxes.to_dicts():
         eng_label = label_mapping.get(bbox['label'], bbox['label'])
         bbox_info.append(f"{eng_label}: [{bbox['x']},{bbox['y']},{bbox['w']},{bbox['h']}]")
     
     results.append(", ".join(bbox_info))
     results.append("")
 
-    # Call functions
+    # 위치 / 비율 규칙을 한 번에 평가
+    findings = rules.evaluate(bboxes)
     analysis_results = [
-        check_human_position(bboxes),
-        calculate_head_to_upper_ratio(bboxes),
-        calculate_eye_to_face_ratio(bboxes),
-        calculate_leg_to_upper_ratio(bboxes)
+        findings["position"],
+        findings["head"],
+        findings["eye"],
+        findings["leg"]
     ]
+    # data/person_info.json 의 위치 관계 규칙 (기본으로 켜진 규칙은 없음)
+    analysis_results += [findings[name] for name in rules.relation_names]
     
     for result in analysis_results:
         if result is not None:
@@ -1,10 +1,24 @@
-from ultralytics import YOLO
-
-person_model = YOLO("models/person_model.pt")
+from models.model_manager import model_manager
 
 def detect_people(image_path: str) -> list:
     """
     사람 객체 탐지를 수행하고 결과 반환
     """
-    results = person_model(image_path)
-    return results[0].boxes.data.tolist()
\ No newline at end of file
+    results = model_manager.get("person")(image_path)
+    return results[0].boxes.data.tolist()
+
+def detect_people_batch(images: list) -> list:
+    """
+    여러 이미지에 대해 사람 객체 탐지를 한 번의 배치 추론으로 수행하고
+    이미지별 boxes.data 배열(N×6)을 반환
+    """
+    results = model_manager.get("person")(list(images), batch=len(images))
+    return [result.boxes.data.cpu().numpy() for result in results]
+
+def detect_people_tensor(tensor) -> list:
+    """
+    이미 letterbox 된 BCHW 텐서(0~1)로 사람 객체 탐지를 수행하고
+    이미지별 boxes.data 배열(N×6, letterbox 좌표)을 반환
+    """
+    results = model_manager.get("person")(tensor, verbose=False)
+    return [result.boxes.data.cpu().numpy() for result in results]
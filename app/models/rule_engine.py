@@ -0,0 +1,435 @@
+import json
+import os
+
+import numpy as np
+
+from models.bbox_set import BoundingBoxSet
+from models.spatial import RELATIONS, relation_mask
+
+# data/*.json 경로는 app 디렉터리 기준
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEASURES = {"area": 0, "height": 1, "width": 2}
+AXES = {"x": 0, "y": 1}
+
+# 위치 규칙 판정 코드
+POSITION_MISSING, POSITION_LOW, POSITION_MID, POSITION_HIGH = -2, -1, 0, 1
+
+# 관계 규칙 판정 코드 (대상 없음 / 주어 없음 / 불만족 / 만족)
+RELATION_MISSING, RELATION_EMPTY, RELATION_MISS, RELATION_HIT = -2, -1, 0, 1
+
+
+def _first_rows(drawing, rows, n_drawings):
+    """rows(행 번호, 오름차순) 중 그림별 첫 행. 해당 그림에 없으면 -1"""
+    first = np.full(n_drawings, -1, dtype=np.intp)
+    if len(rows):
+        groups, idx = np.unique(drawing[rows], return_index=True)
+        first[groups] = rows[idx]
+    return first
+
+
+def _box_measure(boxes: BoundingBoxSet, kind: int, i: int) -> float:
+    if kind == MEASURES["height"]:
+        return float(boxes.h[i])
+    if kind == MEASURES["width"]:
+        return float(boxes.w[i])
+    return float(boxes.w[i]) * float(boxes.h[i])
+
+
+class BoxTable:
+    """
+    여러 그림의 박스를 하나로 이어 붙인 열 단위 테이블.
+    drawing[i] 는 i 번째 박스가 속한 그림 번호이고, 한 그림의 박스는 연속해서 탐지 순서대로 놓여야 한다.
+    code 는 RuleSet 의 레이블 코드 (규칙에 쓰이지 않는 레이블은 -1).
+    canvas 는 그림별 (너비, 높이) n_drawings × 2 배열로, 위치 규칙의 기준 크기다.
+    """
+
+    __slots__ = ("drawing", "code", "x", "y", "w", "h", "n_drawings", "canvas")
+
+    def __init__(self, drawing, code, x, y, w, h, n_drawings: int, canvas=None):
+        self.drawing = np.asarray(drawing, dtype=np.intp)
+        self.code = np.asarray(code, dtype=np.int64)
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.w = np.asarray(w, dtype=np.float64)
+        self.h = np.asarray(h, dtype=np.float64)
+        self.n_drawings = n_drawings
+        self.canvas = np.asarray(canvas, dtype=np.float64).reshape(n_drawings, 2) if canvas is not None else None
+
+    def measure(self, kind: int) -> np.ndarray:
+        if kind == MEASURES["height"]:
+            return self.h
+        if kind == MEASURES["width"]:
+            return self.w
+        return self.w * self.h
+
+
+class RuleSet:
+    """
+    data/*_info.json 에 선언된 HTP 규칙을 임계값 테이블(NumPy 배열)로 컴파일한 것.
+
+    ratio_rules: numerator / denominator 레이블의 크기 비율이 large 이상이면 large_message,
+                 small 이하이면 small_message (inclusive=false 면 초과/미만).
+                 denominator 는 그림의 첫 번째 박스를 쓰고,
+                 mode="each" 는 numerator 박스를 하나씩 비교해 처음 기준을 벗어나는 박스로,
+                 mode="mean" 은 앞의 count 개 numerator 박스 평균으로 판정한다.
+    position_rules: label 의 첫 박스 중심 좌표(axis)가 캔버스의 low 미만 / high 초과 / 그 사이인지 판정.
+                    캔버스는 박스에 기록된 원본 이미지 크기이고, 모르면 canvas_size 로 가정한다.
+    relation_rules: subjects 레이블 박스가 object 레이블의 첫 박스에 대해 relation(models.spatial.RELATIONS)
+                    을 만족하는지 판정. quantifier="any" 면 하나라도, "all" 이면 모두 만족할 때 hit_message,
+                    아니면 miss_message. subjects 박스가 없으면 empty_message (기본 miss_message),
+                    object 박스가 없으면 missing_message. "enabled": false 인 규칙은 읽지 않는다.
+
+    수천 개 그림(evaluate_batch / evaluate_table)은 규칙마다 한 번의 벡터 연산으로,
+    그림 하나(evaluate / finding)는 같은 규칙을 파이썬 스칼라로 평가한다.
+    """
+
+    def __init__(self, spec: dict):
+        self.canvas_size = float(spec.get("canvas_size", 1280))
+        self._codes = {}
+        ratio_rules = spec.get("ratio_rules", [])
+        position_rules = spec.get("position_rules", [])
+        relation_rules = [rule for rule in spec.get("relation_rules", []) if rule.get("enabled", True)]
+
+        self.ratio_names = [rule["name"] for rule in ratio_rules]
+        self.num_code = np.array([self._code(rule["numerator"]) for rule in ratio_rules], dtype=np.int64)
+        self.den_code = np.array([self._code(rule["denominator"]) for rule in ratio_rules], dtype=np.int64)
+        self.measure = np.array([MEASURES[rule.get("measure", "area")] for rule in ratio_rules], dtype=np.int64)
+        self.mean_mode = np.array([rule.get("mode", "each") == "mean" for rule in ratio_rules], dtype=bool)
+        self.count = np.array([rule.get("count", 1) for rule in ratio_rules], dtype=np.int64)
+        self.inclusive = np.array([rule.get("inclusive", True) for rule in ratio_rules], dtype=bool)
+        self.large = np.array([rule["large"] for rule in ratio_rules], dtype=np.float64)
+        self.small = np.array([rule["small"] for rule in ratio_rules], dtype=np.float64)
+        self.large_messages = [rule["large_message"] for rule in ratio_rules]
+        self.small_messages = [rule["small_message"] for rule in ratio_rules]
+        self._ratio_by_numerator = {rule["numerator"]: i for i, rule in enumerate(ratio_rules)}
+
+        self.position_names = [rule["name"] for rule in position_rules]
+        self.pos_code = np.array([self._code(rule["label"]) for rule in position_rules], dtype=np.int64)
+        self.pos_axis = np.array([AXES[rule.get("axis", "y")] for rule in position_rules], dtype=np.int64)
+        self.pos_low = np.array([rule.get("low", 1 / 3) for rule in position_rules], dtype=np.float64)
+        self.pos_high = np.array([rule.get("high", 2 / 3) for rule in position_rules], dtype=np.float64)
+        self.position_messages = [
+            {
+                POSITION_LOW: rule["low_message"],
+                POSITION_MID: rule["mid_message"],
+                POSITION_HIGH: rule["high_message"],
+                POSITION_MISSING: rule.get("missing_message"),
+            }
+            for rule in position_rules
+        ]
+
+        self.relation_names = [rule["name"] for rule in relation_rules]
+        self.relations = [rule["relation"] for rule in relation_rules]
+        self.relation_subjects = [list(dict.fromkeys(rule["subjects"])) for rule in relation_rules]
+        self.relation_objects = [rule["object"] for rule in relation_rules]
+        for name, subjects, label in zip(self.relation_names, self.relation_subjects, self.relation_objects):
+            if label in subjects:
+                raise ValueError(f"Relation rule '{name}': object must not be one of the subjects")
+        for relation in self.relations:
+            if relation not in RELATIONS:
+                raise ValueError(f"Unknown relation: {relation}")
+        self.subject_codes = [
+            np.array([self._code(label) for label in rule["subjects"]], dtype=np.int64) for rule in relation_rules
+        ]
+        self.object_code = np.array([self._code(rule["object"]) for rule in relation_rules], dtype=np.int64)
+        self.relation_threshold = [rule.get("threshold") for rule in relation_rules]
+        self.relation_all = np.array([rule.get("quantifier", "any") == "all" for rule in relation_rules], dtype=bool)
+        self.relation_messages = [
+            {
+                RELATION_HIT: rule.get("hit_message"),
+                RELATION_MISS: rule.get("miss_message"),
+                RELATION_EMPTY: rule.get("empty_message", rule.get("miss_message")),
+                RELATION_MISSING: rule.get("missing_message"),
+            }
+            for rule in relation_rules
+        ]
+
+        # 그림 하나용 스칼라 경로: 규칙 이름 → (판정 함수, 규칙 번호)
+        self._rules = {}
+        for rule, name in enumerate(self.ratio_names):
+            self._rules[name] = (self._ratio_finding, rule)
+        self._ratio_specs = [
+            (
+                rule["numerator"], rule["denominator"], MEASURES[rule.get("measure", "area")],
+                rule.get("count", 1) if rule.get("mode", "each") == "mean" else 0, rule.get("inclusive", True),
+                float(rule["large"]), float(rule["small"]), rule["large_message"], rule["small_message"],
+            )
+            for rule in ratio_rules
+        ]
+        for rule, name in enumerate(self.position_names):
+            self._rules[name] = (self._position_finding, rule)
+        self._position_specs = [
+            (rule["label"], AXES[rule.get("axis", "y")], float(rule.get("low", 1 / 3)), float(rule.get("high", 2 / 3)))
+            for rule in position_rules
+        ]
+        for rule, name in enumerate(self.relation_names):
+            self._rules[name] = (self._relation_finding, rule)
+
+    @classmethod
+    def from_json(cls, path: str) -> "RuleSet":
+        if not os.path.isabs(path):
+            path = os.path.join(APP_DIR, path)
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _code(self, label) -> int:
+        return self._codes.setdefault(label, len(self._codes))
+
+    def _label_codes(self, boxes: BoundingBoxSet) -> np.ndarray:
+        """BoundingBoxSet 의 클래스 id 를 이 규칙 집합의 레이블 코드로 변환"""
+        class_ids, inverse = np.unique(boxes.cls, return_inverse=True)
+        lut = np.array(
+            [self._codes.get(boxes.labels.get(class_id), -1) for class_id in class_ids.tolist()],
+            dtype=np.int64,
+        )
+        return lut[inverse] if len(lut) else np.empty(0, dtype=np.int64)
+
+    def to_table(self, box_sets: list) -> BoxTable:
+        """여러 그림의 박스(BoundingBoxSet 또는 dict 리스트)를 BoxTable 하나로 합친다"""
+        box_sets = [BoundingBoxSet.coerce(boxes) for boxes in box_sets]
+        sizes = [len(boxes) for boxes in box_sets]
+        if not box_sets:
+            return BoxTable([], [], [], [], [], [], 0)
+        canvas = [boxes.image_size or (self.canvas_size, self.canvas_size) for boxes in box_sets]
+        return BoxTable(
+            np.repeat(np.arange(len(box_sets)), sizes),
+            np.concatenate([self._label_codes(boxes) for boxes in box_sets]),
+            np.concatenate([boxes.x for boxes in box_sets]),
+            np.concatenate([boxes.y for boxes in box_sets]),
+            np.concatenate([boxes.w for boxes in box_sets]),
+            np.concatenate([boxes.h for boxes in box_sets]),
+            len(box_sets),
+            canvas,
+        )
+
+    def _classify(self, ratios, rule, large, small):
+        if self.inclusive[rule]:
+            return ratios >= large, ratios <= small
+        return ratios > large, ratios < small
+
+    def ratio_values(self, table: BoxTable, large=None, small=None) -> np.ndarray:
+        """
+        규칙별 판정 비율 (n_drawings × n_ratio_rules). 판정할 수 없으면 NaN.
+        mode="each" 규칙은 처음 기준을 벗어나는 박스의 비율(없으면 첫 박스의 비율)이다.
+        """
+        large = self.large if large is None else np.asarray(large, dtype=np.float64)
+        small = self.small if small is None else np.asarray(small, dtype=np.float64)
+        n = table.n_drawings
+        values = np.full((n, len(self.ratio_names)), np.nan)
+
+        for rule in range(len(self.ratio_names)):
+            measure = table.measure(self.measure[rule])
+
+            den_first = _first_rows(table.drawing, np.flatnonzero(table.code == self.den_code[rule]), n)
+            denominator = np.full(n, np.nan)
+            has_den = den_first >= 0
+            denominator[has_den] = measure[den_first[has_den]]
+            denominator[denominator <= 0] = np.nan
+
+            rows = np.flatnonzero(table.code == self.num_code[rule])
+            if not len(rows):
+                continue
+            groups = table.drawing[rows]
+
+            if self.mean_mode[rule]:
+                # 그림별 앞의 count 개 박스 평균
+                count = self.count[rule]
+                _, starts, sizes = np.unique(groups, return_index=True, return_counts=True)
+                rank = np.arange(len(rows)) - np.repeat(starts, sizes)
+                take = rank < count
+                sums = np.bincount(groups[take], weights=measure[rows][take], minlength=n)
+                have = np.bincount(groups, minlength=n) >= count
+                numerator = np.where(have, sums / count, np.nan)
+                values[:, rule] = numerator / denominator
+            else:
+                ratios = measure[rows] / denominator[groups]
+                is_large, is_small = self._classify(ratios, rule, large[rule], small[rule])
+                first_any = _first_rows(table.drawing, rows, n)
+                first_out = _first_rows(table.drawing, rows[is_large | is_small], n)
+                chosen = np.where(first_out >= 0, first_out, first_any)
+                has = chosen >= 0
+                values[has, rule] = measure[chosen[has]] / denominator[has]
+        return values
+
+    def ratio_codes(self, values: np.ndarray, large=None, small=None) -> np.ndarray:
+        """비율 행렬을 판정 코드로 변환: 1 = large, -1 = small, 0 = 해당 없음"""
+        large = self.large if large is None else np.asarray(large, dtype=np.float64)
+        small = self.small if small is None else np.asarray(small, dtype=np.float64)
+        with np.errstate(invalid="ignore"):
+            is_large = np.where(self.inclusive, values >= large, values > large)
+            is_small = np.where(self.inclusive, values <= small, values < small)
+        return np.where(is_large, 1, np.where(is_small, -1, 0))
+
+    def position_codes(self, table: BoxTable) -> np.ndarray:
+        """위치 규칙 판정 코드 (n_drawings × n_position_rules)"""
+        n = table.n_drawings
+        codes = np.full((n, len(self.position_names)), POSITION_MISSING, dtype=np.int64)
+        for rule in range(len(self.position_names)):
+            first = _first_rows(table.drawing, np.flatnonzero(table.code == self.pos_code[rule]), n)
+            has = first >= 0
+            rows = first[has]
+            axis = self.pos_axis[rule]
+            if axis == AXES["x"]:
+                center = table.x[rows] + table.w[rows] / 2
+            else:
+                center = table.y[rows] + table.h[rows] / 2
+            size = table.canvas[has, axis] if table.canvas is not None else self.canvas_size
+            codes[has, rule] = np.where(
+                center < size * self.pos_low[rule], POSITION_LOW,
+                np.where(center > size * self.pos_high[rule], POSITION_HIGH, POSITION_MID),
+            )
+        return codes
+
+    def relation_codes(self, table: BoxTable) -> np.ndarray:
+        """
+        관계 규칙 판정 코드 (n_drawings × n_relation_rules).
+        주어 박스마다 같은 그림의 대상 첫 박스를 짝지어 모든 그림을 한 번의 벡터 연산으로 검사한다.
+        """
+        n = table.n_drawings
+        codes = np.full((n, len(self.relation_names)), RELATION_MISSING, dtype=np.int64)
+        for rule in range(len(self.relation_names)):
+            target = _first_rows(table.drawing, np.flatnonzero(table.code == self.object_code[rule]), n)
+            rows = np.flatnonzero(np.isin(table.code, self.subject_codes[rule]))
+            rows = rows[target[table.drawing[rows]] >= 0]
+            groups = table.drawing[rows]
+            objects = target[groups]
+            mask = relation_mask(
+                self.relations[rule],
+                table.x[rows], table.y[rows], table.w[rows], table.h[rows],
+                table.x[objects], table.y[objects], table.w[objects], table.h[objects],
+                self.relation_threshold[rule],
+            )
+            hits = np.bincount(groups[mask], minlength=n)
+            totals = np.bincount(groups, minlength=n)
+            hit = hits == totals if self.relation_all[rule] else hits > 0
+            codes[:, rule] = np.where(
+                target < 0, RELATION_MISSING,
+                np.where(totals == 0, RELATION_EMPTY, np.where(hit, RELATION_HIT, RELATION_MISS)),
+            )
+        return codes
+
+    def _relation_code(self, boxes: BoundingBoxSet, rule: int) -> int:
+        """대상 첫 박스 하나와 주어 박스들만 relation_mask 로 검사 (격자 색인을 만들 필요가 없음)"""
+        target = boxes.first(self.relation_objects[rule])
+        if target is None:
+            return RELATION_MISSING
+        rows = [i for subject in self.relation_subjects[rule] for i in boxes.rows(subject)]
+        if not rows:
+            return RELATION_EMPTY
+        mask = relation_mask(
+            self.relations[rule],
+            boxes.x[rows], boxes.y[rows], boxes.w[rows], boxes.h[rows],
+            boxes.x[target], boxes.y[target], boxes.w[target], boxes.h[target],
+            self.relation_threshold[rule],
+        )
+        hit = mask.all() if self.relation_all[rule] else mask.any()
+        return RELATION_HIT if hit else RELATION_MISS
+
+    def drawing_relation_codes(self, boxes: BoundingBoxSet) -> np.ndarray:
+        """그림 하나의 관계 규칙 판정 코드 (relation_codes 와 같은 값)"""
+        return np.array(
+            [self._relation_code(boxes, rule) for rule in range(len(self.relation_names))], dtype=np.int64
+        )
+
+    def _ratio_finding(self, boxes: BoundingBoxSet, rule: int):
+        """비율 규칙 하나를 파이썬 스칼라로 판정 (ratio_values / ratio_codes 와 같은 결과)"""
+        numerator, denominator, kind, count, inclusive, large, small, large_msg, small_msg = self._ratio_specs[rule]
+        base = boxes.first(denominator)
+        if base is None:
+            return None
+        base = _box_measure(boxes, kind, base)
+        if not base > 0:
+            return None
+        rows = boxes.rows(numerator)
+        if count:
+            # mode="mean": 앞의 count 개 평균 하나로 판정
+            if len(rows) < count:
+                return None
+            measures = [sum(_box_measure(boxes, kind, i) for i in rows[:count]) / count]
+        else:
+            measures = [_box_measure(boxes, kind, i) for i in rows]
+        for value in measures:
+            ratio = value / base
+            if ratio >= large if inclusive else ratio > large:
+                return large_msg
+            if ratio <= small if inclusive else ratio < small:
+                return small_msg
+        return None
+
+    def _position_finding(self, boxes: BoundingBoxSet, rule: int):
+        label, axis, low, high = self._position_specs[rule]
+        messages = self.position_messages[rule]
+        first = boxes.first(label)
+        if first is None:
+            return messages[POSITION_MISSING]
+        if axis == AXES["x"]:
+            center = float(boxes.x[first]) + float(boxes.w[first]) / 2
+        else:
+            center = float(boxes.y[first]) + float(boxes.h[first]) / 2
+        size = boxes.image_size[axis] if boxes.image_size else self.canvas_size
+        if center < size * low:
+            return messages[POSITION_LOW]
+        if center > size * high:
+            return messages[POSITION_HIGH]
+        return messages[POSITION_MID]
+
+    def _relation_finding(self, boxes: BoundingBoxSet, rule: int):
+        return self.relation_messages[rule][self._relation_code(boxes, rule)]
+
+    def evaluate_table(self, table: BoxTable, large=None, small=None) -> list:
+        """BoxTable 의 모든 그림을 평가해 그림별 {규칙 이름: 메시지 또는 None} 리스트 반환"""
+        ratio_codes = self.ratio_codes(self.ratio_values(table, large, small), large, small)
+        position_codes = self.position_codes(table)
+        relation_codes = self.relation_codes(table)
+        results = []
+        for ratio_row, position_row, relation_row in zip(
+            ratio_codes.tolist(), position_codes.tolist(), relation_codes.tolist()
+        ):
+            result = {}
+            for name, code, large_msg, small_msg in zip(
+                self.ratio_names, ratio_row, self.large_messages, self.small_messages
+            ):
+                result[name] = large_msg if code == 1 else small_msg if code == -1 else None
+            for name, code, messages in zip(self.position_names, position_row, self.position_messages):
+                result[name] = messages[code]
+            for name, code, messages in zip(self.relation_names, relation_row, self.relation_messages):
+                result[name] = messages[code]
+            results.append(result)
+        return results
+
+    def evaluate_batch(self, box_sets: list, large=None, small=None) -> list:
+        """여러 그림을 한 번에 평가. large / small 로 임계값을 바꿔 실험할 수 있다"""
+        return self.evaluate_table(self.to_table(box_sets), large, small)
+
+    def evaluate(self, boxes) -> dict:
+        """
+        그림 하나를 평가해 {규칙 이름: 메시지 또는 None} 반환.
+        박스 몇 개짜리 그림에는 배열 준비 비용이 더 커서 BoxTable 대신 규칙별 스칼라 계산을 쓴다.
+        """
+        boxes = BoundingBoxSet.coerce(boxes)
+        return {name: finder(boxes, rule) for name, (finder, rule) in self._rules.items()}
+
+    def finding(self, boxes, name: str):
+        """규칙 하나만 평가 (check_* 처럼 결과 하나만 필요한 함수용)"""
+        finder, rule = self._rules[name]
+        return finder(BoundingBoxSet.coerce(boxes), rule)
+
+    def ratio_message(self, numerator_label, areas, denominator_area):
+        """
+        이미 구한 numerator 면적들과 denominator 면적으로 해당 레이블의 비율 규칙만 판정
+        (mode="each" 규칙 기준: 처음 기준을 벗어나는 값의 메시지)
+        """
+        rule = self._ratio_by_numerator.get(numerator_label)
+        if rule is None or denominator_area <= 0:
+            return None
+        ratios = np.asarray(areas, dtype=np.float64) / denominator_area
+        is_large, is_small = self._classify(ratios, rule, self.large[rule], self.small[rule])
+        hits = np.flatnonzero(is_large | is_small)
+        if not len(hits):
+            return None
+        return self.large_messages[rule] if is_large[hits[0]] else self.small_messages[rule]
+
+
+def load_rules(json_file_path: str) -> RuleSet:
+    return RuleSet.from_json(json_file_path)
@@ -0,0 +1,177 @@
+import math
+
+import numpy as np
+
+_EMPTY = np.empty(0, dtype=np.intp)
+
+# 관계 이름 → threshold 기본값 (overlaps: 최소 IoU, near: 대상 박스 긴 변 대비 중심 거리)
+RELATIONS = {"inside": None, "contains": None, "overlaps": 0.0, "above": None, "below": None, "near": 1.0}
+
+
+def iou(sx, sy, sw, sh, ox, oy, ow, oh):
+    """박스 쌍(브로드캐스트 가능한 배열)의 IoU"""
+    iw = np.clip(np.minimum(sx + sw, ox + ow) - np.maximum(sx, ox), 0, None)
+    ih = np.clip(np.minimum(sy + sh, oy + oh) - np.maximum(sy, oy), 0, None)
+    inter = iw * ih
+    union = sw * sh + ow * oh - inter
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(union > 0, inter / union, 0.0)
+
+
+def relation_mask(relation: str, sx, sy, sw, sh, ox, oy, ow, oh, threshold=None) -> np.ndarray:
+    """
+    주어(s) 박스가 대상(o) 박스에 대해 relation 을 만족하는지 (원소별 bool 배열).
+    inside: s 중심이 o 안, contains: o 중심이 s 안, overlaps: IoU > threshold,
+    above / below: 가로로 겹치면서 s 중심이 o 중심보다 위 / 아래 (y 는 아래로 증가),
+    near: 중심 거리 ≤ threshold × o 의 긴 변
+    """
+    if threshold is None:
+        threshold = RELATIONS[relation]
+    scx, scy = sx + sw / 2, sy + sh / 2
+    ocx, ocy = ox + ow / 2, oy + oh / 2
+    if relation == "inside":
+        return (ox <= scx) & (scx <= ox + ow) & (oy <= scy) & (scy <= oy + oh)
+    if relation == "contains":
+        return (sx <= ocx) & (ocx <= sx + sw) & (sy <= ocy) & (ocy <= sy + sh)
+    if relation == "overlaps":
+        return iou(sx, sy, sw, sh, ox, oy, ow, oh) > threshold
+    if relation in ("above", "below"):
+        columns = (sx < ox + ow) & (ox < sx + sw)
+        return columns & ((scy < ocy) if relation == "above" else (scy > ocy))
+    if relation == "near":
+        return np.hypot(scx - ocx, scy - ocy) <= threshold * np.maximum(ow, oh)
+    raise ValueError(f"Unknown relation: {relation}")
+
+
+class SpatialIndex:
+    """
+    한 그림의 박스를 균일 격자에 넣어 둔 공간 색인 (BoundingBoxSet.spatial() 로 한 번만 만든다).
+    각 칸에는 그 칸과 겹치는 박스 인덱스가 (벡터 연산 한 번으로) 들어 있어, 질의 영역이 걸친 칸의 후보만
+    relation_mask 로 정확히 검사한다. 칸 수는 박스 수 정도로 잡는다.
+    만드는 비용이 있으므로 같은 그림에 질의를 여러 번 할 때만 쓴다
+    (질의 한두 번은 relation_mask 로 전체 박스를 검사하는 편이 빠르다: python -m benchmarks.micro 의 spatial 항목).
+    """
+
+    def __init__(self, boxes, cells: int = None):
+        self.boxes = boxes
+        n = len(boxes)
+        if n:
+            self.x0, self.y0 = float(boxes.x.min()), float(boxes.y.min())
+            x1, y1 = float((boxes.x + boxes.w).max()), float((boxes.y + boxes.h).max())
+        else:
+            self.x0 = self.y0 = x1 = y1 = 0.0
+        self.cols = self.rows = max(1, int(math.ceil(math.sqrt(n))) if cells is None else cells)
+        self.cell_w = max((x1 - self.x0) / self.cols, 1e-9)
+        self.cell_h = max((y1 - self.y0) / self.rows, 1e-9)
+
+        # 박스마다 걸친 칸들을 (칸 번호, 박스 번호) 쌍으로 펼친 뒤 칸 번호 순으로 정렬해 둔다 (CSR 형식).
+        # 칸 번호 = 행 × cols + 열, 칸 c 의 박스는 _members[_offsets[c]:_offsets[c + 1]]
+        c0, r0, c1, r1 = self._cell_range(boxes.x, boxes.y, boxes.x + boxes.w, boxes.y + boxes.h)
+        span = c1 - c0 + 1
+        sizes = span * (r1 - r0 + 1)
+        owner = np.repeat(np.arange(n, dtype=np.intp), sizes)
+        offset = np.arange(len(owner)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        step = span[owner]
+        cell = (r0[owner] + offset // step) * self.cols + c0[owner] + offset % step
+        self._members = owner[np.argsort(cell, kind="stable")]
+        self._offsets = np.zeros(self.rows * self.cols + 1, dtype=np.intp)
+        np.cumsum(np.bincount(cell, minlength=self.rows * self.cols), out=self._offsets[1:])
+
+    def _cell_range(self, x1, y1, x2, y2):
+        """좌표 범위가 걸치는 (시작 열, 시작 행, 끝 열, 끝 행). 격자 밖은 가장자리 칸으로 자른다"""
+        c0 = np.clip(np.floor((np.asarray(x1) - self.x0) / self.cell_w), 0, self.cols - 1).astype(np.intp)
+        r0 = np.clip(np.floor((np.asarray(y1) - self.y0) / self.cell_h), 0, self.rows - 1).astype(np.intp)
+        c1 = np.clip(np.floor((np.asarray(x2) - self.x0) / self.cell_w), 0, self.cols - 1).astype(np.intp)
+        r1 = np.clip(np.floor((np.asarray(y2) - self.y0) / self.cell_h), 0, self.rows - 1).astype(np.intp)
+        return c0, r0, c1, r1
+
+    def _labels_mask(self, idx: np.ndarray, labels) -> np.ndarray:
+        if labels is None:
+            return np.ones(len(idx), dtype=bool)
+        if isinstance(labels, str):
+            labels = [labels]
+        wanted = [class_id for class_id, label in self.boxes.labels.items() if label in labels]
+        return np.isin(self.boxes.cls[idx], wanted)
+
+    def candidates(self, x1: float, y1: float, x2: float, y2: float, labels=None) -> np.ndarray:
+        """영역 [x1, x2] × [y1, y2] 가 걸친 칸에 들어 있는 박스 인덱스 (오름차순, 중복 없음)"""
+        if not len(self._members) or x2 < self.x0 or y2 < self.y0:
+            return _EMPTY
+        c0, r0, c1, r1 = (int(v) for v in self._cell_range(x1, y1, x2, y2))
+        # 한 행 안의 연속한 칸들은 _members 에서도 연속 구간이다
+        first = np.arange(r0, r1 + 1) * self.cols
+        found = [
+            self._members[start:end]
+            for start, end in zip(self._offsets[first + c0].tolist(), self._offsets[first + c1 + 1].tolist())
+            if end > start
+        ]
+        if not found:
+            return _EMPTY
+        seen = np.zeros(len(self.boxes), dtype=bool)
+        seen[np.concatenate(found)] = True
+        idx = np.flatnonzero(seen)
+        return idx[self._labels_mask(idx, labels)]
+
+    def _region(self, relation: str, i: int, threshold):
+        """대상 박스 i 에 대해 relation 을 만족할 수 있는 주어 박스가 반드시 걸치는 영역"""
+        b = self.boxes
+        x, y, w, h = float(b.x[i]), float(b.y[i]), float(b.w[i]), float(b.h[i])
+        if relation in ("inside", "contains", "overlaps"):
+            return x, y, x + w, y + h
+        if relation == "above":
+            return x, -math.inf, x + w, y + h / 2
+        if relation == "below":
+            return x, y + h / 2, x + w, math.inf
+        if relation == "near":
+            radius = (RELATIONS["near"] if threshold is None else threshold) * max(w, h)
+            cx, cy = x + w / 2, y + h / 2
+            return cx - radius, cy - radius, cx + radius, cy + radius
+        raise ValueError(f"Unknown relation: {relation}")
+
+    def query(self, relation: str, i: int, labels=None, threshold=None) -> np.ndarray:
+        """
+        박스 i 에 대해 relation 을 만족하는 박스 인덱스 (labels 로 레이블 제한, i 자신은 제외).
+        예: query("inside", trunk, ["다람쥐", "새"]) → 기둥 안에 중심이 있는 동물 박스
+        """
+        idx = self.candidates(*self._region(relation, i, threshold), labels=labels)
+        idx = idx[idx != i]
+        b = self.boxes
+        mask = relation_mask(
+            relation, b.x[idx], b.y[idx], b.w[idx], b.h[idx], b.x[i], b.y[i], b.w[i], b.h[i], threshold
+        )
+        return idx[mask]
+
+    def any(self, relation: str, i, labels=None, threshold=None) -> bool:
+        """i 가 None 이면 False"""
+        return i is not None and len(self.query(relation, i, labels, threshold)) > 0
+
+    def nearest(self, i: int, labels=None, k: int = 1) -> np.ndarray:
+        """
+        박스 i 와 중심 거리가 가까운 순서로 최대 k 개 인덱스.
+        i 의 칸에서 한 칸씩 고리를 넓혀 가며, 찾은 k 번째 거리가 다음 고리보다 가까우면 멈춘다.
+        """
+        b = self.boxes
+        cx, cy = float(b.x[i] + b.w[i] / 2), float(b.y[i] + b.h[i] / 2)
+        col, row = (int(v) for v in self._cell_range(cx, cy, cx, cy)[:2])
+        seen, found = set(), []
+        for ring in range(max(self.cols, self.rows)):
+            for r in range(row - ring, row + ring + 1):
+                for c in range(col - ring, col + ring + 1):
+                    if max(abs(r - row), abs(c - col)) == ring and 0 <= r < self.rows and 0 <= c < self.cols:
+                        cell = r * self.cols + c
+                        for j in self._members[self._offsets[cell]:self._offsets[cell + 1]].tolist():
+                            if j != i and j not in seen:
+                                seen.add(j)
+                                found.append(j)
+            # 다음 고리에 있는 박스는 (ring × 칸 크기) 보다 가까울 수 없다
+            reach = ring * min(self.cell_w, self.cell_h)
+            idx = np.array(found, dtype=np.intp)
+            idx = idx[self._labels_mask(idx, labels)]
+            if len(idx) >= k:
+                dist = np.hypot(b.x[idx] + b.w[idx] / 2 - cx, b.y[idx] + b.h[idx] / 2 - cy)
+                if np.sort(dist)[k - 1] <= reach:
+                    return idx[np.argsort(dist, kind="stable")[:k]]
+        idx = np.array(sorted(found), dtype=np.intp)
+        idx = idx[self._labels_mask(idx, labels)]
+        dist = np.hypot(b.x[idx] + b.w[idx] / 2 - cx, b.y[idx] + b.h[idx] / 2 - cy)
+        return idx[np.argsort(dist, kind="stable")[:k]]
@@ -1,8 +1,12 @@
-import json
+from models.bbox_set import BoundingBoxSet
+from models.rule_engine import load_rules
 
 # JSON 파일 경로 
 json_file_path = "data/tree_info.json"
 
+# 비율 / 위치 판정 규칙 (JSON 에서 읽어 임계값 테이블로 컴파일)
+rules = load_rules(json_file_path)
+
 # 한글 레이블을 영어로 매핑
 label_mapping = {
     "나무전체": "tree_whole",
@@ -25,7 +29,7 @@ def check_label_existence(bboxes, label):
     """
     Check the existence of a specific label and return a message and count.
     """
-    cnt = sum(1 for bbox in bboxes if bbox.get("label") == label)
+    cnt = BoundingBoxSet.coerce(bboxes).count(label)
     eng_label = label_mapping.get(label, label) 
     return (f"There are {cnt} '{eng_label}' objects." if cnt > 0 else f"No '{eng_label}' found."), cnt
 
@@ -34,92 +38,36 @@ def get_area_of_label(bboxes, label):
     Returns the area of the first object with the given label.
     Assume only one canopy if label='수관'.
     """
-    for bbox in bboxes:
-        if bbox.get("label") == label:
-            w = bbox.get("w", 0)
-            h = bbox.get("h", 0)
-            return w * h
-    return 0
+    areas = BoundingBoxSet.coerce(bboxes).areas(label)
+    return areas[0] if len(areas) else 0
 
 def get_areas_of_label(bboxes, label):
     """
     Returns a list of areas for all objects with the given label.
     """
-    areas = []
-    for bbox in bboxes:
-        if bbox.get("label") == label:
-            w = bbox.get("w", 0)
-            h = bbox.get("h", 0)
-            areas.append(w * h)
-    return areas
+    return BoundingBoxSet.coerce(bboxes).areas(label)
 
 def check_and_print_ratio(canopy_area, areas, label_type):
     """
     Compare object areas (trunk or branch) with the canopy area
     and determine if it's large or small based on thresholds.
+    Thresholds and messages are declared in data/tree_info.json.
     """
-    if label_type == "기둥":  # trunk
-        large_threshold = 0.650350
-        small_threshold = 0.381995
-        large_str = "Large trunk: actively engaged, creative environment"
-        small_str = "Small trunk: helplessness, maladaptation"
-    elif label_type == "가지":  # branch
-        large_threshold = 0.145762
-        small_threshold = 0.359546
-        large_str = "Large branch: inflated self-esteem, grandiose self"
-        small_str = "Small branch: weakness and incompetence"
-    else:
-        return None
-
-    for area in areas:
-        ratio = area / canopy_area
-        if ratio >= large_threshold:
-            return large_str
-        elif ratio <= small_threshold:
-            return small_str
-    # If not large or small, we do not print anything special
-    return None
+    return rules.ratio_message(label_type, areas, canopy_area)
 
 def check_animal_in_pillar(bboxes):
     """
     Check if an animal ('다람쥐', '새') is inside the pillar area.
+    Declared as the "animal" relation rule in data/tree_info.json.
     """
-    pillar_box = None
-    for bbox in bboxes:
-        if bbox.get("label") == "기둥":
-            pillar_box = bbox
-            break
-
-    if pillar_box is None:
-        return "No pillar found."
-
-    px, py = pillar_box["x"], pillar_box["y"]
-    pw, ph = pillar_box["w"], pillar_box["h"]
-
-    for bbox in bboxes:
-        label = bbox.get("label", "")
-        if label in ["다람쥐", "새"]:
-            cx = bbox["x"] + bbox["w"] / 2
-            cy = bbox["y"] + bbox["h"] / 2
-            if px <= cx <= px + pw and py <= cy <= py + ph:
-                return "Animal inside the hole: identification with animals, attachment-related, seeking stability, symbol of the womb"
-    return "No animal inside the tree."
+    return rules.finding(bboxes, "animal")
 
 def check_tree_position(bboxes):
     """
     Determine the vertical position of the '나무전체' (whole tree).
     Returns a string describing if it's top, center, or bottom.
     """
-    for bbox in bboxes:
-        if bbox.get("label") == "나무전체":
-            center_y = bbox["y"] + bbox["h"] / 2
-            if center_y < 1280 / 3:
-                return "Top position: goal-oriented tendency"
-            elif center_y > 1280 * 2 / 3:
-                return "Bottom position: self-protective attitude"
-            else:
-                return "Center position: inner stability, growth desire"
-    return "No 'whole tree' label found."
+    return rules.finding(bboxes, "position")
 
 def analyze_canopy(bboxes):
     """
@@ -134,17 +82,22 @@ def analyze_canopy(bboxes):
 def analyze_tree(bboxes):
     """나무 그림의 모든 특징을 분석"""
     results = []
+    # 박스 배열/레이블 인덱스를 한 번만 만들고 아래 모든 분석에서 재사용
+    bboxes = BoundingBoxSet.coerce(bboxes)
 
-    # 바운딩박스 정보 -> 문자열로 변환
+    # 바운딩박스 정보 -> 문자열로 변환 (응답용 dict 리스트를 그대로 사용)
     bbox_info = []
-    for bbox in bboxes:
+    for bbox in bboxes.to_dicts():
         eng_label = label_mapping.get(bbox['label'], bbox['label'])
         bbox_info.append(f"{eng_label}: [{bbox['x']},{bbox['y']},{bbox['w']},{bbox['h']}]")
     
     results.append(", ".join(bbox_info))
     results.append("")
 
-    results.append(check_tree_position(bboxes))        # tree position
+    # 위치 / 비율 규칙을 한 번에 평가
+    findings = rules.evaluate(bboxes)
+
+    results.append(findings["position"])               # tree position
     canopy_msg, canopy_area = analyze_canopy(bboxes)
     results.append(canopy_msg)                         # canopy info
     
@@ -153,8 +106,7 @@ def analyze_tree(bboxes):
         pillar_msg, pillar_exists = check_label_existence(bboxes, "기둥")
         results.append(pillar_msg)
         if pillar_exists:
-            pillar_areas = get_areas_of_label(bboxes, "기둥")
-            ratio_result = check_and_print_ratio(canopy_area, pillar_areas, "기둥")
+            ratio_result = findings["trunk"]
             if ratio_result:
                 results.append(ratio_result)
 
@@ -162,14 +114,12 @@ def analyze_tree(bboxes):
         branch_msg, branch_exists = check_label_existence(bboxes, "가지")
         results.append(branch_msg)
         if branch_exists:
-            branch_areas = get_areas_of_label(bboxes, "가지")
-            ratio_result = check_and_print_ratio(canopy_area, branch_areas, "가지")
+            ratio_result = findings["branch"]
             if ratio_result:
                 results.append(ratio_result)
 
         # Animal in pillar
-        animal_result = check_animal_in_pillar(bboxes)
-        results.append(animal_result)
+        results.append(findings["animal"])
 
     return results
 
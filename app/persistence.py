@@ -0,0 +1,139 @@
+import asyncio
+import time
+
+from config import DB_WRITE_BATCH_SIZE, DB_WRITE_FLUSH_INTERVAL, DB_WRITE_QUEUE_SIZE, ANALYTICS_RECORD
+from database import bulk_save_to_database, create_async_db_engine, save_batch, utc_now
+from metrics import STAGE_SECONDS, record_error
+
+RESULT = "result"
+DRAWING = "drawing"
+
+
+class WriteBehindWriter:
+    """
+    탐지 결과 write-behind 저장기.
+    요청 처리 경로에서는 enqueue() 로 대기열에 넣기만 하고 바로 응답한다.
+    백그라운드 태스크가 최대 batch_size 개 또는 flush_interval 초 단위로 모아 한 트랜잭션에 upsert 한다.
+    """
+
+    def __init__(self, batch_size: int = DB_WRITE_BATCH_SIZE,
+                 flush_interval: float = DB_WRITE_FLUSH_INTERVAL,
+                 max_queue: int = DB_WRITE_QUEUE_SIZE):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_flush_ms = 0.0
+        self._queue = None
+        self._task = None
+        self._async_engine = None
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        """이벤트 루프 안에서 호출 (lifespan 시작 시)"""
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        try:
+            self._async_engine = create_async_db_engine()
+        except Exception as e:
+            # 비동기 드라이버가 없으면 동기 엔진 + 스레드로 저장
+            print(f"Async DB engine error: {str(e)}")
+        self._task = asyncio.create_task(self._run())
+
+    def enqueue(self, image_path: str, results) -> bool:
+        """
+        저장할 결과를 대기열에 추가. 대기열이 가득 찼으면 버리고 False.
+        (결과 저장은 캐시 용도라 요청 지연보다 유실을 택한다)
+        """
+        return self._put((RESULT, (image_path, results)))
+
+    def enqueue_boxes(self, source: str, image_type: str, box_set) -> bool:
+        """
+        탐지 박스(BoundingBoxSet)를 정규화 박스 테이블에 기록하도록 대기열에 추가.
+        ANALYTICS_RECORD 가 꺼져 있으면 아무것도 하지 않는다.
+        """
+        if not ANALYTICS_RECORD:
+            return False
+        # 행 dict 는 저장할 때(insert_drawings) 한 번만 만든다
+        return self._put((DRAWING, (source, image_type, utc_now(), box_set.columns())))
+
+    def _put(self, item) -> bool:
+        if self._queue is None:
+            return False
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    async def stop(self):
+        """남은 대기열을 모두 저장한 뒤 종료"""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+            self._async_engine = None
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._queue.get_nowait() if timeout <= 0 else await asyncio.wait_for(self._queue.get(), timeout)
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list):
+        started = time.perf_counter()
+        results = [payload for kind, payload in batch if kind == RESULT]
+        drawings = [payload for kind, payload in batch if kind == DRAWING]
+        try:
+            if self._async_engine is not None:
+                async with self._async_engine.begin() as connection:
+                    await connection.run_sync(save_batch, results, drawings)
+            else:
+                await asyncio.to_thread(bulk_save_to_database, results, drawings)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"Write-behind flush error: {str(e)}")
+            record_error("db_write")
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage="db_write")
+        self.last_flush_ms = elapsed * 1000
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+
+result_writer = WriteBehindWriter()
@@ -0,0 +1,166 @@
+import cProfile
+import hmac
+import html
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+from config import ADMIN_TOKEN
+
+# 대기 중인 스레드의 마지막 프레임 (idle=False 면 이 위치에서 멈춘 스택은 버린다)
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("socketserver.py", "serve_forever"),
+}
+
+# 동시에 한 번만 실행 (샘플링 프로파일러 / 요청 단위 cProfile 각각)
+sampling_lock = threading.Lock()
+request_profile_lock = threading.Lock()
+
+
+def verify_admin(token) -> bool:
+    """ADMIN_TOKEN 이 설정되어 있고 일치할 때만 True (설정이 없으면 관리자 기능 비활성)"""
+    if not ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(str(token), ADMIN_TOKEN)
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_stacks(duration: float, interval: float = 0.01, idle: bool = False) -> Counter:
+    """
+    duration 초 동안 interval 초마다 모든 스레드의 파이썬 스택을 샘플링.
+    반환값: {"스레드;바깥 함수;...;안쪽 함수": 샘플 수}
+    """
+    own_id = threading.get_ident()
+    counts = Counter()
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            code = frame.f_code
+            if not idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, str(thread_id)))
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return counts
+
+
+def collapsed_stacks(counts: Counter) -> str:
+    """Brendan Gregg collapsed 형식 (flamegraph.pl / speedscope 에서 바로 열 수 있음)"""
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+def flamegraph_svg(counts: Counter, title: str = "HTP worker profile", width: int = 1200) -> str:
+    """collapsed 스택을 단순한 flame graph SVG 로 변환 (마우스를 올리면 함수 / 샘플 비율 표시)"""
+    root = {"children": {}, "count": 0}
+    for stack, count in counts.items():
+        node = root
+        node["count"] += count
+        for name in stack.split(";"):
+            node = node["children"].setdefault(name, {"children": {}, "count": 0})
+            node["count"] += count
+
+    row_height, top = 16, 40
+    total = max(root["count"], 1)
+    rects, max_depth = [], 0
+
+    def layout(node, x, depth):
+        nonlocal max_depth
+        for name, child in sorted(node["children"].items()):
+            child_width = child["count"] / total * width
+            if child_width >= 0.5:
+                max_depth = max(max_depth, depth)
+                rects.append((name, x, depth, child_width, child["count"]))
+                layout(child, x, depth + 1)
+            x += child_width
+
+    layout(root, 0.0, 0)
+    height = top + (max_depth + 1) * row_height + 10
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="monospace" font-size="11">',
+        f'<text x="{width / 2}" y="20" text-anchor="middle" font-size="14">{html.escape(title)} ({root["count"]} samples)</text>',
+    ]
+    for name, x, depth, rect_width, count in rects:
+        y = height - 10 - (depth + 1) * row_height
+        hue = 10 + hash(name.split(" ")[0]) % 40
+        label = html.escape(name)
+        parts.append(
+            f'<g><title>{label} — {count} samples ({count / total:.1%})</title>'
+            f'<rect x="{x:.2f}" y="{y}" width="{rect_width:.2f}" height="{row_height - 1}" '
+            f'fill="hsl({hue},85%,60%)" rx="1"/>'
+        )
+        if rect_width > 40:
+            chars = int(rect_width / 7)
+            text = label if len(name) <= chars else html.escape(name[:max(chars - 2, 1)]) + ".."
+            parts.append(f'<text x="{x + 3:.2f}" y="{y + 11}">{text}</text>')
+        parts.append("</g>")
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+def _is_event_loop_frame(filename: str, name: str) -> bool:
+    """이벤트 루프 자체 (_run_once, selector 대기) 는 모든 요청에 공통이라 요약에서 뺀다"""
+    return (
+        f"{os.sep}asyncio{os.sep}" in filename
+        or os.path.basename(filename) == "selectors.py"
+        or "select.epoll" in name
+        or "select.kqueue" in name
+    )
+
+
+def profile_summary(profiler: cProfile.Profile, limit: int = 30) -> list:
+    """cProfile 결과 중 누적 시간 상위 limit 개 함수 (이벤트 루프 내부 제외)"""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, name), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        if _is_event_loop_frame(filename, name):
+            continue
+        rows.append({
+            "function": f"{name} ({os.path.basename(filename)}:{line})",
+            "ncalls": ncalls,
+            "tottime_ms": round(tottime * 1000, 3),
+            "cumtime_ms": round(cumtime * 1000, 3),
+        })
+    rows.sort(key=lambda row: row["cumtime_ms"], reverse=True)
+    return rows[:limit]
+
+
+async def profile_call(func, limit: int = 30):
+    """
+    await func() 를 cProfile 로 감싸 실행하고 (결과, {"wall_ms", "functions"}) 반환.
+    이벤트 루프 스레드만 측정하므로 그동안 같은 루프에서 돈 다른 코루틴도 포함되고,
+    추론 / to_thread 작업은 await 대기 시간으로만 나타난다.
+    다른 요청이 이미 프로파일링 중이면 그냥 실행하고 요약 대신 None 을 반환한다.
+    """
+    if not request_profile_lock.acquire(blocking=False):
+        return await func(), None
+    profiler = cProfile.Profile()
+    try:
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            result = await func()
+        finally:
+            profiler.disable()
+        wall_ms = round((time.perf_counter() - start) * 1000, 3)
+        return result, {"wall_ms": wall_ms, "functions": profile_summary(profiler, limit)}
+    finally:
+        request_profile_lock.release()
@@ -0,0 +1,154 @@
+import math
+
+from config import OPENAI_MODEL, LLM_PROMPT_TOKEN_BUDGET
+from metrics import Histogram, LLM_EVENTS, register_metric
+from models.bbox_set import BoundingBoxSet
+
+# 모든 요청에 똑같이 들어가는 지시문. 요청마다 바뀌는 그림 정보는 user 메시지 끝에만 두어
+# 앞부분이 바이트 단위로 같게 유지되도록 한다.
+# OpenAI 프롬프트 캐시는 공통 prefix 가 1024 토큰 이상일 때만 적용되므로, 약 410 토큰인
+# 지금의 지시문만으로는 캐시 hit 가 나지 않는다 (지시문이 그 이상으로 길어지면 자동으로 적용).
+SYSTEM_PROMPT = """You are a professional HTP psychologist and mental health counselor.
+Analyze both current psychological state and developmental influences through drawing features.
+Provide detailed analysis by connecting specific drawing features to psychological interpretations.
+- Use formal Korean (-습니다)
+- Do not use special characters
+- Avoid using personal pronouns or labels (e.g., 'you', 'artist', etc)
+- Only use emojis that are specifically defined in section headers
+
+Each request lists the detected objects and rule-based findings of one drawing.
+Objects are given as label [x,y,w,h] in percent of the canvas (x,y = top-left corner, origin at the top-left).
+Repeated labels are summarized as label xN with their typical size, total area and spread.
+Analyze the sketch and provide psychological interpretation in formal Korean.
+Translate all measurements into descriptive terms (e.g., centered, upper right, large, small):
+
+1. Personality Analysis:
+- Start with "1. 🔅 성격 특징 🔅"
+- Key personality traits
+- Analyze element sizes and placements from coordinates
+- Connect spatial features to personality traits
+- Interpret overall composition
+
+2. Social Characteristics:
+- Start with "2. 🌤️ 대인 관계 🌤️"
+- Family relationship patterns
+- Communication style
+- Interpret element spacing and relationship boundaries
+- Attachment patterns
+
+3. Current Mental State:
+- Start with "3. 🧘 현재 심리 상태 🧘"
+- Emotional stability
+- Developmental effects
+- Stress/anxiety levels
+- Coping mechanisms
+
+4. Mental Health Care:
+- Start with "4. 💪 멘탈 케어 Tips 💪"
+- Understanding past influences
+- Stress management suggestions
+- Provide practical suggestions
+- Growth potential"""
+
+PROMPT_TOKENS = Histogram(
+    "htp_llm_prompt_tokens",
+    "Estimated prompt tokens per LLM request (system + user)",
+    ("type",),
+    buckets=(128, 256, 384, 512, 768, 1024, 1536, 2048, 4096),
+)
+register_metric(PROMPT_TOKENS)
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    tiktoken 이 설치되어 있으면 모델 토크나이저로, 없으면 문자 수 / 4 로 어림한다.
+    """
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+
+            try:
+                _encoding = tiktoken.encoding_for_model(OPENAI_MODEL)
+            except KeyError:
+                _encoding = tiktoken.get_encoding("cl100k_base")
+        except ImportError:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def _percent(value: float, size: float) -> int:
+    return int(round(value / size * 100)) if size else 0
+
+
+def summarize_boxes(boxes, label_names: dict, canvas: tuple) -> list:
+    """
+    박스를 레이블별로 묶어 한 줄씩 요약 (면적 합이 큰 레이블부터).
+    좌표는 캔버스 대비 정수 % 로, 박스가 하나면 [x,y,w,h], 여러 개면 개수 / 평균 크기 / 총 면적 / 분포 범위.
+    """
+    boxes = BoundingBoxSet.coerce(boxes)
+    width, height = canvas
+    groups = []
+    for label in dict.fromkeys(boxes.label_names()):
+        idx = boxes.indices(label)
+        x, y, w, h = boxes.x[idx], boxes.y[idx], boxes.w[idx], boxes.h[idx]
+        name = label_names.get(label, label)
+        if len(idx) == 1:
+            line = (f"{name} [{_percent(x[0], width)},{_percent(y[0], height)},"
+                    f"{_percent(w[0], width)},{_percent(h[0], height)}]")
+        else:
+            area = float((w * h).sum()) / (width * height) * 100 if width and height else 0.0
+            line = (
+                f"{name} x{len(idx)}: size ~{_percent(float(w.mean()), width)}x{_percent(float(h.mean()), height)}, "
+                f"area {area:.0f}%, x {_percent(float(x.min()), width)}-{_percent(float((x + w).max()), width)}, "
+                f"y {_percent(float(y.min()), height)}-{_percent(float((y + h).max()), height)}"
+            )
+        groups.append((float((w * h).sum()), line))
+    groups.sort(key=lambda group: group[0], reverse=True)
+    return [line for _, line in groups]
+
+
+def _user_prompt(image_type: str, objects: list, findings: list, omitted: int) -> str:
+    lines = [f"Drawing: {image_type.upper()}", "Objects:"]
+    lines += objects or ["(none)"]
+    if omitted:
+        lines.append(f"(+{omitted} smaller object groups omitted)")
+    lines.append("Findings:")
+    lines += findings or ["(none)"]
+    return "\n".join(lines)
+
+
+def build_messages(image_type: str, features: list, boxes, label_names: dict, canvas: tuple,
+                   token_budget: int = LLM_PROMPT_TOKEN_BUDGET) -> list:
+    """
+    GPT 에 보낼 system / user 메시지.
+    features: analyze_* 결과를 그대로 재사용 (첫 줄의 원본 좌표 문자열은 박스 요약으로 대체)
+    token_budget(system + user, 0 이면 무제한)을 넘으면 작은 객체 요약부터, 그다음 뒤쪽 findings 부터 뺀다.
+    """
+    findings = [feature for feature in features[1:] if feature]
+    objects = summarize_boxes(boxes, label_names, canvas)
+    system_tokens = count_tokens(SYSTEM_PROMPT)
+
+    omitted = 0
+    user_prompt = _user_prompt(image_type, objects, findings, omitted)
+    tokens = system_tokens + count_tokens(user_prompt)
+    if token_budget > 0 and tokens > token_budget:
+        LLM_EVENTS.inc(event="prompt_truncated")
+        while tokens > token_budget and (objects or len(findings) > 1):
+            if objects:
+                objects.pop()
+                omitted += 1
+            else:
+                findings.pop()
+            user_prompt = _user_prompt(image_type, objects, findings, omitted)
+            tokens = system_tokens + count_tokens(user_prompt)
+
+    PROMPT_TOKENS.observe(tokens, type=image_type)
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
@@ -0,0 +1,170 @@
+"""
+운영용 서버 진입점 (preload + fork).
+
+부모 프로세스가 모델을 한 번 로드 / 워밍업한 뒤 리슨 소켓을 열고 워커를 fork 한다.
+워커는 부모의 모델 가중치 메모리를 copy-on-write 로 공유하므로 워커 수를 늘려도
+메모리가 워커 수만큼 늘지 않는다. 워커가 죽으면 부모가 다시 띄운다.
+
+    SERVER_WORKERS=4 python serve.py
+
+uvicorn --workers 는 워커마다 앱을 새로 import 해 모델을 따로 로드하므로 여기서는 쓰지 않는다.
+개발 중에는 기존처럼 python main.py (reload) 를 사용한다.
+"""
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import SERVER_HOST, SERVER_PORT, SERVER_WORKERS, TORCH_THREADS_PER_WORKER
+
+# 시작 직후 이 시간 안에 죽은 워커는 재시작 전에 잠시 기다린다 (크래시 루프 방지)
+MIN_WORKER_UPTIME = 5.0
+
+
+def set_torch_threads(threads: int):
+    """torch intra-op 스레드 수 설정 (torch 가 없는 백엔드 환경이면 무시)"""
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+
+def torch_threads_per_worker(workers: int) -> int:
+    if TORCH_THREADS_PER_WORKER > 0:
+        return TORCH_THREADS_PER_WORKER
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def preload_models():
+    """
+    부모 프로세스에서 torch 모델을 로드 / 워밍업한다.
+    워밍업 중 fuse 등으로 바뀐 가중치까지 부모에서 만들어 두어야 워커가 페이지를 복사하지 않는다.
+    OpenMP 스레드 풀이 fork 이전에 만들어지지 않도록 부모는 torch 스레드 1개로 워밍업한다.
+    ONNX Runtime / OpenVINO 세션은 내부 스레드 풀 때문에 fork 후 재사용할 수 없어 워커가 각자 로드한다.
+    """
+    from models.model_manager import model_manager
+
+    set_torch_threads(1)
+    for model_type in model_manager.paths:
+        backend = model_manager.resolve(model_type)[1]
+        if backend != "torch":
+            print(f"Skipping preload of {model_type} ({backend} backend is loaded in each worker)")
+            continue
+        try:
+            model_manager.get(model_type)
+        except Exception as e:
+            print(f"Model load error ({model_type}): {str(e)}")
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """모든 워커가 공유할 리슨 소켓 (커널이 워커 사이에 연결을 나눠 준다)"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock: socket.socket, index: int, threads: int):
+    """fork 된 자식 프로세스에서 실행. 반환하지 않는다."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    exit_code = 0
+    try:
+        import uvicorn
+        from database import engine
+        import main
+
+        set_torch_threads(threads)
+        # 부모가 연 DB 커넥션은 공유하면 안 되므로 자식에서는 새로 연다
+        engine.dispose(close=False)
+        print(f"Worker {index} started (pid {os.getpid()}, torch threads {threads})")
+        server = uvicorn.Server(uvicorn.Config(main.app, log_level="info"))
+        server.run(sockets=[sock])
+    except Exception as e:
+        print(f"Worker {index} error: {str(e)}")
+        exit_code = 1
+    finally:
+        sys.stdout.flush()
+        os._exit(exit_code)
+
+
+class Supervisor:
+    """워커 fork / 재시작 / 종료 시그널 전달"""
+
+    def __init__(self, sock: socket.socket, workers: int, threads: int):
+        self.sock = sock
+        self.workers = workers
+        self.threads = threads
+        self.children = {}
+        self.stopping = False
+
+    def spawn(self, index: int):
+        pid = os.fork()
+        if pid == 0:
+            run_worker(self.sock, index, self.threads)
+        self.children[pid] = (index, time.monotonic())
+
+    def stop(self, signum, _frame):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM if signum == signal.SIGINT else signum)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for index in range(self.workers):
+            self.spawn(index)
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            index, started = self.children.pop(pid, (None, 0.0))
+            if index is None or self.stopping:
+                continue
+            print(f"Worker {index} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+            if time.monotonic() - started < MIN_WORKER_UPTIME:
+                time.sleep(1.0)
+            if not self.stopping:
+                self.spawn(index)
+
+
+def main():
+    workers = max(1, SERVER_WORKERS)
+    if not hasattr(os, "fork"):
+        # fork 를 지원하지 않는 플랫폼: 단일 프로세스로 실행
+        import uvicorn
+
+        uvicorn.run("main:app", host=SERVER_HOST, port=SERVER_PORT)
+        return
+
+    preload_models()
+    # 앱 모듈을 부모에서 import 해 두면 워커는 import 비용 없이 바로 시작한다
+    import main  # noqa: F401
+
+    sock = bind_socket(SERVER_HOST, SERVER_PORT)
+    threads = torch_threads_per_worker(workers)
+    # 부모가 만든 객체를 GC 대상에서 빼서, 워커의 GC 가 객체 헤더를 건드려 페이지를 복사하지 않게 한다
+    gc.collect()
+    gc.freeze()
+    print(f"Serving on {SERVER_HOST}:{SERVER_PORT} with {workers} workers")
+    Supervisor(sock, workers, threads).run()
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
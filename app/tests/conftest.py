@@ -0,0 +1,30 @@
+import os
+import random
+import sys
+
+import pytest
+
+# 앱 모듈은 app 디렉터리 기준으로 import 한다 (from models.bbox_set import ...)
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+
+def random_drawing(rng: random.Random, labels: list, max_boxes: int = 12) -> list:
+    """레이블 몇 개에 몰린 무작위 박스 dict 리스트 (좌표는 1280 캔버스 기준)"""
+    focus = rng.sample(labels, min(4, len(labels)))
+    return [
+        {
+            "label": rng.choice(focus),
+            "x": rng.uniform(0, 1280),
+            "y": rng.uniform(0, 1280),
+            "w": rng.uniform(0, 600),
+            "h": rng.uniform(0, 600),
+        }
+        for _ in range(rng.randint(0, max_boxes))
+    ]
+
+
+@pytest.fixture
+def rng():
+    return random.Random(0)
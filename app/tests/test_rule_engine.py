@@ -0,0 +1,283 @@
+"""
+RuleSet(JSON 규칙) 기반 분석기가 규칙을 코드에 직접 적어 두던 이전 구현과 같은 결과를 내는지,
+그리고 한 그림 평가(evaluate)와 여러 그림 일괄 평가(evaluate_batch)가 일치하는지 무작위 그림으로 확인한다.
+"""
+import pytest
+
+from conftest import random_drawing
+from models.bbox_set import BoundingBoxSet
+from models import house_func, person_func, tree_func
+
+CANVAS = 1280
+
+# ---- 이전 구현 (임계값과 메시지를 코드에 직접 둔 버전) ----
+
+
+def _boxes(bboxes, label):
+    return [bbox for bbox in bboxes if bbox["label"] == label]
+
+
+def _area(bbox):
+    return bbox["w"] * bbox["h"]
+
+
+def _exists_message(bboxes, label, names):
+    count = len(_boxes(bboxes, label))
+    name = names.get(label, label)
+    return (f"There are {count} '{name}' objects." if count > 0 else f"No '{name}' found."), count
+
+
+def _first_out_of_range(areas, base, large, small, large_message, small_message):
+    if base <= 0:
+        return None
+    for area in areas:
+        ratio = area / base
+        if ratio >= large:
+            return large_message
+        if ratio <= small:
+            return small_message
+    return None
+
+
+def _vertical_position(bboxes, label, top, center, bottom, missing):
+    found = _boxes(bboxes, label)
+    if not found:
+        return missing
+    center_y = found[0]["y"] + found[0]["h"] / 2
+    if center_y < CANVAS / 3:
+        return top
+    if center_y > CANVAS * 2 / 3:
+        return bottom
+    return center
+
+
+def _coords(bboxes, names):
+    return ", ".join(
+        f"{names.get(bbox['label'], bbox['label'])}: [{bbox['x']},{bbox['y']},{bbox['w']},{bbox['h']}]"
+        for bbox in bboxes
+    )
+
+
+HOUSE_RATIOS = {
+    "문": (0.159336, 0.102952, "Large door: a dependent person, a desire for active social contact",
+          "Small door: reluctance, helplessness and indecision to come into contact with the environment"),
+    "지붕": (0.923515, 0.665191, "Large roof: a tendency to daydream and flee to superficial interpersonal relationships",
+           "Small roof: a lack of psychological protection, realistic thinking"),
+    "창문": (0.073576, 0.041115, "Large window: inflated self-esteem, grandiose self",
+           "Small window: a psychological distancing, shy personality"),
+    "연기": (0.187033, 0.069497, "Large smoke: a lack of home warmth",
+           "Small smoke: suppression of emotional expression"),
+}
+
+
+def reference_house(bboxes):
+    names = house_func.label_mapping
+    results = [_coords(bboxes, names), ""]
+    results.append(_vertical_position(
+        bboxes, "집전체",
+        "Top position: idealistic and fanciful",
+        "Center position: A stable home environment, reflecting the sense of reality",
+        "Bottom position: Realistic, Unstable Sentiment",
+        "No 'house' label found.",
+    ))
+    wall_message, walls = _exists_message(bboxes, "집벽", names)
+    results.append(wall_message)
+    wall_area = _area(_boxes(bboxes, "집벽")[0]) if walls else 0
+    for label in ["문", "지붕", "창문", "연기"]:
+        message, count = _exists_message(bboxes, label, names)
+        results.append(message)
+        if count:
+            finding = _first_out_of_range(
+                [_area(bbox) for bbox in _boxes(bboxes, label)], wall_area, *HOUSE_RATIOS[label]
+            )
+            if finding:
+                results.append(finding)
+    extras = {
+        "길": "Road existence: Welcome to Social Interrelationships",
+        "잔디": "Grass existence: psychological stability",
+        "울타리": "Fence existence: trying to build a psychological bulwark",
+    }
+    results += [message for label, message in extras.items() if _boxes(bboxes, label)]
+    return results
+
+
+def reference_animal_in_pillar(bboxes):
+    pillars = _boxes(bboxes, "기둥")
+    if not pillars:
+        return "No pillar found."
+    pillar = pillars[0]
+    for label in ["다람쥐", "새"]:
+        for bbox in _boxes(bboxes, label):
+            cx, cy = bbox["x"] + bbox["w"] / 2, bbox["y"] + bbox["h"] / 2
+            if (pillar["x"] <= cx <= pillar["x"] + pillar["w"]
+                    and pillar["y"] <= cy <= pillar["y"] + pillar["h"]):
+                return ("Animal inside the hole: identification with animals, attachment-related, "
+                        "seeking stability, symbol of the womb")
+    return "No animal inside the tree."
+
+
+def reference_tree(bboxes):
+    names = tree_func.label_mapping
+    results = [_coords(bboxes, names), ""]
+    results.append(_vertical_position(
+        bboxes, "나무전체",
+        "Top position: goal-oriented tendency",
+        "Center position: inner stability, growth desire",
+        "Bottom position: self-protective attitude",
+        "No 'whole tree' label found.",
+    ))
+    canopy_message, canopies = _exists_message(bboxes, "수관", names)
+    results.append(canopy_message)
+    canopy_area = _area(_boxes(bboxes, "수관")[0]) if canopies else 0
+    if canopy_area > 0:
+        ratios = {
+            "기둥": (0.650350, 0.381995, "Large trunk: actively engaged, creative environment",
+                   "Small trunk: helplessness, maladaptation"),
+            "가지": (0.145762, 0.359546, "Large branch: inflated self-esteem, grandiose self",
+                   "Small branch: weakness and incompetence"),
+        }
+        for label, rule in ratios.items():
+            message, count = _exists_message(bboxes, label, names)
+            results.append(message)
+            if count:
+                finding = _first_out_of_range([_area(bbox) for bbox in _boxes(bboxes, label)], canopy_area, *rule)
+                if finding:
+                    results.append(finding)
+        results.append(reference_animal_in_pillar(bboxes))
+    return results
+
+
+def _indices(bboxes, label):
+    return [i for i, bbox in enumerate(bboxes) if bbox["label"] == label]
+
+
+def _scan_until(idx_a, idx_b, count_a=1):
+    """탐지 순서대로 훑을 때 label_a 가 count_a 개, label_b 가 1개 이상 처음으로 모이는 위치"""
+    if len(idx_a) < count_a or not idx_b:
+        return None
+    return max(idx_a[count_a - 1], idx_b[0])
+
+
+def _last_until(idx, stop):
+    return [i for i in idx if i <= stop][-1]
+
+
+def reference_person(bboxes):
+    names = person_func.label_mapping
+    results = [_coords(bboxes, names), ""]
+    findings = []
+
+    people = _boxes(bboxes, "사람전체")
+    if people:
+        center_x = people[0]["x"] + people[0]["w"] / 2
+        if center_x < CANVAS / 3:
+            findings.append("Left position: Obsession with the past, introverted tendencies.")
+        elif center_x > CANVAS * 2 / 3:
+            findings.append("Right position: Future-oriented attitude, extroverted tendencies.")
+        else:
+            findings.append("Center position: Self-centeredness, confidence in interpersonal relationships.")
+
+    heads, uppers = _indices(bboxes, "머리"), _indices(bboxes, "상체")
+    stop = _scan_until(heads, uppers)
+    if stop is not None:
+        upper_area = _area(bboxes[_last_until(uppers, stop)])
+        if upper_area > 0:
+            ratio = _area(bboxes[_last_until(heads, stop)]) / upper_area
+            if ratio > 2.2925420:
+                findings.append("Large head: Intellectual curiosity, lack of physical energy.")
+            elif ratio < 1.2819802:
+                findings.append("No head: Neurosis, depression, autistic tendencies.")
+
+    eyes, faces = _indices(bboxes, "눈"), _indices(bboxes, "얼굴")
+    stop = _scan_until(eyes, faces, count_a=2)
+    if stop is not None and not (len(eyes) > 2 and eyes[2] <= stop):
+        face_area = _area(bboxes[_last_until(faces, stop)])
+        if face_area > 0:
+            ratio = (_area(bboxes[eyes[0]]) + _area(bboxes[eyes[1]])) / 2 / face_area
+            if ratio > 0.0427861542:
+                findings.append("Large eyes: Suspicion of others, hypersensitivity.")
+            elif ratio < 0.0221859051:
+                findings.append("No eyes: Guilt feelings.")
+
+    legs = _indices(bboxes, "다리")
+    stop = _scan_until(legs, uppers, count_a=2)
+    if stop is not None and not (len(legs) > 2 and legs[2] <= stop):
+        upper_height = bboxes[_last_until(uppers, stop)]["h"]
+        if upper_height > 0:
+            ratio = (bboxes[legs[0]]["h"] + bboxes[legs[1]]["h"]) / 2 / upper_height
+            if ratio > 1.30162008:
+                findings.append("Long legs: Desire for stability and independence.")
+            elif ratio < 0.9464469:
+                findings.append("Short legs: Loss of independence, tendency for dependency.")
+
+    return results + findings
+
+
+ANALYZERS = {
+    "house": (house_func, house_func.analyze_house, reference_house),
+    "tree": (tree_func, tree_func.analyze_tree, reference_tree),
+    "person": (person_func, person_func.analyze_person, reference_person),
+}
+
+
+# 이전 구현은 탐지 순서대로 훑다 멈춘 위치의 박스를 썼고, JSON 규칙은 앞쪽 박스를 쓴다 (의도된 차이).
+# 레이블별 박스 수가 이 값 이하인 사람 그림에서만 두 방식의 결과가 같아야 한다.
+PERSON_SINGLE = {"머리": 1, "상체": 1, "얼굴": 1, "눈": 2, "다리": 2}
+
+
+def _unambiguous_person(bboxes):
+    return all(len(_boxes(bboxes, label)) <= most for label, most in PERSON_SINGLE.items())
+
+
+@pytest.mark.parametrize("image_type", list(ANALYZERS))
+def test_analyzer_matches_previous_implementation(image_type, rng):
+    module, analyze, reference = ANALYZERS[image_type]
+    labels = list(module.label_mapping)
+    for _ in range(2000):
+        bboxes = random_drawing(rng, labels)
+        if image_type == "person" and not _unambiguous_person(bboxes):
+            continue
+        expected = reference(bboxes)
+        assert analyze(bboxes) == expected, bboxes
+        assert analyze(BoundingBoxSet.from_dicts(bboxes)) == expected, bboxes
+
+
+def test_person_ratio_rules_on_complete_figures(rng):
+    """사람 규칙은 머리 / 상체 / 눈 / 다리가 함께 있어야 판정되므로 그런 그림을 따로 만든다"""
+    counts = {"머리": 1, "상체": 1, "얼굴": 1, "눈": 2, "다리": 2, "사람전체": 1, "손": 3}
+    for _ in range(2000):
+        bboxes = [
+            {"label": label, "x": rng.uniform(0, 1280), "y": rng.uniform(0, 1280),
+             "w": rng.uniform(0, 600), "h": rng.uniform(0, 600)}
+            for label, most in counts.items()
+            for _ in range(rng.randint(0, most))
+        ]
+        rng.shuffle(bboxes)
+        assert person_func.analyze_person(bboxes) == reference_person(bboxes), bboxes
+
+
+def test_person_ratio_uses_first_boxes():
+    """상체가 여러 개면 첫 상체를 기준으로 한다 (이전 구현은 다리 두 개가 모인 시점의 마지막 상체)"""
+    bboxes = [
+        {"label": "상체", "x": 0, "y": 0, "w": 100, "h": 100},
+        {"label": "다리", "x": 0, "y": 0, "w": 10, "h": 80},
+        {"label": "상체", "x": 0, "y": 0, "w": 100, "h": 50},
+        {"label": "다리", "x": 0, "y": 0, "w": 10, "h": 80},
+    ]
+    assert person_func.calculate_leg_to_upper_ratio(bboxes) == "Short legs: Loss of independence, tendency for dependency."
+    assert "Long legs: Desire for stability and independence." in reference_person(bboxes)
+
+
+@pytest.mark.parametrize("image_type", list(ANALYZERS))
+def test_evaluate_batch_matches_evaluate(image_type, rng):
+    module = ANALYZERS[image_type][0]
+    labels = list(module.label_mapping)
+    drawings = [BoundingBoxSet.from_dicts(random_drawing(rng, labels)) for _ in range(500)]
+    for boxes in drawings[::2]:
+        boxes.image_size = (rng.choice([640, 1280, 1920]), rng.choice([480, 1280, 2560]))
+    for boxes in drawings[::7]:
+        boxes.w[: len(boxes) // 2] = 0
+    single = [module.rules.evaluate(boxes) for boxes in drawings]
+    assert module.rules.evaluate_batch(drawings) == single
+    for boxes, findings in zip(drawings, single):
+        assert {name: module.rules.finding(boxes, name) for name in findings} == findings
@@ -0,0 +1,95 @@
+"""
+격자 색인(SpatialIndex) 질의가 모든 박스 쌍을 직접 검사한 결과와 같은지,
+그리고 관계 규칙의 그림 단위 판정(drawing_relation_codes)이 일괄 벡터 판정(relation_codes)과 같은지 확인한다.
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from conftest import APP_DIR, random_drawing
+from models import house_func, person_func, tree_func
+from models.bbox_set import BoundingBoxSet
+from models.rule_engine import RuleSet
+from models.spatial import relation_mask
+from test_rule_engine import reference_animal_in_pillar
+
+LABELS = ["창문", "집벽", "굴뚝", "연기", "문"]
+
+QUERIES = [
+    ("inside", None),
+    ("contains", None),
+    ("overlaps", None),
+    ("overlaps", 0.1),
+    ("above", None),
+    ("below", None),
+    ("near", None),
+    ("near", 0.8),
+]
+
+
+def brute_force(boxes, relation, i, labels=None, threshold=None):
+    others = np.array([j for j in range(len(boxes)) if j != i], dtype=np.intp)
+    if labels is not None:
+        others = others[np.isin(np.array(boxes.label_names(), dtype=object)[others], labels)]
+    mask = relation_mask(
+        relation,
+        boxes.x[others], boxes.y[others], boxes.w[others], boxes.h[others],
+        boxes.x[i], boxes.y[i], boxes.w[i], boxes.h[i],
+        threshold,
+    )
+    return others[mask]
+
+
+@pytest.mark.parametrize("relation, threshold", QUERIES)
+def test_query_matches_brute_force(relation, threshold, rng):
+    for _ in range(300):
+        boxes = BoundingBoxSet.from_dicts(random_drawing(rng, LABELS, max_boxes=40))
+        index = boxes.spatial()
+        for i in range(len(boxes)):
+            for labels in (None, ["창문", "연기"]):
+                found = index.query(relation, i, labels, threshold)
+                assert found.tolist() == brute_force(boxes, relation, i, labels, threshold).tolist()
+
+
+def test_nearest_matches_brute_force(rng):
+    for _ in range(300):
+        boxes = BoundingBoxSet.from_dicts(random_drawing(rng, LABELS, max_boxes=40))
+        cx, cy = boxes.centers()
+        index = boxes.spatial()
+        for i in range(len(boxes)):
+            for k in (1, 3):
+                found = index.nearest(i, k=k)
+                others = np.array([j for j in range(len(boxes)) if j != i], dtype=np.intp)
+                dist = np.hypot(cx[others] - cx[i], cy[others] - cy[i])
+                expected = np.sort(dist)[:k]
+                assert np.allclose(np.hypot(cx[found] - cx[i], cy[found] - cy[i]), expected)
+
+
+def test_animal_in_pillar_matches_previous_implementation(rng):
+    labels = list(tree_func.label_mapping)
+    for _ in range(2000):
+        bboxes = random_drawing(rng, labels, max_boxes=20)
+        assert tree_func.check_animal_in_pillar(bboxes) == reference_animal_in_pillar(bboxes)
+
+
+def _enabled_rules(image_type):
+    """기본으로 꺼 둔 관계 규칙까지 모두 켠 RuleSet"""
+    with open(os.path.join(APP_DIR, "data", f"{image_type}_info.json"), encoding="utf-8") as f:
+        spec = json.load(f)
+    for rule in spec.get("relation_rules", []):
+        rule["enabled"] = True
+    return RuleSet(spec)
+
+
+@pytest.mark.parametrize("module", [house_func, tree_func, person_func], ids=["house", "tree", "person"])
+def test_drawing_relation_codes_match_batch(module, rng):
+    image_type = module.__name__.rsplit(".", 1)[-1].split("_")[0]
+    rules = _enabled_rules(image_type)
+    assert rules.relation_names
+    labels = list(module.label_mapping)
+    drawings = [BoundingBoxSet.from_dicts(random_drawing(rng, labels, max_boxes=20)) for _ in range(500)]
+    batch = rules.relation_codes(rules.to_table(drawings))
+    for boxes, codes in zip(drawings, batch):
+        assert rules.drawing_relation_codes(boxes).tolist() == codes.tolist()
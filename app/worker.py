@@ -0,0 +1,52 @@
+"""
+작업 대기열 전용 워커 프로세스.
+
+웹 서버와 같은 DATABASE_URL 을 바라보며 POST /api/jobs 로 들어온 작업만 처리한다.
+웹 프로세스에서는 JOB_WORKERS=0 으로 작업 처리를 끄고, 이 프로세스를 필요한 만큼 띄워 따로 확장한다.
+
+    JOB_WORKERS=4 python worker.py
+"""
+import asyncio
+import os
+import signal
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import JOB_WORKERS
+
+
+async def run():
+    from api import process_job
+    from inference import executors, shutdown_executors
+    from jobs import job_workers
+    from llm_client import close_client
+    from models.model_manager import model_manager
+    from persistence import result_writer
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+
+    # 첫 작업이 모델 로드를 기다리지 않도록 추론 스레드에서 미리 로드
+    results = await asyncio.gather(
+        *(executor.run(model_manager.get, model_type) for model_type, executor in executors.items()),
+        return_exceptions=True,
+    )
+    for model_type, result in zip(executors, results):
+        if isinstance(result, Exception):
+            print(f"Model load error ({model_type}): {str(result)}")
+    result_writer.start()
+    job_workers.start(process_job, max(1, JOB_WORKERS))
+    print(f"Job worker started (pid {os.getpid()}, {max(1, JOB_WORKERS)} concurrent jobs)")
+    await stop.wait()
+
+    await job_workers.stop()
+    await result_writer.stop()
+    shutdown_executors()
+    await close_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(run())